@@ -1,8 +1,9 @@
 from flask import Flask
 from config import DevelopmentConfig, TestingConfig, Config
 from .utils import register_cli_commands
-from .extensions import db, bcrypt, login_manager, migrate
+from .extensions import db, bcrypt, login_manager, migrate, cache_foro, catalogo
 from .routes import main as main_blueprint
+from .services.idempotencia import nueva_clave_idempotencia
 
 # crea la Aplicación
 def create_app(config_name='development'):
@@ -25,8 +26,9 @@ def create_app(config_name='development'):
     # Construcción de la URI
     DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-    # Configuración de la DB
-    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+    # Configuración de la DB (los tests usan la base en memoria de TestingConfig)
+    if config_name != 'testing':
+        app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SECRET_KEY'] = 'PP3_2025'
     
     # Inicialización de extensiones
@@ -34,8 +36,11 @@ def create_app(config_name='development'):
     bcrypt.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+    cache_foro.init_app(app)
+    catalogo.init_app(app)
 
     app.register_blueprint(main_blueprint)
+    app.add_template_global(nueva_clave_idempotencia)
     
     # Comandos CLI
     register_cli_commands(app)
@@ -2,12 +2,18 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
+from .services.cache import Cache
+from .services.catalogo import Catalogo
 
 # Inicialización de objetos de extensión.
 db = SQLAlchemy()
 migrate = Migrate() 
 bcrypt = Bcrypt()
 login_manager = LoginManager()
+# Fragmentos HTML de los hilos del foro (ver foro_routes)
+cache_foro = Cache('FORO_CACHE')
+# Instantáneas del catálogo de destinos y servicios (ver services/catalogo)
+catalogo = Catalogo()
 
 # Configuración de LoginManager
 login_manager.login_view = 'main.login' 
@@ -4,4 +4,11 @@ from .destino import Destino
 from .posteo import Posteo
 from .rol import Rol
 from .servicio import Servicio
-from .reserva import Reserva
\ No newline at end of file
+from .reserva import Reserva
+from .catalogo_version import CatalogoVersion
+from .regla_precio import ReglaPrecio
+from .ocupacion_diaria import OcupacionDiaria
+from .clave_idempotencia import ClaveIdempotencia
+from .cotizacion_archivo import CotizacionArchivo
+from .reserva_archivo import ReservaArchivo
+from .resumen_mensual import ResumenMensual
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app.extensions import db
+
+class CatalogoVersion(db.Model):
+    """
+    Fila única con la versión global del catálogo (destinos y servicios).
+    Cada escritura del catálogo la incrementa; los workers la comparan con la
+    de su copia en memoria para saber si deben recargarla.
+    """
+    __tablename__ = 'catalogo_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CatalogoVersion {self.version}>'
@@ -0,0 +1,28 @@
+from datetime import datetime
+from app.extensions import db
+
+class ClaveIdempotencia(db.Model):
+    """
+    Resultado de un POST enviado con clave de idempotencia (ver services/idempotencia).
+    La primera petición con una clave la toma en estado 'en_curso'; al terminar guarda
+    la respuesta (redirección o cuerpo) y los mensajes flash, que se devuelven tal cual
+    a los reintentos con la misma clave hasta que vence (IDEMPOTENCIA_TTL_HORAS).
+    'fecha_toma' es cuándo la tomó la petición en curso: si pasa IDEMPOTENCIA_ESPERA_SEGUNDOS
+    sin terminar (el proceso murió), un reintento puede volver a tomarla.
+    """
+    __tablename__ = 'clave_idempotencia'
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.usuario_id', ondelete='CASCADE'), primary_key=True)
+    clave = db.Column(db.String(64), primary_key=True)
+    ruta = db.Column(db.String(200), nullable=False)
+    estado = db.Column(db.String(20), nullable=False, default='en_curso')
+    codigo = db.Column(db.Integer)
+    ubicacion = db.Column(db.String(500))
+    cuerpo = db.Column(db.Text)
+    tipo_contenido = db.Column(db.String(100))
+    mensajes = db.Column(db.Text)  # flashes como JSON [[categoria, mensaje], ...]
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    fecha_toma = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ClaveIdempotencia {self.clave} ({self.estado}) Usuario ID: {self.usuario_id}>'
@@ -1,13 +1,23 @@
 from app.extensions import db
 
+# Columnas que identifican una cotización: pedir lo mismo otra vez actualiza la existente
+COLUMNAS_UNICAS_COTIZACION = ('usuario_id', 'servicio_id', 'fecha_inicio', 'fecha_fin', 'cantidad_personas')
+
 class Cotizacion(db.Model):
     __tablename__ = 'cotizacion'
+    __table_args__ = (
+        db.Index('uq_cotizacion_parametros', *COLUMNAS_UNICAS_COTIZACION, unique=True),
+    )
     cotizacion_id = db.Column(db.Integer, primary_key=True)
     fecha_solicitud = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # A diferencia de fecha_solicitud, volver a pedirla no la cambia (resúmenes mensuales)
+    fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
     fecha_inicio = db.Column(db.Date, nullable=False)
     fecha_fin = db.Column(db.Date, nullable=False)
     cantidad_personas = db.Column(db.Integer, nullable=False)
     precio_total = db.Column(db.Float, nullable=False)
+    # Veces que se pidió esta misma cotización (1 = recién creada)
+    solicitudes = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     # Foreign Keys
     usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.usuario_id'), nullable=False)
     servicio_id = db.Column(db.Integer, db.ForeignKey('servicio.servicio_id'), nullable=False)
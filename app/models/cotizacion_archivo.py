@@ -0,0 +1,24 @@
+from app.extensions import db
+
+class CotizacionArchivo(db.Model):
+    """
+    Cotizaciones vencidas y sin reserva, movidas fuera de 'cotizacion' por el job
+    de archivo (services/archivo). Mismas columnas, sin FKs ni índice único: el
+    usuario o el servicio pueden eliminarse después sin tocar el historial.
+    """
+    __tablename__ = 'cotizacion_archivo'
+
+    cotizacion_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    fecha_solicitud = db.Column(db.DateTime)
+    fecha_creacion = db.Column(db.DateTime)
+    fecha_inicio = db.Column(db.Date, nullable=False)
+    fecha_fin = db.Column(db.Date, nullable=False)
+    cantidad_personas = db.Column(db.Integer, nullable=False)
+    precio_total = db.Column(db.Float, nullable=False)
+    solicitudes = db.Column(db.Integer, nullable=False)
+    usuario_id = db.Column(db.Integer, nullable=False, index=True)
+    servicio_id = db.Column(db.Integer, nullable=False)
+    fecha_archivado = db.Column(db.DateTime, nullable=False, server_default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<CotizacionArchivo ID {self.cotizacion_id}>'
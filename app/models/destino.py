@@ -1,13 +1,36 @@
+from sqlalchemy.orm import validates
 from app.extensions import db
+from app.services.geo import parsear_coordenadas, codificar_geohash
 
 class Destino(db.Model):
     __tablename__ = 'destino'
+    __table_args__ = (
+        # Consultas por rectángulo (cercanía y viewport del mapa)
+        db.Index('ix_destino_lat_lon', 'latitud', 'longitud'),
+    )
     destino_id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     descripcion = db.Column(db.Text)
     categoria = db.Column(db.String(50))
     coordenadas = db.Column(db.String(50), nullable=False) # Para la geolocalización
 
+    # Coordenadas numéricas derivadas de 'coordenadas' (se completan al asignarla)
+    latitud = db.Column(db.Float, nullable=True)
+    longitud = db.Column(db.Float, nullable=True)
+    # Celda geohash del punto: los prefijos comunes agrupan destinos cercanos
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+
+    @validates('coordenadas')
+    def _sincronizar_coordenadas(self, key, coordenadas):
+        """Mantiene latitud, longitud y geohash en sincronía con el texto 'lat,lon'."""
+        punto = parsear_coordenadas(coordenadas)
+        if punto is None:
+            self.latitud = self.longitud = self.geohash = None
+        else:
+            self.latitud, self.longitud = punto
+            self.geohash = codificar_geohash(*punto)
+        return coordenadas
+
     # Método de serialización a diccionario
     def to_dict(self):
         """Convierte el objeto Destino a un diccionario serializable para JSON."""
@@ -16,6 +39,8 @@ class Destino(db.Model):
             'nombre': self.nombre,
             'descripcion': self.descripcion,
             'coordenadas': self.coordenadas,
+            'latitud': self.latitud,
+            'longitud': self.longitud,
             'categoria': self.categoria 
         }
 
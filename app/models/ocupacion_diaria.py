@@ -0,0 +1,16 @@
+from app.extensions import db
+
+class OcupacionDiaria(db.Model):
+    """
+    Personas ya comprometidas por día en un Servicio (suma de sus reservas Aceptadas).
+    Se mantiene al cambiar el estado de una reserva (ver services/disponibilidad), así
+    el lugar libre de un rango se calcula leyendo una fila por día en vez de recorrer reservas.
+    """
+    __tablename__ = 'ocupacion_diaria'
+
+    servicio_id = db.Column(db.Integer, db.ForeignKey('servicio.servicio_id', ondelete='CASCADE'), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    personas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<OcupacionDiaria Servicio ID: {self.servicio_id} {self.fecha}: {self.personas}>'
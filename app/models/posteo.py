@@ -1,7 +1,32 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from sqlalchemy.orm.attributes import set_committed_value
 from app.extensions import db
 
+# Ruta materializada: IDs de los ancestros y del propio posteo, con ancho fijo.
+# Ej.: '0000000012/0000000045/'. Con ancho fijo el orden de texto coincide con
+# el orden del árbol y todo el subárbol de un posteo es un rango contiguo.
+ANCHO_SEGMENTO = 10
+SEPARADOR_RUTA = '/'
+LARGO_RUTA = 255
+# Nivel más profundo cuya ruta entra en la columna (la raíz es el nivel 0). Las
+# respuestas a un posteo de este nivel se cuelgan de su padre (ver services/hilos).
+PROFUNDIDAD_MAXIMA = LARGO_RUTA // (ANCHO_SEGMENTO + len(SEPARADOR_RUTA)) - 1
+
+def segmento_ruta(posteo_id):
+    return f'{posteo_id:0{ANCHO_SEGMENTO}d}{SEPARADOR_RUTA}'
+
 class Posteo(db.Model):
     __tablename__ = 'posteo'
+    __table_args__ = (
+        # Paginación por cursor de los posteos raíz y búsqueda de respuestas por padre
+        db.Index('ix_posteo_padre_fecha', 'posteo_padre_id', 'fecha_creacion', 'posteo_id'),
+        # Hilos ordenados por actividad reciente sin subconsultas correlacionadas
+        db.Index('ix_posteo_padre_actividad', 'posteo_padre_id', 'ultima_actividad', 'posteo_id'),
+        # Índice de texto completo (solo tiene efecto en PostgreSQL)
+        db.Index('ix_posteo_busqueda', 'busqueda', postgresql_using='gin'),
+    )
     
     posteo_id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(150), nullable=True)
@@ -26,5 +51,69 @@ class Posteo(db.Model):
     )
     # El backref 'replies' permite hacer comentario_padre.replies para obtener todas sus respuestas.
 
+    # Jerarquía materializada; se completa al insertar (ver _asignar_ruta).
+    # En PostgreSQL se usa collation "C" para que el índice compare byte a byte.
+    ruta = db.Column(
+        db.String(LARGO_RUTA).with_variant(db.String(LARGO_RUTA, collation='C'), 'postgresql'),
+        nullable=True,
+        index=True
+    )
+    profundidad = db.Column(db.Integer, nullable=False, default=0)
+
+    # Contadores desnormalizados, mantenidos al crear/eliminar respuestas (app.services.hilos).
+    # Se pueden recalcular con 'flask recalcular_contadores_foro'.
+    cantidad_respuestas = db.Column(db.Integer, nullable=False, default=0)     # respuestas directas
+    cantidad_descendientes = db.Column(db.Integer, nullable=False, default=0)  # respuestas a cualquier nivel
+    ultima_actividad = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+
+    # Versión del hilo (se usa en la raíz): se incrementa con cada cambio del hilo
+    # y forma parte de la clave de su fragmento HTML cacheado.
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    # Vector de búsqueda (tsvector en PostgreSQL), mantenido por app.services.busqueda.
+    # Diferido para no traerlo en cada consulta de posteos.
+    busqueda = deferred(db.Column(db.Text().with_variant(TSVECTOR(), 'postgresql'), nullable=True))
+
+    @property
+    def raiz_id(self):
+        """ID del posteo raíz del hilo, leído de la ruta (sin consultas)."""
+        if not self.ruta:
+            return self.posteo_id
+        return int(self.ruta[:ANCHO_SEGMENTO])
+
+    @property
+    def ids_ancestros(self):
+        """IDs de los ancestros, de la raíz hacia el padre."""
+        if not self.ruta:
+            return []
+        return [int(s) for s in self.ruta.split(SEPARADOR_RUTA)[:-2]]
+
     def __repr__(self):
-        return f'<Posteo ID {self.posteo_id} por {self.usuario_id}>'
\ No newline at end of file
+        return f'<Posteo ID {self.posteo_id} por {self.usuario_id}>'
+
+
+@event.listens_for(Posteo, 'after_insert')
+def _asignar_ruta(mapper, connection, target):
+    """Completa ruta y profundidad apenas se conoce el ID del posteo nuevo."""
+    tabla = Posteo.__table__
+    prefijo, profundidad = '', 0
+
+    if target.posteo_padre_id is not None:
+        padre = connection.execute(
+            db.select(tabla.c.ruta, tabla.c.profundidad)
+            .where(tabla.c.posteo_id == target.posteo_padre_id)
+        ).first()
+        if padre is not None and padre.ruta:
+            prefijo, profundidad = padre.ruta, padre.profundidad + 1
+    if profundidad > PROFUNDIDAD_MAXIMA:
+        # En PostgreSQL la ruta no entraría en la columna; SQLite la guardaría igual
+        raise ValueError(f'Las respuestas admiten hasta {PROFUNDIDAD_MAXIMA} niveles de profundidad.')
+
+    ruta = prefijo + segmento_ruta(target.posteo_id)
+    connection.execute(
+        tabla.update()
+        .where(tabla.c.posteo_id == target.posteo_id)
+        .values(ruta=ruta, profundidad=profundidad)
+    )
+    set_committed_value(target, 'ruta', ruta)
+    set_committed_value(target, 'profundidad', profundidad)
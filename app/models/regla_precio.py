@@ -0,0 +1,30 @@
+from app.extensions import db
+
+# Tipos de regla de precio que puede cargar un proveedor
+TIPOS_REGLA = {
+    'temporada': 'Temporada (rango de fechas)',
+    'fin_de_semana': 'Fin de semana (sábado y domingo)',
+    'grupo': 'Grupo (desde N personas)',
+}
+
+class ReglaPrecio(db.Model):
+    """
+    Modificador del precio base de un Servicio. 'multiplicador' se aplica al precio:
+    1.20 es un recargo del 20 %, 0.90 un descuento del 10 %.
+      temporada:     días entre fecha_desde y fecha_hasta (inclusive)
+      fin_de_semana: sábados y domingos
+      grupo:         cotizaciones con personas_min o más personas (se aplica el tramo más alto alcanzado)
+    """
+    __tablename__ = 'regla_precio'
+
+    regla_id = db.Column(db.Integer, primary_key=True)
+    servicio_id = db.Column(db.Integer, db.ForeignKey('servicio.servicio_id'), nullable=False, index=True)
+    tipo = db.Column(db.String(20), nullable=False)
+    multiplicador = db.Column(db.Float, nullable=False)
+    fecha_desde = db.Column(db.Date, nullable=True)
+    fecha_hasta = db.Column(db.Date, nullable=True)
+    personas_min = db.Column(db.Integer, nullable=True)
+    descripcion = db.Column(db.String(100))
+
+    def __repr__(self):
+        return f'<ReglaPrecio {self.tipo} x{self.multiplicador} Servicio ID: {self.servicio_id}>'
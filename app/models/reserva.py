@@ -1,7 +1,17 @@
 from app.extensions import db
 
+ESTADOS_RESERVA = ['Pendiente', 'Aceptada', 'Rechazada']
+
 class Reserva(db.Model):
     __tablename__ = 'reserva'
+    __table_args__ = (
+        # Métricas y reservas pendientes por servicio (panel de proveedor)
+        db.Index('ix_reserva_servicio_estado', 'servicio_id', 'estado'),
+        # Un índice por orden del reporte de administración (paginación por cursor, ver services/panel_admin)
+        db.Index('ix_reserva_fecha_reserva', 'fecha_reserva', 'reserva_id'),
+        db.Index('ix_reserva_fecha_servicio', 'fecha_servicio_inicio', 'reserva_id'),
+        db.Index('ix_reserva_costo', 'costo_total', 'reserva_id'),
+    )
     reserva_id = db.Column(db.Integer, primary_key=True)
     
     # Foreign Keys
@@ -16,6 +26,8 @@ class Reserva(db.Model):
     cantidad_personas = db.Column(db.Integer, nullable=False)
     costo_total = db.Column(db.Float, nullable=False)
     estado = db.Column(db.String(50), default='Pendiente')
+    # Se incrementa en cada cambio de estado (bloqueo optimista, ver services/reservas)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def __repr__(self):
         return f'<Reserva ID {self.reserva_id} para Cotización ID {self.cotizacion_id}>'
\ No newline at end of file
@@ -0,0 +1,31 @@
+from app.extensions import db
+
+class ReservaArchivo(db.Model):
+    """
+    Reservas ya resueltas (Aceptada o Rechazada) cuyo servicio terminó hace más de
+    RESERVA_ARCHIVO_DIAS, movidas fuera de 'reserva' por el job de archivo.
+    El panel de administración las consulta junto con las vigentes (services/archivo).
+    """
+    __tablename__ = 'reserva_archivo'
+    __table_args__ = (
+        # Mismos órdenes que el reporte sobre 'reserva' (con historial se recorren ambas)
+        db.Index('ix_reserva_archivo_fecha_reserva', 'fecha_reserva', 'reserva_id'),
+        db.Index('ix_reserva_archivo_fecha_servicio', 'fecha_servicio_inicio', 'reserva_id'),
+        db.Index('ix_reserva_archivo_costo', 'costo_total', 'reserva_id'),
+    )
+
+    reserva_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    usuario_id = db.Column(db.Integer, nullable=False, index=True)
+    servicio_id = db.Column(db.Integer, nullable=False)
+    cotizacion_id = db.Column(db.Integer, nullable=False)
+    fecha_reserva = db.Column(db.DateTime)
+    fecha_servicio_inicio = db.Column(db.Date, nullable=False)
+    fecha_servicio_fin = db.Column(db.Date, nullable=False)
+    cantidad_personas = db.Column(db.Integer, nullable=False)
+    costo_total = db.Column(db.Float, nullable=False)
+    estado = db.Column(db.String(50))
+    version = db.Column(db.Integer, nullable=False)
+    fecha_archivado = db.Column(db.DateTime, nullable=False, server_default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<ReservaArchivo ID {self.reserva_id}>'
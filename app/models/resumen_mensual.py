@@ -0,0 +1,24 @@
+from app.extensions import db
+
+class ResumenMensual(db.Model):
+    """
+    Totales de cotizaciones y reservas por destino, proveedor y mes (el de la solicitud
+    o el de la reserva). Se suman al crear cotizaciones y reservas y al cambiar de estado
+    una reserva (ver services/resumenes), así los reportes leen pocas filas ya agrupadas.
+    'flask recalcular_resumenes' los rearma desde cero.
+    """
+    __tablename__ = 'resumen_mensual'
+
+    destino_id = db.Column(db.Integer, db.ForeignKey('destino.destino_id', ondelete='CASCADE'), primary_key=True)
+    proveedor_id = db.Column(db.Integer, db.ForeignKey('usuario.usuario_id', ondelete='CASCADE'), primary_key=True)
+    # Primer día del mes
+    mes = db.Column(db.Date, primary_key=True)
+    cotizaciones = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    reservas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    aceptadas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rechazadas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Suma de costo_total de las reservas aceptadas
+    ingresos = db.Column(db.Float, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f'<ResumenMensual Destino ID: {self.destino_id} Proveedor ID: {self.proveedor_id} {self.mes}>'
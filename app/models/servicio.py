@@ -1,8 +1,16 @@
 from datetime import datetime
 from app.extensions import db
 
+# Valores válidos de 'unidad' y 'status' (formularios e importación masiva)
+UNIDADES_DISPONIBLES = ['Día', 'Persona', 'Unidad']
+ESTADOS_SERVICIO = ['Disponible', 'Pausado', 'Agotado']
+
 class Servicio(db.Model):
     __tablename__ = 'servicio'
+    __table_args__ = (
+        # Servicios de un proveedor ordenados por nombre (paginación del panel)
+        db.Index('ix_servicio_proveedor_nombre', 'proveedor_id', 'nombre'),
+    )
     
     servicio_id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
@@ -10,6 +18,8 @@ class Servicio(db.Model):
     precio_base = db.Column(db.Float, nullable=False)
     unidad = db.Column(db.String(50))
     status = db.Column(db.String(50), default='Disponible')
+    # Personas que puede atender por día; None = sin límite
+    capacidad = db.Column(db.Integer, nullable=True)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Clave Foránea a Destino
@@ -22,6 +32,10 @@ class Servicio(db.Model):
     cotizaciones = db.relationship('Cotizacion', backref='servicio_cotizado', lazy=True)
     proveedor = db.relationship('Usuario', backref='servicios_ofrecidos')
     reservas = db.relationship('Reserva', backref='servicio_reservado', lazy=True)
+    # Reglas de precio (temporada, fin de semana, grupo); ver services/precios
+    reglas_precio = db.relationship('ReglaPrecio', backref='servicio', lazy=True,
+                                    cascade='all, delete-orphan', order_by='ReglaPrecio.regla_id')
+    ocupacion = db.relationship('OcupacionDiaria', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<Servicio {self.nombre} en Destino ID: {self.destino_id}>'
\ No newline at end of file
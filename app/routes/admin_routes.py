@@ -1,41 +1,138 @@
-from flask import render_template, request, redirect, url_for, flash
+from datetime import date
+from flask import render_template, request, redirect, url_for, flash, current_app, Response, stream_with_context
 from flask_login import login_required
 from app.utils import admin_required
-from app.models import Cotizacion, Usuario, Rol, Destino, Reserva
-from app.extensions import db, bcrypt
+from app.models import Cotizacion, Usuario, Rol, Destino
+from app.extensions import db, bcrypt, catalogo
+from app.services.geo import parsear_coordenadas
+from app.services.clusters import actualizar_destino_en_clusters, quitar_destino_de_clusters
+from app.models.reserva import ESTADOS_RESERVA
+from app.services.panel_admin import ETIQUETAS_ORDEN, leer_filtros, contar_reservas, pagina_reservas
+from app.services.exportacion import (FORMATOS_EXPORTACION, TABLAS_EXPORTABLES, TIPOS_CONTENIDO,
+                                     columnas_de, elegir_columnas, exportar)
+from app.services.resumenes import reporte_por_destino, reporte_por_proveedor, reporte_totales
+from app.services.importacion import FORMATOS, importar_archivo_subido
+from app.services.importacion_usuarios import importar_usuarios
 from werkzeug.exceptions import abort
 from . import main
 
 # Función auxiliar para validar el formato de coordenadas
+# (el modelo Destino deriva latitud/longitud/geohash del mismo texto al guardarlo)
 def validar_coordenadas(coordenadas_str):
-    if ',' not in coordenadas_str:
-        return False
-
-    try:
-        lat_str, lon_str = coordenadas_str.split(',', 1)
-        float(lat_str.strip())
-        float(lon_str.strip())
-        return True
-    except ValueError:
-        return False
-    except Exception:
-        return False
+    return parsear_coordenadas(coordenadas_str) is not None
 
 
 @main.route('/admin')
 @admin_required
 @login_required
 def admin_panel():
-    # Reservas y Destinos para mostrarlas al admin
-    reservas = Reserva.query.all()
-    destinos = Destino.query.all()
+    # Reporte de reservas: filtros, orden y cursor por query string (con historial=1 también las archivadas)
+    filtros = leer_filtros(request.args)
+    cursor = request.args.get('cursor')
+    reservas, cursor_siguiente, total_reservas = [], None, 0
+    try:
+        reservas, cursor_siguiente = pagina_reservas(
+            filtros, cursor, current_app.config.get('ADMIN_RESERVAS_POR_PAGINA', 50)
+        )
+        total_reservas = contar_reservas(filtros)
+    except Exception as e:
+        flash('Error al cargar el reporte de reservas.', 'danger')
+        print(f"Database Error fetching Admin Reservations: {e}")
+
+    # Los destinos salen del catálogo en memoria; solo se pagina lo que se muestra
+    destinos = catalogo.destinos
+    por_pagina = current_app.config.get('ADMIN_DESTINOS_POR_PAGINA', 50)
+    paginas_destinos = max((len(destinos) + por_pagina - 1) // por_pagina, 1)
+    pagina_destinos = min(max(request.args.get('pagina_destinos', 1, type=int), 1), paginas_destinos)
 
+    # Parámetros de los filtros para armar los enlaces de paginación
+    filtros_url = {
+        'estado': filtros['estado'],
+        'desde': filtros['desde'].isoformat() if filtros['desde'] else None,
+        'hasta': filtros['hasta'].isoformat() if filtros['hasta'] else None,
+        'destino_id': filtros['destino_id'],
+        'historial': 1 if filtros['historial'] else None,
+        'orden': filtros['orden'],
+    }
 
     return render_template('panel_admin.html', 
                            reservas=reservas,
-                           destinos=destinos,
+                           total_reservas=total_reservas,
+                           cursor_siguiente=cursor_siguiente,
+                           es_primera_pagina=not cursor,
+                           filtros=filtros,
+                           filtros_url=filtros_url,
+                           estados=ESTADOS_RESERVA,
+                           ordenes=ETIQUETAS_ORDEN,
+                           destinos=destinos[(pagina_destinos - 1) * por_pagina:pagina_destinos * por_pagina],
+                           todos_los_destinos=destinos,
+                           pagina_destinos=pagina_destinos,
+                           paginas_destinos=paginas_destinos,
+                           columnas_exportables={tabla: columnas_de(tabla) for tabla in TABLAS_EXPORTABLES},
                            title='Panel de Administración')
 
+@main.route('/admin/reportes')
+@admin_required
+@login_required
+def admin_reportes():
+    # Reportes sobre los resúmenes mensuales: últimos ?meses=N (0 = todo el historial)
+    meses = request.args.get('meses', current_app.config.get('REPORTES_MESES', 12), type=int)
+    meses = min(max(meses, 0), 120)
+    desde = None
+    if meses:
+        hoy = date.today()
+        indice = hoy.year * 12 + hoy.month - 1 - (meses - 1)
+        desde = date(indice // 12, indice % 12 + 1, 1)
+
+    por_destino, por_proveedor, totales = [], [], None
+    try:
+        por_destino = reporte_por_destino(desde)
+        por_proveedor = reporte_por_proveedor(desde)
+        totales = reporte_totales(desde)
+    except Exception as e:
+        flash('Error al cargar los reportes.', 'danger')
+        print(f"Database Error fetching Admin Reports: {e}")
+
+    return render_template('admin_reportes.html',
+                           por_destino=por_destino,
+                           por_proveedor=por_proveedor,
+                           totales=totales,
+                           meses=meses,
+                           desde=desde,
+                           title='Reportes')
+
+@main.route('/admin/exportar')
+@admin_required
+@login_required
+def exportar_datos():
+    # Exportación en streaming: ?tabla=reservas|cotizaciones&formato=csv|ndjson&columnas=a,b&desde=&hasta=&historial=1
+    tabla = request.args.get('tabla', 'reservas')
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACION:
+        flash('Formato de exportación inválido: usa CSV o NDJSON.', 'danger')
+        return redirect(url_for('main.admin_panel'))
+    try:
+        # Acepta 'columnas=a,b' o la columna repetida (checkboxes)
+        columnas = elegir_columnas(tabla, ','.join(request.args.getlist('columnas')))
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('main.admin_panel'))
+    try:
+        desde = date.fromisoformat(request.args['desde']) if request.args.get('desde') else None
+        hasta = date.fromisoformat(request.args['hasta']) if request.args.get('hasta') else None
+    except ValueError:
+        flash('Fechas inválidas: usa el formato AAAA-MM-DD.', 'danger')
+        return redirect(url_for('main.admin_panel'))
+    historial = request.args.get('historial') == '1'
+
+    nombre = '_'.join(filter(None, [tabla, desde and desde.isoformat(), hasta and hasta.isoformat()]))
+    # stream_with_context mantiene la sesión de la base abierta mientras se envían los lotes
+    return Response(
+        stream_with_context(exportar(tabla, formato, columnas, desde, hasta, historial)),
+        mimetype=TIPOS_CONTENIDO[formato],
+        headers={'Content-Disposition': f'attachment; filename="{nombre}.{formato}"'}
+    )
+
 @main.route('/admin/crear_usuario', methods=['GET', 'POST'])
 @admin_required
 @login_required 
@@ -101,6 +198,26 @@ def crear_usuario():
                             form_data=form_data,
                             title='Crear Usuario')
 
+@main.route('/admin/importar_usuarios', methods=['GET', 'POST'])
+@admin_required
+@login_required
+def importar_usuarios_archivo():
+    roles = Rol.query.order_by(Rol.rol_id).all()
+    rol_por_defecto = request.form.get('rol_id', current_app.config.get('ROL_TURISTA_ID', 5), type=int)
+    resumen = None
+    if request.method == 'POST':
+        resumen = importar_archivo_subido(
+            lambda texto, formato: importar_usuarios(texto, formato, rol_por_defecto),
+            'usuarios', 'creados'
+        )
+
+    return render_template('admin_importar_usuarios.html',
+                           title='Importar Usuarios',
+                           resumen=resumen,
+                           formatos=FORMATOS,
+                           roles=roles,
+                           rol_por_defecto=rol_por_defecto)
+
 @main.route('/admin/crear_destino', methods=['GET', 'POST'])
 @admin_required
 @login_required 
@@ -140,7 +257,10 @@ def crear_destino():
                 )
                 
                 db.session.add(nuevo_destino)
+                db.session.flush()
+                version = catalogo.invalidar()
                 db.session.commit()
+                actualizar_destino_en_clusters(nuevo_destino, version)
                 flash(f'Destino "{nuevo_destino.nombre}" creado con éxito.', 'success')
                 return redirect(url_for('main.admin_panel'))
             except Exception as e:
@@ -189,7 +309,9 @@ def editar_destino(destino_id):
             destino.categoria = categoria
             destino.coordenadas = coordenadas
 
+            version = catalogo.invalidar()
             db.session.commit()
+            actualizar_destino_en_clusters(destino, version)
             
             flash(f'¡Destino "{destino.nombre}" actualizado exitosamente!', 'success')
             return redirect(url_for('main.admin_panel'))
@@ -222,7 +344,9 @@ def eliminar_destino(destino_id):
     try:
         # Eliminar el destino de la base de datos
         db.session.delete(destino)
+        version = catalogo.invalidar()
         db.session.commit()
+        quitar_destino_de_clusters(destino_id, version)
         flash(f'Destino "{destino.nombre}" eliminado correctamente.', 'success')
         
     except Exception as e:
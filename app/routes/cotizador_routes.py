@@ -1,17 +1,24 @@
 from datetime import datetime
-from flask import render_template, request, flash, redirect, url_for
+from flask import render_template, request, flash, redirect, url_for, abort, jsonify, current_app
 from flask_login import login_required, current_user
-from app.models import Destino, Servicio, Cotizacion, Reserva
-from app.extensions import db
-from app.utils import calcular_precio_total
+from app.models import Servicio, Cotizacion, Reserva
+from app.extensions import db, catalogo
+from app.services.precios import cotizar_servicio
+from app.services.cotizaciones import cotizar_lote, guardar_cotizacion
+from app.services.resumenes import registrar_reserva
+from app.services.disponibilidad import RangoDemasiadoLargo, lugar_libre, validar_rango_reservable
+from app.services.idempotencia import idempotente
+from app.services.archivo import esta_vencida
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from . import main
 
 @main.route('/cotizador', methods=['GET', 'POST'])
 @login_required
+@idempotente
 def cotizador():
-    # Cargar todos los destinos con sus servicios relacionados
-    destinos = Destino.query.options(joinedload(Destino.servicios)).all()
+    # Solo los destinos: los servicios de cada uno se piden a /api/destinos/<id>/servicios
+    destinos = catalogo.destinos
     cotizacion_resultado = None
     
     servicio_id_url = request.args.get('servicio_id', type=int)
@@ -34,6 +41,15 @@ def cotizador():
             fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d').date()
             fecha_fin = datetime.strptime(fecha_fin_str, '%Y-%m-%d').date() if fecha_fin_str else fecha_inicio
 
+            max_personas = current_app.config.get('COTIZACION_MAX_PERSONAS', 100)
+            if not 1 <= personas <= max_personas:
+                flash(f'La cantidad de personas debe estar entre 1 y {max_personas}.', 'danger')
+                return render_template('cotizador.html', 
+                                       destinos=destinos, 
+                                       cotizacion_resultado=cotizacion_resultado,
+                                       title='Cotizador',
+                                       servicio_precargado=servicio_precargado)
+
             if fecha_inicio > fecha_fin:
                 flash('La fecha de fin no puede ser anterior a la fecha de inicio.', 'danger')
                 return render_template('cotizador.html', 
@@ -41,45 +57,42 @@ def cotizador():
                                        cotizacion_resultado=cotizacion_resultado,
                                        title='Cotizador',
                                        servicio_precargado=servicio_precargado)
+
+            max_dias = current_app.config.get('COTIZACION_MAX_DIAS', 366)
+            if (fecha_fin - fecha_inicio).days + 1 > max_dias:
+                flash(f'Se puede cotizar hasta {max_dias} días por pedido.', 'danger')
+                return render_template('cotizador.html', 
+                                       destinos=destinos, 
+                                       cotizacion_resultado=cotizacion_resultado,
+                                       title='Cotizador',
+                                       servicio_precargado=servicio_precargado)
             
-            servicio = Servicio.query.get_or_404(servicio_id)
+            # Solo el servicio cotizado, con su destino en la misma consulta
+            servicio = db.session.get(Servicio, int(servicio_id), options=[joinedload(Servicio.destino)])
+            if servicio is None:
+                abort(404)
 
             dias = (fecha_fin - fecha_inicio).days + 1
 
-            total = calcular_precio_total(servicio, personas, dias)
-
-            cotizacion = Cotizacion.query.filter_by(
-                usuario_id=current_user.usuario_id,
-                servicio_id=servicio_id,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                cantidad_personas=personas,
-            ).first()
-
-            if not cotizacion:
-                cotizacion = Cotizacion(
-                    usuario_id=current_user.usuario_id,
-                    servicio_id=servicio_id,
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=fecha_fin,
-                    cantidad_personas=personas,
-                    precio_total=total,
-                )
-                db.session.add(cotizacion)
-                db.session.commit()
+            total = cotizar_servicio(servicio, personas, fecha_inicio, fecha_fin)
+
+            # Una sola sentencia: crea la cotización o actualiza la existente con los mismos parámetros
+            cotizacion_id, es_nueva = guardar_cotizacion(
+                current_user.usuario_id, servicio.servicio_id, fecha_inicio, fecha_fin, personas, total
+            )
+            db.session.commit()
+            if es_nueva:
                 flash('Cotización calculada y guardada correctamente.', 'success')
             else:
-                cotizacion.precio_total = total
-                db.session.commit() 
                 flash('Ya existe una cotización con estos parámetros.', 'info')
                         
-            reserva_asociada = Reserva.query.filter_by(cotizacion_id=cotizacion.cotizacion_id).first()
+            reserva_asociada = Reserva.query.filter_by(cotizacion_id=cotizacion_id).first()
                     
             estado_reserva = reserva_asociada.estado if reserva_asociada else 'Pendiente'
             es_reservable = reserva_asociada is None
 
             cotizacion_resultado = {
-                'cotizacion_id': cotizacion.cotizacion_id,
+                'cotizacion_id': cotizacion_id,
                 'destino': servicio.destino.nombre,
                 'servicio': servicio.nombre,
                 'precio_base': servicio.precio_base,
@@ -103,8 +116,33 @@ def cotizador():
                            title='Cotizador',
                            servicio_precargado=servicio_precargado)
 
+# Cotización de muchos pedidos en una sola llamada (agencias asociadas)
+@main.route('/api/cotizaciones/batch', methods=['POST'])
+@login_required
+@idempotente
+def api_cotizaciones_batch():
+    datos = request.get_json(silent=True)
+    pedidos = datos.get('cotizaciones') if isinstance(datos, dict) else None
+    if not isinstance(pedidos, list) or not pedidos:
+        return jsonify({'error': 'Se espera un JSON con una lista "cotizaciones".'}), 400
+
+    max_pedidos = current_app.config.get('COTIZACION_LOTE_MAX', 1000)
+    if len(pedidos) > max_pedidos:
+        return jsonify({'error': f'El lote admite hasta {max_pedidos} cotizaciones.'}), 400
+
+    try:
+        cotizaciones, errores = cotizar_lote(current_user.usuario_id, pedidos)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Database Error on batch quote: {e}")
+        return jsonify({'error': 'Error al guardar las cotizaciones.'}), 500
+
+    return jsonify({'cotizaciones': cotizaciones, 'errores': errores}), 201 if cotizaciones else 400
+
 @main.route('/reservar_cotizacion/<int:cotizacion_id>', methods=['POST'])
 @login_required
+@idempotente
 def reservar_cotizacion(cotizacion_id):
     cotizacion = Cotizacion.query.get_or_404(cotizacion_id)
     
@@ -114,6 +152,25 @@ def reservar_cotizacion(cotizacion_id):
         flash(f'Esta cotización ya tiene una reserva con estado "{reserva_existente.estado}".', 'warning')
         return redirect(url_for('main.cotizador'))
 
+    if esta_vencida(cotizacion):
+        flash('Esta cotización está vencida. Vuelve a cotizar para obtener el precio actual.', 'warning')
+        return redirect(url_for('main.cotizador'))
+
+    # Aceptarla escribe una fila de ocupación por día: los rangos enormes no se reservan
+    try:
+        validar_rango_reservable(cotizacion.fecha_inicio, cotizacion.fecha_fin)
+    except RangoDemasiadoLargo as e:
+        flash(f'{e} Vuelve a cotizar con un rango más corto.', 'warning')
+        return redirect(url_for('main.cotizador'))
+
+    # Las pendientes no ocupan lugar (el cupo se toma al aceptarla), pero no tiene
+    # sentido solicitar una reserva para días que ya están completos
+    libres = lugar_libre(cotizacion.servicio_cotizado, cotizacion.fecha_inicio, cotizacion.fecha_fin)
+    if libres is not None and libres < cotizacion.cantidad_personas:
+        flash(f'El servicio no tiene lugar para {cotizacion.cantidad_personas} personas en esas fechas '
+              f'(quedan {libres} lugares en el día más ocupado).', 'warning')
+        return redirect(url_for('main.cotizador'))
+
     try:
         nueva_reserva = Reserva(
             usuario_id=cotizacion.usuario_id,
@@ -127,10 +184,18 @@ def reservar_cotizacion(cotizacion_id):
             fecha_reserva=datetime.utcnow()
         )
         db.session.add(nueva_reserva)
+        db.session.flush()
+        registrar_reserva(nueva_reserva.servicio_id, nueva_reserva.fecha_reserva)
         db.session.commit()
         
         flash('Reserva solicitada exitosamente. El prestador del servicio revisará tu solicitud.', 'success')
-    
+
+    except IntegrityError:
+        # Otra solicitud (sin clave de idempotencia) reservó la misma cotización en paralelo
+        db.session.rollback()
+        reserva_existente = Reserva.query.filter_by(cotizacion_id=cotizacion_id).first()
+        estado = reserva_existente.estado if reserva_existente else 'Pendiente'
+        flash(f'Esta cotización ya tiene una reserva con estado "{estado}".', 'warning')
     except Exception as e:
         db.session.rollback()
         flash(f'Error al procesar la reserva: {e}', 'danger')
@@ -1,35 +1,141 @@
-from flask import render_template, flash, redirect, url_for
+from datetime import date
+from flask import render_template, flash, redirect, url_for, request, jsonify, current_app, abort
 from flask_login import login_required
 from app.models import Destino, Servicio
+from app.services.destinos import destinos_cercanos, destinos_en_caja, parsear_bbox
+from app.services.clusters import clusters_en_caja
+from app.services.itinerario import armar_itinerario
+from app.services.disponibilidad import calendario, servicios_disponibles
+from app.extensions import db, catalogo
 from sqlalchemy.orm import joinedload
 from . import main
 
 @main.route('/mapa_destinos')
 @login_required 
 def mapa_destinos():
+    # La página no lleva destinos: el mapa los pide a /api/destinos según el viewport
+    return render_template(
+        'mapa_destinos.html', 
+        title='Mapa de Destinos')
+
+# Destinos dentro del viewport del mapa, como GeoJSON
+@main.route('/api/destinos')
+@login_required
+def api_destinos():
+    bbox = parsear_bbox(request.args.get('bbox'))
+    zoom = request.args.get('zoom', type=int)
+    if bbox is None:
+        return jsonify({'error': 'Parámetro bbox inválido. Formato: oeste,sur,este,norte'}), 400
+    if zoom is None or not 0 <= zoom <= 22:
+        return jsonify({'error': 'Parámetro zoom inválido (0 a 22).'}), 400
+
     try:
-        # Obtener todos los objetos Destino
-        destinos_objetos = Destino.query.all()
-    
-        # Serialización: Convertir la lista de objetos a una lista de diccionarios
-        destinos_serializados = [
+        # Hasta MAPA_CLUSTER_ZOOM_MAX se responden clusters precalculados; más cerca, los puntos
+        if zoom <= current_app.config.get('MAPA_CLUSTER_ZOOM_MAX', 16):
+            return jsonify(clusters_en_caja(*bbox, zoom=zoom))
+        limite = current_app.config.get('MAPA_MAX_DESTINOS', 2000)
+        return jsonify(destinos_en_caja(*bbox, limite=limite))
+    except Exception as e:
+        print(f"Database Error: {e}")
+        return jsonify({'error': 'Error al cargar los destinos.'}), 500
+
+# Servicios disponibles de un destino (los pide el cotizador al elegir el destino)
+@main.route('/api/destinos/<int:destino_id>/servicios')
+@login_required
+def api_servicios_destino(destino_id):
+    instantanea = catalogo.actual()
+    destino = instantanea.destinos_por_id.get(destino_id)
+    if destino is None:
+        abort(404)
+
+    respuesta = jsonify({
+        'destino_id': destino.destino_id,
+        'servicios': [
             {
-                'destino_id': d.destino_id, 
-                'nombre': d.nombre,
-                'descripcion': d.descripcion,
-                'coordenadas': d.coordenadas # Las coordenadas son necesarias para el mapa
-            } 
-            for d in destinos_objetos
+                'id': s.servicio_id,
+                'nombre': s.nombre,
+                'precio_base': s.precio_base,
+                'unidad': s.unidad
+            }
+            for s in destino.servicios if s.status == 'Disponible'
         ]
+    })
+    # Sale de la instantánea del catálogo: mientras no cambie la versión, el navegador
+    # puede reutilizar la respuesta (304 si revalida con el mismo ETag)
+    respuesta.set_etag(f'catalogo-{instantanea.version}-{destino_id}')
+    respuesta.cache_control.private = True
+    respuesta.cache_control.max_age = current_app.config.get('CATALOGO_VERIFICAR_CADA', 2)
+    return respuesta.make_conditional(request)
+
+def _rango_de_fechas(args):
+    """(inicio, fin) de los parámetros fecha_inicio/fecha_fin (AAAA-MM-DD), o un mensaje de error."""
+    try:
+        inicio = date.fromisoformat(args.get('fecha_inicio', ''))
+        fin = date.fromisoformat(args['fecha_fin']) if args.get('fecha_fin') else inicio
+    except ValueError:
+        return None, 'Parámetros fecha_inicio/fecha_fin inválidos (formato AAAA-MM-DD).'
+    if fin < inicio:
+        return None, 'La fecha de fin no puede ser anterior a la fecha de inicio.'
+    max_dias = current_app.config.get('DISPONIBILIDAD_MAX_DIAS', 366)
+    if (fin - inicio).days + 1 > max_dias:
+        return None, f'El rango admite hasta {max_dias} días.'
+    return (inicio, fin), None
+
+# Servicios del destino con lugar para N personas en todas las fechas pedidas
+@main.route('/api/destinos/<int:destino_id>/disponibilidad')
+@login_required
+def api_disponibilidad_destino(destino_id):
+    if catalogo.destino(destino_id) is None:
+        abort(404)
+    rango, error = _rango_de_fechas(request.args)
+    personas = request.args.get('personas', 1, type=int)
+    if error is None and personas < 1:
+        error = 'La cantidad de personas debe ser al menos 1.'
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        disponibles = servicios_disponibles(destino_id, *rango, personas)
     except Exception as e:
-        flash('Error al cargar los destinos.', 'danger')
         print(f"Database Error: {e}")
-        destinos_serializados = []
-    
-    return render_template(
-        'mapa_destinos.html', 
-        title='Mapa de Destinos', 
-        destinos=destinos_serializados)
+        return jsonify({'error': 'Error al consultar la disponibilidad.'}), 500
+
+    return jsonify({
+        'destino_id': destino_id,
+        'fecha_inicio': rango[0].isoformat(),
+        'fecha_fin': rango[1].isoformat(),
+        'personas': personas,
+        'servicios': [
+            {
+                'id': s.servicio_id,
+                'nombre': s.nombre,
+                'precio_base': s.precio_base,
+                'unidad': s.unidad,
+                'lugares_libres': libres
+            }
+            for s, libres in disponibles
+        ]
+    })
+
+# Lugares libres día por día de un servicio (null = sin límite de capacidad)
+@main.route('/api/servicios/<int:servicio_id>/disponibilidad')
+@login_required
+def api_disponibilidad_servicio(servicio_id):
+    servicio = db.session.get(Servicio, servicio_id)
+    if servicio is None:
+        abort(404)
+    rango, error = _rango_de_fechas(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    return jsonify({
+        'servicio_id': servicio_id,
+        'capacidad': servicio.capacidad,
+        'dias': [
+            {'fecha': dia.isoformat(), 'lugares_libres': libres}
+            for dia, libres in calendario(servicio, *rango)
+        ]
+    })
 
 @main.route('/destino/<int:destino_id>')
 @login_required
@@ -53,4 +159,67 @@ def destino_detalle(destino_id):
     return render_template('destino_detalle_servicios.html',
                            title=f'Servicios en {destino.nombre}',
                            destino=destino,
-                           servicios=servicios)
\ No newline at end of file
+                           servicios=servicios)
+
+# Destinos cercanos a un punto, ordenados por distancia
+@main.route('/api/destinos/cercanos')
+@login_required
+def api_destinos_cercanos():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radio_km = request.args.get('radio_km', 10.0, type=float)
+    limite = min(request.args.get('limite', 50, type=int), 500)
+
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'Parámetros lat y lon inválidos.'}), 400
+    if radio_km <= 0 or radio_km > 1000:
+        return jsonify({'error': 'El radio debe estar entre 0 y 1000 km.'}), 400
+
+    return jsonify({
+        'origen': {'latitud': lat, 'longitud': lon},
+        'radio_km': radio_km,
+        'destinos': destinos_cercanos(lat, lon, radio_km, limite)
+    })
+
+def _ids_itinerario(valores):
+    """Ids de destino únicos y válidos, en el orden recibido."""
+    ids = []
+    for valor in valores:
+        for parte in str(valor).split(','):
+            if parte.strip().isdigit() and int(parte) not in ids:
+                ids.append(int(parte))
+    return ids
+
+# Orden de visita optimizado para varios destinos
+@main.route('/itinerario')
+@login_required
+def itinerario():
+    destinos = [d for d in catalogo.destinos if d.latitud is not None]
+    seleccionados = _ids_itinerario(request.args.getlist('destino_id'))
+    inicio_id = request.args.get('inicio_id', type=int)
+    resultado = None
+
+    if seleccionados:
+        max_paradas = current_app.config.get('ITINERARIO_MAX_PARADAS', 250)
+        if len(seleccionados) < 2:
+            flash('Seleccioná al menos dos destinos para armar el itinerario.', 'warning')
+        elif len(seleccionados) > max_paradas:
+            flash(f'El itinerario admite hasta {max_paradas} destinos.', 'danger')
+        else:
+            resultado = armar_itinerario(seleccionados, inicio_id)
+
+    return render_template('itinerario.html',
+                           title='Itinerario',
+                           destinos=destinos,
+                           seleccionados=seleccionados,
+                           inicio_id=inicio_id,
+                           resultado=resultado)
+
+@main.route('/api/itinerario')
+@login_required
+def api_itinerario():
+    ids = _ids_itinerario(request.args.getlist('ids'))
+    max_paradas = current_app.config.get('ITINERARIO_MAX_PARADAS', 250)
+    if not 2 <= len(ids) <= max_paradas:
+        return jsonify({'error': f'Se necesitan entre 2 y {max_paradas} destinos (parámetro ids).'}), 400
+    return jsonify(armar_itinerario(ids, request.args.get('inicio_id', type=int)))
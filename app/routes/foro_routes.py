@@ -1,16 +1,42 @@
-from flask import render_template, redirect, url_for, flash, request, current_app
+from flask import render_template, redirect, url_for, flash, request, current_app, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime
+from markupsafe import Markup
 from app.utils import db, posteo_permisos_required
+from app.extensions import cache_foro
 from app.models import Posteo
+from app.services.hilos import cargar_hilos, cargar_ancestros, contar_descendientes, ids_subarbol, invalidar_hilo
+from app.services.hilos import registrar_respuesta, registrar_baja, padre_de_respuesta
+from app.services.busqueda import indexar_posteo, desindexar_posteos, buscar_posteos
+from app.services.paginacion import decodificar_cursor, filtro_keyset, paginar_keyset
 from . import main
 
+# Criterios de orden de los hilos en el foro
+ORDENES_FORO = {
+    'recientes': Posteo.fecha_creacion,
+    'actividad': Posteo.ultima_actividad
+}
+
+def _fragmentos_hilos(raices, profundidad):
+    """
+    HTML de cada hilo, tomado de la caché cuando su versión no cambió.
+    Solo se cargan y renderizan los hilos que faltan, todos juntos en una consulta.
+    """
+    claves = {r.posteo_id: f'hilo:{r.posteo_id}:v{r.version}:p{profundidad}' for r in raices}
+    fragmentos = cache_foro.obtener_varios(claves.values())
+
+    faltantes = [r.posteo_id for r in raices if claves[r.posteo_id] not in fragmentos]
+    for nodo in cargar_hilos(faltantes, profundidad_max=profundidad):
+        clave = claves[nodo.posteo.posteo_id]
+        fragmentos[clave] = render_template('foro_posteos.html', nodos=[nodo])
+        cache_foro.guardar(clave, fragmentos[clave])
+
+    return [Markup(fragmentos[claves[r.posteo_id]]) for r in raices if claves[r.posteo_id] in fragmentos]
+
 # Ruta para ver el foro y el formulario de posteo
 @main.route('/foro', methods=['GET', 'POST'])
 @login_required 
 def foro():
-    posteos = Posteo.query.order_by(Posteo.fecha_creacion.desc()).all()
-    
     if request.method == 'POST':
         # Verificar el rol (solo Turistas pueden postear)
         turista_rol_id = current_app.config.get('ROL_TURISTA_ID', 5)
@@ -23,10 +49,13 @@ def foro():
         contenido = request.form.get('contenido')
         posteo_padre_id_str = request.form.get('parent_id')
         posteo_padre_id = int(posteo_padre_id_str) if posteo_padre_id_str and posteo_padre_id_str.isdigit() else None
+        padre = padre_de_respuesta(posteo_padre_id) if posteo_padre_id else None
 
         
         if not contenido or len(contenido.strip()) < 5:
             flash('El comentario debe ser de al menos 5 carácteres.', 'danger')
+        elif posteo_padre_id and padre is None:
+            flash('El comentario al que querés responder ya no existe.', 'danger')
         else:
             try:
                 # Crea el nuevo posteo
@@ -34,9 +63,15 @@ def foro():
                     titulo=titulo,
                     contenido=contenido,
                     usuario_id=current_user.usuario_id,
-                    posteo_padre_id=posteo_padre_id
+                    # En el nivel más profundo la respuesta se cuelga del padre del posteo
+                    posteo_padre_id=padre.posteo_id if padre else None
                 )
                 db.session.add(nuevo_posteo)
+                db.session.flush()
+                indexar_posteo(nuevo_posteo)
+                if nuevo_posteo.posteo_padre_id:
+                    # Contadores de los ancestros y versión del hilo
+                    registrar_respuesta(nuevo_posteo)
                 db.session.commit()
                 
                 flash('Comentario publicado con éxito', 'success')
@@ -47,8 +82,75 @@ def foro():
                 db.session.rollback()
                 flash(f'Error al publicar el comentario: {e}', 'danger')
 
-    posteos = Posteo.query.filter_by(posteo_padre_id=None).order_by(Posteo.fecha_creacion.desc()).all()
-    return render_template('foro.html', title='Foro de Viajeros', posteos=posteos)
+    # Paginación por cursor (keyset) sobre los posteos raíz: (fecha, posteo_id),
+    # donde la fecha es la de creación o la de última actividad del hilo.
+    orden = request.args.get('orden')
+    if orden not in ORDENES_FORO:
+        orden = 'recientes'
+    tamano = current_app.config.get('FORO_POSTEOS_POR_PAGINA', 20)
+    claves = (ORDENES_FORO[orden], Posteo.posteo_id)
+    cursor = decodificar_cursor(request.args.get('cursor'), len(claves))
+
+    consulta = db.select(*claves, Posteo.version).filter_by(posteo_padre_id=None)
+    if cursor:
+        consulta = consulta.where(filtro_keyset(claves, cursor))
+    filas = db.session.execute(
+        consulta.order_by(*(c.desc() for c in claves)).limit(tamano + 1)
+    ).all()
+    filas, cursor_siguiente = paginar_keyset(filas, tamano, clave=lambda f: (f[0], f[1]))
+
+    # Cada hilo se renderiza una vez por versión; los que cambiaron se cargan juntos
+    hilos = _fragmentos_hilos(filas, current_app.config.get('FORO_PROFUNDIDAD_INICIAL', 3))
+    return render_template('foro.html',
+                           title='Foro de Viajeros',
+                           hilos=hilos,
+                           cursor_siguiente=cursor_siguiente,
+                           orden=orden,
+                           es_primera_pagina=cursor is None)
+
+# Devuelve (JSON) el subárbol de respuestas de un posteo, para expandirlo a demanda
+@main.route('/foro/posteo/<int:posteo_id>/respuestas')
+@login_required
+def respuestas_posteo(posteo_id):
+    hilos = cargar_hilos(
+        [posteo_id],
+        profundidad_max=current_app.config.get('FORO_PROFUNDIDAD_INICIAL', 3)
+    )
+    if not hilos:
+        return jsonify({'error': 'Posteo no encontrado.'}), 404
+
+    respuestas = hilos[0].respuestas
+    return jsonify({
+        'posteo_id': posteo_id,
+        'respuestas': [n.a_dict() for n in respuestas],
+        # El mismo macro del foro, para insertar el HTML directamente en la página
+        'html': render_template('foro_posteos.html', nodos=respuestas)
+    })
+
+# Búsqueda de texto completo en títulos y contenidos del foro
+@main.route('/foro/buscar')
+@login_required
+def buscar_foro():
+    consulta = request.args.get('q', '').strip()
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    por_pagina = current_app.config.get('FORO_RESULTADOS_POR_PAGINA', 10)
+
+    resultados, total = [], 0
+    if consulta:
+        try:
+            resultados, total = buscar_posteos(consulta, pagina, por_pagina)
+        except Exception as e:
+            db.session.rollback()
+            flash('No se pudo realizar la búsqueda.', 'danger')
+            print(f"Search Error: {e}")
+
+    return render_template('foro_buscar.html',
+                           title='Buscar en el Foro',
+                           consulta=consulta,
+                           resultados=resultados,
+                           total=total,
+                           pagina=pagina,
+                           hay_siguiente=pagina * por_pagina < total)
 
 # Ruta para eliminar posteo
 @main.route('/posteo/eliminar/<int:posteo_id>', methods=['POST'])
@@ -57,7 +159,12 @@ def foro():
 def eliminar_posteo(posteo_id, posteo):
     
     try:
+        # IDs del posteo y sus respuestas (se borran en cascada)
+        eliminados = ids_subarbol(posteo)
+        if posteo.posteo_padre_id:
+            registrar_baja(posteo)
         db.session.delete(posteo)
+        desindexar_posteos(eliminados)
         db.session.commit()
         flash('El comentario ha sido eliminado.', 'success')
     except Exception as e:
@@ -79,13 +186,20 @@ def editar_posteo(posteo_id, posteo):
         if not nuevo_contenido or len(nuevo_contenido.strip()) < 5:
             flash('El comentario debe ser de al menos 5 carácteres.', 'danger')
             # renderiza de nuevo para que no pierda los datos por algún error
-            return render_template('editar_posteo.html', posteo=posteo, title='Editar Comentario')
+            return render_template('editar_posteo.html',
+                                   posteo=posteo,
+                                   title='Editar Comentario',
+                                   ancestros=cargar_ancestros(posteo),
+                                   cantidad_respuestas=contar_descendientes(posteo))
             
         try:
             # Actualiza el posteo con los nuevos datos
             posteo.contenido = nuevo_contenido
             posteo.titulo = nuevo_titulo
             posteo.fecha_edicion = datetime.utcnow()
+            db.session.flush()
+            indexar_posteo(posteo)
+            invalidar_hilo(posteo.raiz_id)
             
             db.session.commit()
             flash('Comentario actualizado con éxito.', 'success')
@@ -97,4 +211,6 @@ def editar_posteo(posteo_id, posteo):
             
     return render_template('editar_posteo.html', 
                             title='Editar Comentario', 
-                            posteo=posteo)
+                            posteo=posteo,
+                            ancestros=cargar_ancestros(posteo),
+                            cantidad_respuestas=contar_descendientes(posteo))
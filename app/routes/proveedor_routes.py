@@ -1,12 +1,29 @@
-from flask import render_template, redirect, url_for, flash, request
+from datetime import date, datetime, timedelta
+import numpy as np
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, abort
 from app.utils import proveedor_required
-from app.extensions import db 
-from app.models import Destino, Servicio, Usuario, Reserva
+from app.extensions import db, catalogo
+from app.models import Servicio, ReglaPrecio
+from app.models.regla_precio import TIPOS_REGLA
+from app.models.servicio import UNIDADES_DISPONIBLES, ESTADOS_SERVICIO
+from app.services.precios import tarifa_servicio
+from app.services.reservas import ACCIONES, transicionar
+from app.services.panel_proveedor import resumen_servicios, totales_proveedor, invalidar_totales
+from app.services.panel_proveedor import reservas_pendientes as reservas_pendientes_proveedor
+from app.services.paginacion import decodificar_cursor
+from app.services.importacion import FORMATOS, importar_archivo_subido, importar_servicios
 from flask_login import login_required, current_user
-from sqlalchemy.orm import joinedload
 from . import main
 
-UNIDADES_DISPONIBLES = ['Día', 'Persona', 'Unidad']
+
+def _leer_capacidad(valor):
+    """Capacidad diaria del formulario: None si viene vacía (sin límite); ValueError si no es un entero positivo."""
+    if not valor or not valor.strip():
+        return None
+    capacidad = int(valor)
+    if capacidad < 1:
+        raise ValueError
+    return capacidad
 
 @main.route('/proveedor')
 @proveedor_required
@@ -14,31 +31,37 @@ UNIDADES_DISPONIBLES = ['Día', 'Persona', 'Unidad']
 def proveedor_panel():
     servicios_propios = []
     reservas_pendientes = []
+    totales = None
+    cursor_servicios = cursor_reservas = None
 
-    try:        
-        servicios_propios = Servicio.query.filter_by(proveedor_id=current_user.usuario_id).all()
-
-        # Obtener los IDs de los servicios propios
-        servicio_ids = [s.servicio_id for s in servicios_propios]
-        
-        # 2. Cargar las reservas pendientes para esos servicios
-        if servicio_ids:
-            reservas_pendientes = Reserva.query.filter(
-                Reserva.servicio_id.in_(servicio_ids),
-                Reserva.estado == 'Pendiente'
-            ).options(
-                joinedload(Reserva.servicio_reservado).joinedload(Servicio.destino), # Pre-cargar Servicio y Destino
-                joinedload(Reserva.turista) # Pre-cargar el usuario que hizo la reserva
-            ).all()
-
+    # Cada sección se pagina con su propio cursor; el de la otra se conserva en los enlaces
+    arg_servicios = request.args.get('servicios')
+    arg_reservas = request.args.get('reservas')
+    try:
+        totales = totales_proveedor(current_user.usuario_id)
+        servicios_propios, cursor_servicios = resumen_servicios(
+            current_user.usuario_id,
+            decodificar_cursor(arg_servicios, 2),
+            current_app.config.get('PANEL_SERVICIOS_POR_PAGINA', 12)
+        )
+        reservas_pendientes, cursor_reservas = reservas_pendientes_proveedor(
+            current_user.usuario_id,
+            decodificar_cursor(arg_reservas, 2),
+            current_app.config.get('PANEL_RESERVAS_POR_PAGINA', 20)
+        )
     except Exception as e:
         flash('Error al cargar la lista de tus servicios.', 'danger')
         print(f"Database Error fetching Provider Services: {e}")
 
     return render_template('panel_proveedor.html', 
                            title='Panel de Proveedor',
+                           totales=totales,
                            servicios_propios=servicios_propios,
-                           reservas_pendientes=reservas_pendientes
+                           reservas_pendientes=reservas_pendientes,
+                           cursor_servicios=cursor_servicios,
+                           cursor_reservas=cursor_reservas,
+                           arg_servicios=arg_servicios,
+                           arg_reservas=arg_reservas
                     )
 
 @main.route('/proveedor/crear_servicio', methods=['GET', 'POST'])
@@ -47,7 +70,7 @@ def proveedor_panel():
 def crear_servicio():
     destinos = []
     try:
-        destinos = Destino.query.order_by(Destino.nombre).all()
+        destinos = catalogo.destinos
     except Exception as e:
         flash('Error al cargar la lista de Destinos.', 'danger')
         print(f"Database Error fetching Destinations: {e}")
@@ -67,13 +90,14 @@ def crear_servicio():
         try:
             precio_base = float(precio_base_str)
             destino_id = int(destino_id_str)
+            capacidad = _leer_capacidad(request.form.get('capacidad'))
             
             if precio_base <= 0:
                 flash('El precio base debe ser mayor a cero.', 'danger')
                 return redirect(url_for('main.crear_servicio'))
                 
             # Verificar si el destino ID es válido
-            if not any(d.destino_id == destino_id for d in destinos):
+            if catalogo.destino(destino_id) is None:
                 flash('Destino seleccionado inválido.', 'danger')
                 return redirect(url_for('main.crear_servicio'))
 
@@ -83,18 +107,21 @@ def crear_servicio():
                 precio_base=precio_base,
                 unidad=unidad,
                 status='Disponible',
+                capacidad=capacidad,
                 destino_id=destino_id,
                 proveedor_id=current_user.usuario_id 
             )
             
             db.session.add(nuevo_servicio)
+            catalogo.invalidar()
             db.session.commit()
+            invalidar_totales(current_user.usuario_id)
             
             flash(f'¡Servicio "{nuevo_servicio.nombre}" registrado exitosamente!', 'success')
             return redirect(url_for('main.crear_servicio'))
 
         except ValueError:
-            flash('Error: El precio base debe ser un número válido.', 'danger')
+            flash('Error: El precio base debe ser un número válido y la capacidad, si se indica, un entero mayor a cero.', 'danger')
         except Exception as e:
             db.session.rollback()
             flash(f'Error al guardar el servicio en la base de datos: {e}', 'danger')
@@ -114,6 +141,27 @@ def crear_servicio():
                            unidades=UNIDADES_DISPONIBLES
                            )
 
+# Alta masiva de servicios desde un archivo CSV o NDJSON (ver services/importacion)
+@main.route('/proveedor/importar_servicios', methods=['GET', 'POST'])
+@proveedor_required
+@login_required
+def importar_servicios_archivo():
+    resumen = None
+    if request.method == 'POST':
+        resumen = importar_archivo_subido(
+            lambda texto, formato: importar_servicios(texto, formato, current_user.usuario_id),
+            'servicios', 'importados'
+        )
+        if resumen is not None:
+            invalidar_totales(current_user.usuario_id)
+
+    return render_template('proveedor_importar_servicios.html',
+                           title='Importar Servicios',
+                           resumen=resumen,
+                           formatos=FORMATOS,
+                           unidades=UNIDADES_DISPONIBLES,
+                           estados=ESTADOS_SERVICIO)
+
 @main.route('/proveedor/editar_servicio/<int:servicio_id>', methods=['GET', 'POST'])
 @proveedor_required
 @login_required
@@ -124,7 +172,7 @@ def editar_servicio(servicio_id):
         flash('No tienes permiso para editar este servicio.', 'danger')
         return redirect(url_for('main.proveedor_panel'))
 
-    destinos = Destino.query.order_by(Destino.nombre).all()
+    destinos = catalogo.destinos
 
     if request.method == 'POST':
         nombre = request.form.get('nombre')
@@ -141,6 +189,7 @@ def editar_servicio(servicio_id):
         try:
             precio_base = float(precio_base_str)
             destino_id = int(destino_id_str)
+            capacidad = _leer_capacidad(request.form.get('capacidad'))
             
             if precio_base <= 0:
                 flash('El precio base debe ser mayor a cero.', 'danger')
@@ -153,14 +202,17 @@ def editar_servicio(servicio_id):
             servicio.unidad = unidad
             servicio.destino_id = destino_id
             servicio.status = status
+            # Bajar la capacidad no cancela reservas ya aceptadas: solo limita las nuevas
+            servicio.capacidad = capacidad
             
+            catalogo.invalidar()
             db.session.commit()
             
             flash(f'¡Servicio "{servicio.nombre}" actualizado exitosamente!', 'success')
             return redirect(url_for('main.proveedor_panel'))
 
         except ValueError:
-            flash('Error: El precio base debe ser un número válido.', 'danger')
+            flash('Error: El precio base debe ser un número válido y la capacidad, si se indica, un entero mayor a cero.', 'danger')
             db.session.rollback()
         except Exception as e:
             db.session.rollback()
@@ -171,7 +223,8 @@ def editar_servicio(servicio_id):
                            title=f'Editar {servicio.nombre}',
                            servicio=servicio,
                            destinos=destinos,
-                           unidades=UNIDADES_DISPONIBLES
+                           unidades=UNIDADES_DISPONIBLES,
+                           estados=ESTADOS_SERVICIO
                            )
 
 
@@ -184,7 +237,9 @@ def eliminar_servicio(servicio_id):
     try:
         # Eliminar el servicio de la base de datos
         db.session.delete(servicio)
+        catalogo.invalidar()
         db.session.commit()
+        invalidar_totales(current_user.usuario_id)
         flash(f'Servicio "{servicio.nombre}" eliminado correctamente.', 'success')
         
     except Exception as e:
@@ -193,50 +248,198 @@ def eliminar_servicio(servicio_id):
 
     return redirect(url_for('main.proveedor_panel'))
 
-@main.route('/proveedor/aceptar_reserva/<int:reserva_id>', methods=['POST'])
+def _leer_regla(form):
+    """Arma una ReglaPrecio desde el formulario. Devuelve (regla, None) o (None, mensaje de error)."""
+    tipo = form.get('tipo')
+    if tipo not in TIPOS_REGLA:
+        return None, 'Tipo de regla inválido.'
+    try:
+        multiplicador = float(form.get('multiplicador', ''))
+    except ValueError:
+        return None, 'El multiplicador debe ser un número (ej: 1.2 para +20 %, 0.9 para -10 %).'
+    if not 0 < multiplicador <= 10:
+        return None, 'El multiplicador debe ser mayor a 0 y como máximo 10.'
+
+    regla = ReglaPrecio(tipo=tipo, multiplicador=multiplicador,
+                        descripcion=(form.get('descripcion') or '')[:100] or None)
+    if tipo == 'temporada':
+        try:
+            regla.fecha_desde = datetime.strptime(form.get('fecha_desde', ''), '%Y-%m-%d').date()
+            regla.fecha_hasta = datetime.strptime(form.get('fecha_hasta', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return None, 'La temporada necesita fecha de inicio y de fin válidas.'
+        if regla.fecha_desde > regla.fecha_hasta:
+            return None, 'La fecha de fin de la temporada no puede ser anterior a la de inicio.'
+    elif tipo == 'grupo':
+        try:
+            regla.personas_min = int(form.get('personas_min', ''))
+        except ValueError:
+            return None, 'Indica desde cuántas personas aplica la regla de grupo.'
+        if regla.personas_min < 2:
+            return None, 'La regla de grupo debe aplicar desde 2 personas o más.'
+    return regla, None
+
+@main.route('/proveedor/servicio/<int:servicio_id>/reglas', methods=['GET', 'POST'])
 @proveedor_required
 @login_required
-def aceptar_reserva(reserva_id):
-    """Permite al proveedor aceptar una reserva pendiente."""
-    # Cargamos la reserva y el servicio asociado
-    reserva = Reserva.query.options(joinedload(Reserva.servicio_reservado)).get_or_404(reserva_id)
+def reglas_precio(servicio_id):
+    servicio = Servicio.query.get_or_404(servicio_id)
+
+    if servicio.proveedor_id != current_user.usuario_id:
+        flash('No tienes permiso para editar este servicio.', 'danger')
+        return redirect(url_for('main.proveedor_panel'))
+
+    if request.method == 'POST':
+        regla, error = _leer_regla(request.form)
+        if error:
+            flash(error, 'danger')
+        else:
+            try:
+                regla.servicio_id = servicio.servicio_id
+                db.session.add(regla)
+                # Nueva versión del catálogo: la tarifa del servicio se recompila con la regla
+                catalogo.invalidar()
+                db.session.commit()
+                flash('Regla de precio agregada.', 'success')
+                return redirect(url_for('main.reglas_precio', servicio_id=servicio.servicio_id))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error al guardar la regla de precio: {e}', 'danger')
+                print(f"Database Rollback Error: {e}")
+
+    # Vista previa de la tarifa compilada: multiplicador de los próximos 14 días
+    vista_previa = []
+    tarifa = tarifa_servicio(servicio.servicio_id)
+    if tarifa is not None:
+        hoy = date.today()
+        dias = np.datetime64(hoy, 'D') + np.arange(14)
+        multiplicadores = tarifa.suma_multiplicadores(dias, dias)
+        vista_previa = [(hoy + timedelta(days=k), float(m)) for k, m in enumerate(multiplicadores)]
 
-    # Solo se puede modificar si está pendiente
-    if reserva.estado != 'Pendiente':
-        flash(f'La reserva ya tiene el estado "{reserva.estado}" y no puede ser aceptada.', 'warning')
+    return render_template('proveedor_reglas_precio.html',
+                           title=f'Reglas de Precio: {servicio.nombre}',
+                           servicio=servicio,
+                           reglas=servicio.reglas_precio,
+                           tipos=TIPOS_REGLA,
+                           vista_previa=vista_previa)
+
+@main.route('/proveedor/regla/<int:regla_id>/eliminar', methods=['POST'])
+@proveedor_required
+@login_required
+def eliminar_regla_precio(regla_id):
+    regla = ReglaPrecio.query.get_or_404(regla_id)
+    servicio_id = regla.servicio_id
+
+    if regla.servicio.proveedor_id != current_user.usuario_id:
+        flash('No tienes permiso para editar este servicio.', 'danger')
         return redirect(url_for('main.proveedor_panel'))
 
     try:
-        reserva.estado = 'Aceptada'
+        db.session.delete(regla)
+        catalogo.invalidar()
+        db.session.commit()
+        flash('Regla de precio eliminada.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al eliminar la regla de precio: {e}', 'danger')
+
+    return redirect(url_for('main.reglas_precio', servicio_id=servicio_id))
+
+def _cambiar_reserva(reserva_id, accion, mensaje_exito, categoria_exito):
+    """Una transición desde el panel: la versión viene del formulario que mostró la reserva."""
+    version = request.form.get('version', type=int)
+    if version is None:
+        abort(400, description='Falta la versión de la reserva. Recarga el panel e inténtalo de nuevo.')
+    try:
+        hechas, fallidas = transicionar(accion, [(reserva_id, version)], current_user.usuario_id)
         db.session.commit()
-        flash('Reserva aceptada exitosamente.', 'success')
+        invalidar_totales(current_user.usuario_id)
+        if hechas:
+            flash(mensaje_exito, categoria_exito)
+        else:
+            flash(fallidas[reserva_id], 'warning')
     except Exception as e:
         db.session.rollback()
-        flash(f'Error al aceptar la reserva: {e}', 'danger')
-        print(f"Error al actualizar la reserva a Aceptada: {e}")
+        flash(f'Error al {accion} la reserva: {e}', 'danger')
+        print(f"Error al {accion} la reserva {reserva_id}: {e}")
 
     return redirect(url_for('main.proveedor_panel'))
 
+@main.route('/proveedor/aceptar_reserva/<int:reserva_id>', methods=['POST'])
+@proveedor_required
+@login_required
+def aceptar_reserva(reserva_id):
+    """Permite al proveedor aceptar una reserva pendiente de sus servicios (ocupa su lugar)."""
+    return _cambiar_reserva(reserva_id, 'aceptar', 'Reserva aceptada exitosamente.', 'success')
+
 
 @main.route('/proveedor/rechazar_reserva/<int:reserva_id>', methods=['POST'])
 @proveedor_required
 @login_required
 def rechazar_reserva(reserva_id):
-    # Cargamos la reserva y el servicio asociado
-    reserva = Reserva.query.options(joinedload(Reserva.servicio_reservado)).get_or_404(reserva_id)
-    
-    # 2. Validación de Estado
-    if reserva.estado != 'Pendiente':
-        flash(f'La reserva ya tiene el estado "{reserva.estado}" y no puede ser rechazada.', 'warning')
+    return _cambiar_reserva(reserva_id, 'rechazar', 'Reserva rechazada.', 'info')
+
+
+def _leer_reservas_lote(valores):
+    """[(reserva_id, version)] desde los checkboxes 'id:version'; ValueError si alguno es inválido o no trae versión."""
+    reservas = []
+    for valor in valores:
+        reserva_id, _, version = str(valor).partition(':')
+        reservas.append((int(reserva_id), int(version)))
+    return reservas
+
+# Aceptar o rechazar varias reservas en una transacción. Desde el panel llegan los
+# checkboxes 'reservas' (id:version); como JSON, {"accion": ..., "reservas": [{"id", "version"}]}
+@main.route('/proveedor/reservas/lote', methods=['POST'])
+@proveedor_required
+@login_required
+def reservas_lote():
+    datos = request.get_json(silent=True) if request.is_json else None
+    try:
+        if datos is not None:
+            accion = datos.get('accion') if isinstance(datos, dict) else None
+            pedidas = datos.get('reservas') if isinstance(datos, dict) else None
+            if not isinstance(pedidas, list):
+                raise ValueError
+            reservas = [(int(r['id']), int(r['version'])) for r in pedidas]
+        else:
+            accion = request.form.get('accion')
+            reservas = _leer_reservas_lote(request.form.getlist('reservas'))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        mensaje = 'Formato inválido: se esperan reservas con id y versión numéricos.'
+        if datos is not None:
+            return jsonify({'error': mensaje}), 400
+        # El panel siempre manda la versión: sin ella no se sabe qué estado vio el usuario
+        abort(400, description=mensaje)
+
+    if accion not in ACCIONES or not reservas:
+        mensaje = 'Selecciona al menos una reserva y una acción válida (aceptar o rechazar).'
+        if datos is not None:
+            return jsonify({'error': mensaje}), 400
+        flash(mensaje, 'warning')
         return redirect(url_for('main.proveedor_panel'))
 
     try:
-        reserva.estado = 'Rechazada'
+        hechas, fallidas = transicionar(accion, reservas, current_user.usuario_id)
         db.session.commit()
-        flash('Reserva rechazada.', 'info')
+        invalidar_totales(current_user.usuario_id)
     except Exception as e:
         db.session.rollback()
-        flash(f'Error al rechazar la reserva: {e}', 'danger')
-        print(f"Error al actualizar la reserva a Rechazada: {e}")
+        print(f"Error al procesar el lote de reservas: {e}")
+        if datos is not None:
+            return jsonify({'error': 'Error al actualizar las reservas.'}), 500
+        flash(f'Error al actualizar las reservas: {e}', 'danger')
+        return redirect(url_for('main.proveedor_panel'))
+
+    if datos is not None:
+        return jsonify({
+            'accion': accion,
+            'actualizadas': hechas,
+            'fallidas': [{'id': reserva_id, 'error': motivo} for reserva_id, motivo in sorted(fallidas.items())]
+        })
 
-    return redirect(url_for('main.proveedor_panel'))
\ No newline at end of file
+    if hechas:
+        flash(f'{len(hechas)} reserva(s) {ACCIONES[accion][1].lower()}(s).', 'success')
+    for reserva_id, motivo in sorted(fallidas.items()):
+        flash(f'Reserva #{reserva_id}: {motivo}', 'warning')
+    return redirect(url_for('main.proveedor_panel'))
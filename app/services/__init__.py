@@ -0,0 +1 @@
+# Lógica de dominio compartida por las rutas (consultas, cachés, cálculos).
@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, exists, literal, or_, union_all
+from app.extensions import db
+from app.models import Cotizacion, CotizacionArchivo, Reserva, ReservaArchivo, OcupacionDiaria
+
+# Vencimiento de cotizaciones y archivo de filas viejas.
+# Una cotización vence COTIZACION_VIGENCIA_DIAS después de pedirla (volver a pedirla
+# la renueva) o cuando su fecha de inicio ya pasó. El job 'flask archivar_historial'
+# mueve en lotes de ARCHIVO_LOTE filas a las tablas *_archivo:
+#   - reservas Aceptadas/Rechazadas cuyo servicio terminó hace más de RESERVA_ARCHIVO_DIAS;
+#   - cotizaciones vencidas sin reserva (incluidas las que acaban de quedar sin ella);
+# y borra la ocupación diaria de esos días ya pasados.
+# Cada lote es una transacción corta: copiar, borrar y commit.
+
+ESTADOS_TERMINADOS = ('Aceptada', 'Rechazada')
+
+def limite_vigencia():
+    """Las cotizaciones pedidas antes de este momento están vencidas."""
+    return datetime.utcnow() - timedelta(days=current_app.config.get('COTIZACION_VIGENCIA_DIAS', 30))
+
+def cotizacion_vencida():
+    """Condición SQL de cotización vencida."""
+    return or_(Cotizacion.fecha_solicitud < limite_vigencia(), Cotizacion.fecha_inicio < date.today())
+
+def esta_vencida(cotizacion):
+    return ((cotizacion.fecha_solicitud is not None and cotizacion.fecha_solicitud < limite_vigencia())
+            or cotizacion.fecha_inicio < date.today())
+
+def _limite_reservas():
+    return date.today() - timedelta(days=current_app.config.get('RESERVA_ARCHIVO_DIAS', 180))
+
+def _mover_lote(modelo, archivo, condicion, lote):
+    """Copia al archivo y borra hasta 'lote' filas que cumplen la condición. Devuelve cuántas movió."""
+    clave = modelo.__mapper__.primary_key[0]
+    # SKIP LOCKED: en PostgreSQL no espera filas que otra transacción está usando
+    ids = db.session.scalars(
+        db.select(clave).where(condicion).order_by(clave).limit(lote).with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        return 0
+    columnas = [columna.name for columna in modelo.__table__.columns]
+    db.session.execute(
+        db.insert(archivo).from_select(
+            columnas, db.select(*(modelo.__table__.c[nombre] for nombre in columnas)).where(clave.in_(ids))
+        )
+    )
+    db.session.execute(db.delete(modelo).where(clave.in_(ids)).execution_options(synchronize_session=False))
+    db.session.commit()
+    return len(ids)
+
+def archivar_historial(lote=None, al_avanzar=None):
+    """
+    Mueve al archivo todo lo archivable, de a 'lote' filas por transacción.
+    'al_avanzar(nombre, total)' se llama después de cada lote. Devuelve los totales por tabla.
+    """
+    lote = lote or current_app.config.get('ARCHIVO_LOTE', 500)
+    limite_reservas = _limite_reservas()
+    # Primero las reservas: sus cotizaciones quedan libres para archivarse en la misma pasada
+    tareas = (
+        ('reservas', Reserva, ReservaArchivo,
+         and_(Reserva.estado.in_(ESTADOS_TERMINADOS), Reserva.fecha_servicio_fin < limite_reservas)),
+        ('cotizaciones', Cotizacion, CotizacionArchivo,
+         and_(cotizacion_vencida(), ~exists().where(Reserva.cotizacion_id == Cotizacion.cotizacion_id))),
+    )
+    totales = {}
+    for nombre, modelo, archivo, condicion in tareas:
+        totales[nombre] = 0
+        while True:
+            movidas = _mover_lote(modelo, archivo, condicion, lote)
+            if not movidas:
+                break
+            totales[nombre] += movidas
+            if al_avanzar:
+                al_avanzar(nombre, totales[nombre])
+
+    totales['ocupacion'] = db.session.execute(
+        db.delete(OcupacionDiaria).where(OcupacionDiaria.fecha < limite_reservas)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return totales
+
+def reservas_con_archivo(incluir_archivadas=True):
+    """
+    Subconsulta con las reservas vigentes y, si se pide, las archivadas (UNION ALL),
+    con la marca 'archivada'. La usa el panel de administración (services/panel_admin).
+    """
+    columnas = ('reserva_id', 'usuario_id', 'servicio_id', 'fecha_reserva', 'fecha_servicio_inicio',
+                'fecha_servicio_fin', 'costo_total', 'estado')
+    partes = [db.select(*(getattr(Reserva, c) for c in columnas), literal(False).label('archivada'))]
+    if incluir_archivadas:
+        partes.append(db.select(*(getattr(ReservaArchivo, c) for c in columnas), literal(True).label('archivada')))
+    return union_all(*partes).subquery('historial_reservas')
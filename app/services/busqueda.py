@@ -0,0 +1,157 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import joinedload
+from app.extensions import db
+from app.models import Posteo
+
+# Búsqueda de texto completo sobre los posteos del foro.
+# - PostgreSQL: columna tsvector 'posteo.busqueda' (configuración 'spanish') con índice GIN.
+# - SQLite (TestingConfig): tabla virtual FTS5 'posteo_fts' con rowid = posteo_id.
+# Las rutas solo usan indexar_posteo / desindexar_posteos / buscar_posteos.
+
+CONFIGURACION_PG = 'spanish'
+# Marcas de resaltado: caracteres de control que no llegan desde un formulario,
+# se reemplazan por <mark> recién después de escapar el HTML del usuario.
+MARCA_INICIO = '\x02'
+MARCA_FIN = '\x03'
+
+_tablas_fts_creadas = set()
+
+def _es_postgres():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+def _asegurar_tabla_fts():
+    """
+    Crea la tabla FTS5 si no existe (SQLite; se verifica una vez por motor) y la llena
+    con los posteos que ya estaban, para que la búsqueda no los ignore.
+    """
+    motor = db.session.get_bind()
+    if motor in _tablas_fts_creadas:
+        return
+    existe = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posteo_fts'"
+    )).first()
+    if not existe:
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE posteo_fts "
+            "USING fts5(titulo, contenido, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        db.session.execute(text(
+            "INSERT INTO posteo_fts (rowid, titulo, contenido) "
+            "SELECT posteo_id, coalesce(titulo, ''), contenido FROM posteo"
+        ))
+    _tablas_fts_creadas.add(motor)
+
+def indexar_posteo(posteo):
+    """Actualiza el índice de búsqueda del posteo. Requiere que ya tenga ID (flush previo)."""
+    if _es_postgres():
+        db.session.execute(text(
+            "UPDATE posteo SET busqueda = "
+            "setweight(to_tsvector(CAST(:cfg AS regconfig), coalesce(titulo, '')), 'A') || "
+            "setweight(to_tsvector(CAST(:cfg AS regconfig), coalesce(contenido, '')), 'B') "
+            "WHERE posteo_id = :id"
+        ), {'cfg': CONFIGURACION_PG, 'id': posteo.posteo_id})
+        return
+
+    _asegurar_tabla_fts()
+    db.session.execute(text("DELETE FROM posteo_fts WHERE rowid = :id"), {'id': posteo.posteo_id})
+    db.session.execute(
+        text("INSERT INTO posteo_fts (rowid, titulo, contenido) VALUES (:id, :titulo, :contenido)"),
+        {'id': posteo.posteo_id, 'titulo': posteo.titulo or '', 'contenido': posteo.contenido}
+    )
+
+def desindexar_posteos(posteo_ids):
+    """Quita posteos eliminados del índice (en PostgreSQL el tsvector se va con la fila)."""
+    if not posteo_ids or _es_postgres():
+        return
+    _asegurar_tabla_fts()
+    db.session.execute(
+        text("DELETE FROM posteo_fts WHERE rowid IN :ids").bindparams(bindparam('ids', expanding=True)),
+        {'ids': list(posteo_ids)}
+    )
+
+def consulta_fts5(texto):
+    """Convierte el texto del usuario en una consulta FTS5 segura: todas las palabras, entre comillas."""
+    palabras = re.findall(r'\w+', texto)
+    return ' '.join(f'"{p}"' for p in palabras)
+
+def resaltar(texto):
+    """Escapa el texto y transforma las marcas de coincidencia en <mark>."""
+    seguro = str(escape(texto or ''))
+    return Markup(seguro.replace(MARCA_INICIO, '<mark>').replace(MARCA_FIN, '</mark>'))
+
+def _buscar_postgres(texto, limite, desplazamiento):
+    opciones = (f'StartSel="{MARCA_INICIO}", StopSel="{MARCA_FIN}", '
+                'MaxFragments=2, MaxWords=30, MinWords=10')
+    parametros = {'cfg': CONFIGURACION_PG, 'q': texto}
+    filas = db.session.execute(text(
+        "SELECT p.posteo_id, "
+        "ts_rank_cd(p.busqueda, q) AS rango, "
+        "ts_headline(CAST(:cfg AS regconfig), coalesce(p.titulo, ''), q, :opciones_titulo) AS titulo, "
+        "ts_headline(CAST(:cfg AS regconfig), p.contenido, q, :opciones) AS fragmento "
+        "FROM posteo p, websearch_to_tsquery(CAST(:cfg AS regconfig), :q) q "
+        "WHERE p.busqueda @@ q "
+        "ORDER BY rango DESC, p.posteo_id DESC "
+        "LIMIT :limite OFFSET :desplazamiento"
+    ), {**parametros,
+        'opciones': opciones,
+        'opciones_titulo': opciones + ', HighlightAll=true',
+        'limite': limite,
+        'desplazamiento': desplazamiento}).all()
+    total = db.session.scalar(text(
+        "SELECT count(*) FROM posteo "
+        "WHERE busqueda @@ websearch_to_tsquery(CAST(:cfg AS regconfig), :q)"
+    ), parametros)
+    return filas, total
+
+def _buscar_sqlite(texto, limite, desplazamiento):
+    consulta = consulta_fts5(texto)
+    if not consulta:
+        return [], 0
+    _asegurar_tabla_fts()
+    parametros = {'q': consulta, 'ini': MARCA_INICIO, 'fin': MARCA_FIN}
+    # bm25: cuanto más bajo, más relevante. El título pesa más que el contenido.
+    filas = db.session.execute(text(
+        "SELECT rowid AS posteo_id, "
+        "bm25(posteo_fts, 10.0, 1.0) AS rango, "
+        "highlight(posteo_fts, 0, :ini, :fin) AS titulo, "
+        "snippet(posteo_fts, 1, :ini, :fin, '…', 30) AS fragmento "
+        "FROM posteo_fts WHERE posteo_fts MATCH :q "
+        "ORDER BY rango, rowid DESC "
+        "LIMIT :limite OFFSET :desplazamiento"
+    ), {**parametros, 'limite': limite, 'desplazamiento': desplazamiento}).all()
+    total = db.session.scalar(
+        text("SELECT count(*) FROM posteo_fts WHERE posteo_fts MATCH :q"), parametros
+    )
+    return filas, total
+
+def buscar_posteos(texto, pagina=1, por_pagina=10):
+    """
+    Busca posteos por título y contenido, ordenados por relevancia.
+    Devuelve (resultados, total). Cada resultado trae el posteo (con su autor)
+    y el título/fragmento con las coincidencias resaltadas, listos para el template.
+    """
+    texto = (texto or '').strip()
+    if not texto:
+        return [], 0
+
+    desplazamiento = (max(pagina, 1) - 1) * por_pagina
+    buscar = _buscar_postgres if _es_postgres() else _buscar_sqlite
+    filas, total = buscar(texto, por_pagina, desplazamiento)
+
+    ids = [f.posteo_id for f in filas]
+    posteos = {
+        p.posteo_id: p
+        for p in Posteo.query.filter(Posteo.posteo_id.in_(ids)).options(joinedload(Posteo.autor))
+    } if ids else {}
+
+    resultados = [
+        {
+            'posteo': posteos[f.posteo_id],
+            'titulo': resaltar(f.titulo),
+            'fragmento': resaltar(f.fragmento)
+        }
+        for f in filas if f.posteo_id in posteos
+    ]
+    return resultados, total or 0
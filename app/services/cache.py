@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # Dependencia opcional: solo hace falta con el backend 'redis'
+    redis = None
+
+
+class CacheLRU:
+    """
+    Caché en memoria del proceso, acotada en cantidad de entradas (LRU)
+    y opcionalmente con vencimiento por tiempo. Segura entre hilos.
+    Sirve para un único proceso; con varios workers usar CacheRedis.
+    """
+
+    def __init__(self, max_entradas=500, ttl=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, vence = entrada
+            if vence is not None and vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def obtener_varios(self, claves):
+        resultado = {}
+        for clave in claves:
+            valor = self.obtener(clave)
+            if valor is not None:
+                resultado[clave] = valor
+        return resultado
+
+    def guardar(self, clave, valor):
+        vence = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, vence)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def borrar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class CacheRedis:
+    """Caché compartida entre workers (y nodos) sobre Redis. Guarda texto."""
+
+    def __init__(self, url, prefijo, ttl=None):
+        if redis is None:
+            raise RuntimeError("El backend de caché 'redis' requiere el paquete 'redis'.")
+        self._cliente = redis.Redis.from_url(url, decode_responses=True)
+        self.prefijo = prefijo
+        self.ttl = ttl
+
+    def _clave(self, clave):
+        return f'{self.prefijo}:{clave}'
+
+    def obtener(self, clave):
+        return self._cliente.get(self._clave(clave))
+
+    def obtener_varios(self, claves):
+        claves = list(claves)
+        if not claves:
+            return {}
+        valores = self._cliente.mget([self._clave(c) for c in claves])
+        return {c: v for c, v in zip(claves, valores) if v is not None}
+
+    def guardar(self, clave, valor):
+        self._cliente.set(self._clave(clave), valor, ex=self.ttl)
+
+    def borrar(self, clave):
+        self._cliente.delete(self._clave(clave))
+
+    def limpiar(self):
+        for clave in self._cliente.scan_iter(f'{self.prefijo}:*'):
+            self._cliente.delete(clave)
+
+
+class Cache:
+    """
+    Extensión con backend configurable. Lee de la configuración de la app:
+      <PREFIJO>_BACKEND      'lru' (por defecto) o 'redis'
+      <PREFIJO>_MAX_ENTRADAS tamaño máximo del LRU
+      <PREFIJO>_TTL          segundos de vida de cada entrada (None = sin vencimiento)
+      <PREFIJO>_REDIS_URL    URL de Redis para el backend compartido
+    """
+
+    def __init__(self, prefijo):
+        self.prefijo = prefijo
+
+    def init_app(self, app):
+        config = app.config
+        backend = config.get(f'{self.prefijo}_BACKEND', 'lru')
+        ttl = config.get(f'{self.prefijo}_TTL')
+
+        if backend == 'redis':
+            url = config.get(f'{self.prefijo}_REDIS_URL', 'redis://localhost:6379/0')
+            instancia = CacheRedis(url, prefijo=self.prefijo.lower(), ttl=ttl)
+        elif backend == 'lru':
+            instancia = CacheLRU(config.get(f'{self.prefijo}_MAX_ENTRADAS', 500), ttl=ttl)
+        else:
+            raise ValueError(f"Backend de caché desconocido: {backend}")
+
+        app.extensions[self.prefijo.lower()] = instancia
+
+    @property
+    def backend(self):
+        return current_app.extensions[self.prefijo.lower()]
+
+    def obtener(self, clave):
+        return self.backend.obtener(clave)
+
+    def obtener_varios(self, claves):
+        return self.backend.obtener_varios(claves)
+
+    def guardar(self, clave, valor):
+        self.backend.guardar(clave, valor)
+
+    def borrar(self, clave):
+        self.backend.borrar(clave)
+
+    def limpiar(self):
+        self.backend.limpiar()
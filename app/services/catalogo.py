@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import event
+
+# Caché del catálogo (destinos y servicios) en memoria de cada worker.
+# Se guarda una instantánea inmutable junto con la versión global del catálogo
+# (tabla catalogo_version). Las lecturas usan la instantánea sin ir a la base;
+# como mucho cada CATALOGO_VERIFICAR_CADA segundos se consulta la versión (una
+# fila por clave primaria) y solo si cambió se vuelve a cargar.
+
+DestinoCatalogo = namedtuple('DestinoCatalogo', [
+    'destino_id', 'nombre', 'descripcion', 'categoria', 'coordenadas',
+    'latitud', 'longitud', 'servicios'
+])
+ServicioCatalogo = namedtuple('ServicioCatalogo', [
+    'servicio_id', 'nombre', 'descripcion', 'precio_base', 'unidad', 'status',
+    'destino_id', 'proveedor_id', 'reglas'
+], defaults=((),))
+ReglaCatalogo = namedtuple('ReglaCatalogo', [
+    'regla_id', 'servicio_id', 'tipo', 'multiplicador', 'fecha_desde', 'fecha_hasta', 'personas_min'
+])
+
+
+class Instantanea:
+    """Estado del catálogo en una versión dada. No se modifica una vez creada."""
+    __slots__ = ('version', 'destinos', 'destinos_por_id', 'servicios_por_id')
+
+    def __init__(self, version, destinos):
+        self.version = version
+        # Ordenados por nombre, como los muestran los listados
+        self.destinos = tuple(sorted(destinos, key=lambda d: (d.nombre, d.destino_id)))
+        self.destinos_por_id = MappingProxyType({d.destino_id: d for d in self.destinos})
+        self.servicios_por_id = MappingProxyType(
+            {s.servicio_id: s for d in self.destinos for s in d.servicios}
+        )
+
+
+def _despues_del_commit(session):
+    # Al confirmar una escritura del catálogo, este worker deja de confiar en su copia
+    estado = current_app.extensions.get('catalogo')
+    if session.info.pop('catalogo_invalidado', False) and estado is not None:
+        estado.verificado = 0.0
+
+def _despues_del_rollback(session):
+    session.info.pop('catalogo_invalidado', None)
+
+
+class _Estado:
+    def __init__(self):
+        self.instantanea = None
+        self.verificado = 0.0
+        self.lock = threading.Lock()
+
+
+class Catalogo:
+    """
+    Extensión de lectura del catálogo. Las rutas que escriben destinos o servicios
+    llaman a invalidar() antes del commit: la versión sube en la misma transacción.
+    """
+
+    def init_app(self, app):
+        app.extensions['catalogo'] = _Estado()
+        from app.extensions import db
+        if not event.contains(db.session, 'after_commit', _despues_del_commit):
+            event.listen(db.session, 'after_commit', _despues_del_commit)
+            event.listen(db.session, 'after_rollback', _despues_del_rollback)
+
+    @property
+    def _estado(self):
+        return current_app.extensions['catalogo']
+
+    def _version_en_base(self):
+        from app.extensions import db
+        from app.models import CatalogoVersion
+        version = db.session.execute(
+            db.select(CatalogoVersion.version).where(CatalogoVersion.id == 1)
+        ).scalar()
+        return version or 0
+
+    def _cargar(self, version):
+        from app.extensions import db
+        from app.models import Destino, Servicio, ReglaPrecio
+        reglas = {}
+        for fila in db.session.execute(db.select(
+                ReglaPrecio.regla_id, ReglaPrecio.servicio_id, ReglaPrecio.tipo, ReglaPrecio.multiplicador,
+                ReglaPrecio.fecha_desde, ReglaPrecio.fecha_hasta, ReglaPrecio.personas_min
+        ).order_by(ReglaPrecio.regla_id)):
+            reglas.setdefault(fila.servicio_id, []).append(ReglaCatalogo(*fila))
+
+        servicios = {}
+        for fila in db.session.execute(db.select(
+                Servicio.servicio_id, Servicio.nombre, Servicio.descripcion, Servicio.precio_base,
+                Servicio.unidad, Servicio.status, Servicio.destino_id, Servicio.proveedor_id
+        ).order_by(Servicio.nombre, Servicio.servicio_id)):
+            servicios.setdefault(fila.destino_id, []).append(
+                ServicioCatalogo(*fila, reglas=tuple(reglas.get(fila.servicio_id, ())))
+            )
+
+        destinos = [
+            DestinoCatalogo(*fila, servicios=tuple(servicios.get(fila.destino_id, ())))
+            for fila in db.session.execute(db.select(
+                Destino.destino_id, Destino.nombre, Destino.descripcion, Destino.categoria,
+                Destino.coordenadas, Destino.latitud, Destino.longitud
+            ))
+        ]
+        return Instantanea(version, destinos)
+
+    def actual(self):
+        """Instantánea vigente; va a la base solo si venció el intervalo de verificación."""
+        estado = self._estado
+        instantanea = estado.instantanea
+        intervalo = current_app.config.get('CATALOGO_VERIFICAR_CADA', 2)
+        if instantanea is not None and time.monotonic() - estado.verificado < intervalo:
+            return instantanea
+
+        with estado.lock:
+            if estado.instantanea is not None and time.monotonic() - estado.verificado < intervalo:
+                return estado.instantanea
+            # La versión se lee antes que los datos: estos nunca son más viejos que ella
+            version = self._version_en_base()
+            if estado.instantanea is None or estado.instantanea.version != version:
+                estado.instantanea = self._cargar(version)
+            estado.verificado = time.monotonic()
+            return estado.instantanea
+
+    def invalidar(self):
+        """
+        Incrementa la versión global dentro de la transacción en curso y devuelve
+        la nueva. Llamar antes del commit de la escritura del catálogo.
+        """
+        from app.extensions import db
+        from app.models import CatalogoVersion
+        resultado = db.session.execute(
+            db.update(CatalogoVersion)
+            .where(CatalogoVersion.id == 1)
+            .values(version=CatalogoVersion.version + 1, fecha_actualizacion=datetime.utcnow())
+        )
+        if resultado.rowcount == 0:
+            db.session.add(CatalogoVersion(id=1, version=1))
+            db.session.flush()
+        db.session.info['catalogo_invalidado'] = True
+        return self._version_en_base()
+
+    # Accesos directos a la instantánea vigente
+
+    @property
+    def version(self):
+        return self.actual().version
+
+    @property
+    def destinos(self):
+        return self.actual().destinos
+
+    def destino(self, destino_id):
+        return self.actual().destinos_por_id.get(destino_id)
+
+    def servicio(self, servicio_id):
+        return self.actual().servicios_por_id.get(servicio_id)
@@ -0,0 +1,213 @@
+import math
+import threading
+from flask import current_app
+from app.extensions import catalogo
+
+# Agrupamiento de marcadores del mapa por grilla, precalculado para cada nivel de zoom.
+# Cada punto se proyecta a Web Mercator (coordenadas de mundo en [0, 1)) y cae en una
+# celda cuyo lado equivale a 'radio_px' píxeles de pantalla en ese zoom. Agregar o
+# quitar un destino toca una sola celda por nivel, así que no hace falta reconstruir.
+
+TAMANO_TESELA_PX = 256
+LAT_MAX_MERCATOR = 85.05112878
+
+def proyectar(lat, lon):
+    """(lat, lon) -> (x, y) de Web Mercator normalizados a [0, 1]."""
+    lat = max(min(lat, LAT_MAX_MERCATOR), -LAT_MAX_MERCATOR)
+    x = (lon + 180.0) / 360.0
+    seno = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + seno) / (1 - seno)) / (4 * math.pi)
+    return x, y
+
+def desproyectar(x, y):
+    """Inversa de proyectar: (x, y) -> (lat, lon)."""
+    lon = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, lon
+
+
+class _Celda:
+    __slots__ = ('ids', 'suma_x', 'suma_y')
+
+    def __init__(self):
+        self.ids = set()
+        self.suma_x = 0.0
+        self.suma_y = 0.0
+
+
+class IndiceClusters:
+    """
+    Celdas no vacías por zoom (0..zoom_max), con la suma de coordenadas de sus
+    puntos para devolver el centroide. Seguro entre hilos.
+    """
+
+    def __init__(self, zoom_max=16, radio_px=60):
+        self.zoom_max = zoom_max
+        self.radio_px = radio_px
+        self._puntos = {}  # id -> (x, y, propiedades del Feature)
+        self._niveles = [{} for _ in range(zoom_max + 1)]
+        self._lock = threading.Lock()
+        self.version = None  # versión del catálogo que refleja
+
+    def _lado(self, zoom):
+        return self.radio_px / (TAMANO_TESELA_PX * 2 ** zoom)
+
+    def _celda(self, zoom, x, y):
+        lado = self._lado(zoom)
+        return int(x // lado), int(y // lado)
+
+    def _quitar(self, punto_id):
+        x, y, _ = self._puntos.pop(punto_id)
+        for zoom, celdas in enumerate(self._niveles):
+            clave = self._celda(zoom, x, y)
+            celda = celdas[clave]
+            celda.ids.discard(punto_id)
+            if not celda.ids:
+                del celdas[clave]
+            else:
+                celda.suma_x -= x
+                celda.suma_y -= y
+
+    def agregar(self, punto_id, lat, lon, propiedades):
+        """Agrega o reubica un punto."""
+        x, y = proyectar(lat, lon)
+        with self._lock:
+            if punto_id in self._puntos:
+                self._quitar(punto_id)
+            self._puntos[punto_id] = (x, y, propiedades)
+            for zoom, celdas in enumerate(self._niveles):
+                celda = celdas.setdefault(self._celda(zoom, x, y), _Celda())
+                celda.ids.add(punto_id)
+                celda.suma_x += x
+                celda.suma_y += y
+
+    def quitar(self, punto_id):
+        with self._lock:
+            if punto_id in self._puntos:
+                self._quitar(punto_id)
+
+    def __len__(self):
+        return len(self._puntos)
+
+    def _celdas_en_rango(self, celdas, zoom, x0, x1, y0, y1):
+        (cx0, cy0), (cx1, cy1) = self._celda(zoom, x0, y0), self._celda(zoom, x1, y1)
+        # Con pocas celdas ocupadas conviene recorrerlas; si no, recorrer el rango
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(celdas):
+            for (cx, cy), celda in celdas.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    yield (cx, cy), celda
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    celda = celdas.get((cx, cy))
+                    if celda is not None:
+                        yield (cx, cy), celda
+
+    def consultar(self, oeste, sur, este, norte, zoom):
+        """
+        Features GeoJSON del viewport en ese zoom: un Point por destino aislado
+        y un cluster (centroide + cantidad) por cada celda con varios destinos.
+        """
+        zoom = min(zoom, self.zoom_max)
+        x_oeste, y_norte = proyectar(norte, oeste)
+        x_este, y_sur = proyectar(sur, este)
+        # Si el viewport cruza el antimeridiano se consulta en dos tramos
+        tramos = [(x_oeste, x_este)] if x_oeste <= x_este else [(x_oeste, 1.0), (0.0, x_este)]
+
+        features = []
+        with self._lock:
+            celdas = self._niveles[zoom]
+            for x0, x1 in tramos:
+                for (cx, cy), celda in self._celdas_en_rango(celdas, zoom, x0, x1, y_norte, y_sur):
+                    cantidad = len(celda.ids)
+                    if cantidad == 1:
+                        punto_id = next(iter(celda.ids))
+                        x, y, propiedades = self._puntos[punto_id]
+                        lat, lon = desproyectar(x, y)
+                        features.append(_feature(punto_id, lat, lon, propiedades))
+                    else:
+                        lat, lon = desproyectar(celda.suma_x / cantidad, celda.suma_y / cantidad)
+                        features.append(_feature(f'c{zoom}-{cx}-{cy}', lat, lon, {
+                            'cluster': True,
+                            'cantidad': cantidad,
+                            'zoom_expansion': min(zoom + 2, self.zoom_max + 1)
+                        }))
+        return features
+
+
+def _feature(feature_id, lat, lon, propiedades):
+    return {
+        'type': 'Feature',
+        'id': feature_id,
+        'geometry': {'type': 'Point', 'coordinates': [round(lon, 5), round(lat, 5)]},
+        'properties': propiedades
+    }
+
+def _propiedades_destino(nombre, categoria, descripcion):
+    return {'nombre': nombre, 'categoria': categoria, 'descripcion': (descripcion or '')[:120]}
+
+
+# --- Índice de destinos de la aplicación (uno por proceso) ---
+# Se arma desde la instantánea del catálogo y recuerda su versión: si otro worker
+# modifica destinos, la versión cambia y el índice se reconstruye en la próxima lectura.
+
+def _construir_indice(instantanea):
+    indice = IndiceClusters(
+        zoom_max=current_app.config.get('MAPA_CLUSTER_ZOOM_MAX', 16),
+        radio_px=current_app.config.get('MAPA_CLUSTER_RADIO_PX', 60)
+    )
+    for d in instantanea.destinos:
+        if d.latitud is not None and d.longitud is not None:
+            indice.agregar(d.destino_id, d.latitud, d.longitud,
+                           _propiedades_destino(d.nombre, d.categoria, d.descripcion))
+    indice.version = instantanea.version
+    return indice
+
+def _lock_indice():
+    """Lock de la app para leer, reconstruir o modificar el índice y su versión."""
+    return current_app.extensions.setdefault('clusters_destinos_lock', threading.Lock())
+
+def indice_destinos():
+    """Índice de clusters de destinos de la app, al día con la versión del catálogo."""
+    instantanea = catalogo.actual()
+    # Comparar la versión y reemplazar el índice bajo el mismo lock que las escrituras:
+    # si no, una escritura propia podría quedar aplicada sobre un índice ya descartado
+    with _lock_indice():
+        indice = current_app.extensions.get('clusters_destinos')
+        if indice is None or indice.version != instantanea.version:
+            indice = _construir_indice(instantanea)
+            current_app.extensions['clusters_destinos'] = indice
+        return indice
+
+def _aplicar_en_indice(version, cambio):
+    """
+    Aplica cambio(indice) si el índice estaba justo en la versión anterior a 'version'
+    (la escritura propia es el único cambio) y lo deja en 'version'; si no, no hace
+    nada y el índice se reconstruirá al leerlo. Todo bajo el lock del índice.
+    """
+    with _lock_indice():
+        indice = current_app.extensions.get('clusters_destinos')
+        if indice is None or indice.version != version - 1:
+            return
+        cambio(indice)
+        indice.version = version
+
+def actualizar_destino_en_clusters(destino, version):
+    """Refleja en el índice un destino creado o editado (llamar después del commit)."""
+    if destino.latitud is None or destino.longitud is None:
+        _aplicar_en_indice(version, lambda indice: indice.quitar(destino.destino_id))
+    else:
+        propiedades = _propiedades_destino(destino.nombre, destino.categoria, destino.descripcion)
+        _aplicar_en_indice(version, lambda indice: indice.agregar(
+            destino.destino_id, destino.latitud, destino.longitud, propiedades
+        ))
+
+def quitar_destino_de_clusters(destino_id, version):
+    _aplicar_en_indice(version, lambda indice: indice.quitar(destino_id))
+
+def clusters_en_caja(oeste, sur, este, norte, zoom):
+    return {
+        'type': 'FeatureCollection',
+        'features': indice_destinos().consultar(oeste, sur, este, norte, zoom),
+        'truncado': False
+    }
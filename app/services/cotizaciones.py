@@ -0,0 +1,197 @@
+from datetime import date
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Cotizacion, Servicio
+from app.models.cotizacion import COLUMNAS_UNICAS_COTIZACION
+from app.utils import es_unidad_por_dia, insert_dialecto
+from .precios import tarifa_servicio
+from .resumenes import registrar_cotizaciones
+
+# Cotización en lote: se validan los pedidos, se traen todos los servicios
+# referenciados con una sola consulta IN, se calculan los precios con NumPy
+# (una operación por campo sobre todo el lote, agrupando por servicio para
+# aplicar sus reglas de precio) y se guardan las cotizaciones en un único
+# INSERT ... ON CONFLICT DO UPDATE ... RETURNING sobre el índice único de parámetros.
+
+_POSICION_SERVICIO = COLUMNAS_UNICAS_COTIZACION.index('servicio_id')
+# Mayor ID posible (columna INTEGER): uno más grande no existe y desbordaría los arreglos int64
+ID_MAXIMO = 2**31 - 1
+
+def calcular_precios(precios_base, por_dia, personas, dias):
+    """Versión vectorial de calcular_precio_total: precio x personas (x días si la unidad es por día)."""
+    precios_base = np.asarray(precios_base, dtype=float)
+    personas = np.asarray(personas, dtype=np.int64)
+    dias = np.asarray(dias, dtype=np.int64)
+    return precios_base * personas * np.where(np.asarray(por_dia, dtype=bool), dias, 1)
+
+def _clave(fila):
+    return tuple(fila[columna] for columna in COLUMNAS_UNICAS_COTIZACION)
+
+def upsert_cotizaciones(filas):
+    """
+    Inserta las cotizaciones o, si ya existe una con los mismos parámetros, actualiza
+    su precio, renueva su vigencia y suma una solicitud; todo en una sentencia. Las filas no deben repetir
+    parámetros. Devuelve {parámetros: (cotizacion_id, solicitudes)}; solicitudes == 1
+    significa que la cotización es nueva (y se cuenta en el resumen mensual).
+    """
+    insert = insert_dialecto(Cotizacion)
+    sentencia = insert.on_conflict_do_update(
+        index_elements=list(COLUMNAS_UNICAS_COTIZACION),
+        set_={
+            'precio_total': insert.excluded.precio_total,
+            'solicitudes': Cotizacion.solicitudes + 1,
+            # Volver a pedirla la renueva (ver services/archivo)
+            'fecha_solicitud': func.current_timestamp()
+        }
+    ).returning(
+        Cotizacion.cotizacion_id, Cotizacion.solicitudes, Cotizacion.fecha_creacion,
+        *(getattr(Cotizacion, columna) for columna in COLUMNAS_UNICAS_COTIZACION)
+    )
+    # No todos los motores garantizan el orden de RETURNING en un insert múltiple:
+    # cada fila devuelta se identifica por sus parámetros
+    guardadas = {}
+    nuevas = []
+    for fila in db.session.execute(sentencia, filas):
+        clave = tuple(fila[3:])
+        guardadas[clave] = (fila.cotizacion_id, fila.solicitudes)
+        if fila.solicitudes == 1:
+            nuevas.append((clave[_POSICION_SERVICIO], fila.fecha_creacion))
+    # Solo las nuevas suman al resumen mensual; pedir otra vez la misma no es otra cotización
+    registrar_cotizaciones(nuevas)
+    return guardadas
+
+def guardar_cotizacion(usuario_id, servicio_id, fecha_inicio, fecha_fin, personas, precio_total):
+    """Guarda (o actualiza) una cotización. Devuelve (cotizacion_id, es_nueva)."""
+    fila = {
+        'usuario_id': usuario_id,
+        'servicio_id': servicio_id,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'cantidad_personas': personas,
+        'precio_total': precio_total
+    }
+    cotizacion_id, solicitudes = upsert_cotizaciones([fila])[_clave(fila)]
+    return cotizacion_id, solicitudes == 1
+
+def _leer_fecha(valor):
+    if not isinstance(valor, str):
+        raise ValueError
+    return date.fromisoformat(valor)
+
+def _leer_pedido(pedido, max_personas, max_dias):
+    """
+    (servicio_id, fecha_inicio, fecha_fin, personas) de un pedido JSON; ValueError si es inválido.
+    Los números se acotan acá, antes de pasarlos a NumPy: un valor enorme no debe tirar todo el lote.
+    """
+    if not isinstance(pedido, dict):
+        raise ValueError('Cada pedido debe ser un objeto.')
+    try:
+        servicio_id = int(pedido['servicio_id'])
+        personas = int(pedido['personas'])
+        fecha_inicio = _leer_fecha(pedido['fecha_inicio'])
+        fecha_fin = _leer_fecha(pedido['fecha_fin']) if pedido.get('fecha_fin') else fecha_inicio
+    except KeyError as e:
+        raise ValueError(f'Falta el campo {e.args[0]}.')
+    except (TypeError, ValueError):
+        raise ValueError('Campos numéricos o de fecha inválidos (fechas en formato AAAA-MM-DD).')
+    if not 0 < servicio_id <= ID_MAXIMO:
+        raise ValueError(f'El servicio {servicio_id} no existe.')
+    if personas > max_personas:
+        raise ValueError(f'Se puede cotizar hasta {max_personas} personas por pedido.')
+    if (fecha_fin - fecha_inicio).days + 1 > max_dias:
+        raise ValueError(f'Se puede cotizar hasta {max_dias} días por pedido.')
+    return servicio_id, fecha_inicio, fecha_fin, personas
+
+def cotizar_lote(usuario_id, pedidos):
+    """
+    Cotiza y guarda una lista de pedidos. Devuelve (cotizaciones, errores), ambas
+    listas con el 'indice' del pedido original. El commit queda a cargo del llamador.
+    """
+    errores = []
+    leidos = []
+    max_personas = current_app.config.get('COTIZACION_MAX_PERSONAS', 100)
+    max_dias = current_app.config.get('COTIZACION_MAX_DIAS', 366)
+    for indice, pedido in enumerate(pedidos):
+        try:
+            leidos.append((indice, *_leer_pedido(pedido, max_personas, max_dias)))
+        except ValueError as e:
+            errores.append({'indice': indice, 'error': str(e)})
+
+    if not leidos:
+        return [], errores
+
+    indices, servicio_ids, inicios, fines, personas = map(list, zip(*leidos))
+
+    # Todos los servicios del lote en una sola consulta
+    servicios = {
+        fila.servicio_id: fila
+        for fila in db.session.execute(
+            db.select(Servicio.servicio_id, Servicio.precio_base, Servicio.unidad)
+            .where(Servicio.servicio_id.in_(set(servicio_ids)))
+        )
+    }
+
+    inicio = np.array(inicios, dtype='datetime64[D]')
+    fin = np.array(fines, dtype='datetime64[D]')
+    personas_arr = np.array(personas, dtype=np.int64)
+    dias = (fin - inicio).astype(np.int64) + 1
+    existe = np.array([s in servicios for s in servicio_ids], dtype=bool)
+    precios_base = np.array([servicios[s].precio_base if s in servicios else 0.0 for s in servicio_ids])
+    por_dia = np.array([es_unidad_por_dia(servicios[s].unidad) if s in servicios else False for s in servicio_ids])
+
+    validos = existe & (dias >= 1) & (personas_arr >= 1)
+    totales = calcular_precios(precios_base, por_dia, personas_arr, dias)
+    # Cada servicio del catálogo se cotiza con su tarifa compilada (reglas de temporada,
+    # fin de semana, grupo), de a un servicio por vez y vectorialmente sobre sus pedidos.
+    # calcular_precios solo queda para los servicios recién creados en otro worker que
+    # todavía no están en la instantánea del catálogo (como en cotizar_servicio).
+    ids_arr = np.array(servicio_ids, dtype=np.int64)
+    for servicio_id in np.unique(ids_arr[validos]):
+        tarifa = tarifa_servicio(int(servicio_id))
+        if tarifa is not None:
+            mascara = validos & (ids_arr == servicio_id)
+            totales[mascara] = tarifa.cotizar(inicio[mascara], fin[mascara], personas_arr[mascara])
+
+    for k in np.flatnonzero(~validos):
+        if not existe[k]:
+            mensaje = f'El servicio {servicio_ids[k]} no existe.'
+        elif dias[k] < 1:
+            mensaje = 'La fecha de fin no puede ser anterior a la fecha de inicio.'
+        else:
+            mensaje = 'La cantidad de personas debe ser al menos 1.'
+        errores.append({'indice': indices[k], 'error': mensaje})
+
+    filas = [
+        {
+            'usuario_id': usuario_id,
+            'servicio_id': servicio_ids[k],
+            'fecha_inicio': inicios[k],
+            'fecha_fin': fines[k],
+            'cantidad_personas': personas[k],
+            'precio_total': float(totales[k])
+        }
+        for k in np.flatnonzero(validos)
+    ]
+    cotizaciones = []
+    if filas:
+        # Pedidos repetidos dentro del lote se guardan una sola vez
+        guardadas = upsert_cotizaciones(list({_clave(fila): fila for fila in filas}.values()))
+
+        for k, fila in zip(np.flatnonzero(validos), filas):
+            cotizacion_id, solicitudes = guardadas[_clave(fila)]
+            cotizaciones.append({
+                'indice': indices[k],
+                'cotizacion_id': cotizacion_id,
+                'nueva': solicitudes == 1,
+                'servicio_id': fila['servicio_id'],
+                'fecha_inicio': fila['fecha_inicio'].isoformat(),
+                'fecha_fin': fila['fecha_fin'].isoformat(),
+                'personas': fila['cantidad_personas'],
+                'dias': int(dias[k]),
+                'precio_total': fila['precio_total']
+            })
+
+    errores.sort(key=lambda e: e['indice'])
+    return cotizaciones, errores
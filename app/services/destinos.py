@@ -0,0 +1,80 @@
+from app.extensions import db
+from app.models import Destino
+from .geo import caja_envolvente, haversine_km
+
+def destinos_cercanos(lat, lon, radio_km, limite=50):
+    """
+    Destinos a menos de 'radio_km' del punto, ordenados por distancia (haversine).
+    El rectángulo envolvente se resuelve con el índice (latitud, longitud) y solo
+    los candidatos dentro de él se miden con precisión.
+    """
+    lat_min, lat_max, lon_min, lon_max = caja_envolvente(lat, lon, radio_km)
+    candidatos = db.session.execute(
+        db.select(Destino.destino_id, Destino.nombre, Destino.categoria, Destino.latitud, Destino.longitud)
+        .where(Destino.latitud.between(lat_min, lat_max),
+               Destino.longitud.between(lon_min, lon_max))
+    ).all()
+
+    cercanos = []
+    for d in candidatos:
+        distancia = haversine_km(lat, lon, d.latitud, d.longitud)
+        if distancia <= radio_km:
+            cercanos.append({
+                'id': d.destino_id,
+                'nombre': d.nombre,
+                'categoria': d.categoria,
+                'latitud': d.latitud,
+                'longitud': d.longitud,
+                'distancia_km': round(distancia, 3)
+            })
+    cercanos.sort(key=lambda d: d['distancia_km'])
+    return cercanos[:limite]
+
+
+def parsear_bbox(texto):
+    """'oeste,sur,este,norte' -> tupla de floats, o None si es inválido."""
+    try:
+        oeste, sur, este, norte = (float(v) for v in (texto or '').split(','))
+    except ValueError:
+        return None
+    if not (-180 <= oeste <= 180 and -180 <= este <= 180 and -90 <= sur <= norte <= 90):
+        return None
+    return oeste, sur, este, norte
+
+def _filtro_caja(oeste, sur, este, norte):
+    filtro_lat = Destino.latitud.between(sur, norte)
+    if oeste <= este:
+        return db.and_(filtro_lat, Destino.longitud.between(oeste, este))
+    # El viewport cruza el antimeridiano
+    return db.and_(filtro_lat, db.or_(Destino.longitud >= oeste, Destino.longitud <= este))
+
+def feature_destino(destino_id, nombre, categoria, descripcion, latitud, longitud):
+    """Un destino como Feature GeoJSON compacta (coordenadas a ~1 m)."""
+    return {
+        'type': 'Feature',
+        'id': destino_id,
+        'geometry': {'type': 'Point', 'coordinates': [round(longitud, 5), round(latitud, 5)]},
+        'properties': {
+            'nombre': nombre,
+            'categoria': categoria,
+            'descripcion': (descripcion or '')[:120]
+        }
+    }
+
+def destinos_en_caja(oeste, sur, este, norte, limite):
+    """
+    FeatureCollection con los destinos dentro del viewport, usando el índice (latitud, longitud).
+    Si hay más de 'limite' se corta y se indica con 'truncado'.
+    """
+    filas = db.session.execute(
+        db.select(Destino.destino_id, Destino.nombre, Destino.categoria, Destino.descripcion,
+                  Destino.latitud, Destino.longitud)
+        .where(_filtro_caja(oeste, sur, este, norte))
+        .order_by(Destino.destino_id)
+        .limit(limite + 1)
+    ).all()
+    return {
+        'type': 'FeatureCollection',
+        'features': [feature_destino(*f) for f in filas[:limite]],
+        'truncado': len(filas) > limite
+    }
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from app.extensions import db
+from app.models import Servicio, OcupacionDiaria
+from app.utils import insert_dialecto
+
+# Capacidad y disponibilidad por día de cada servicio.
+# Solo las reservas Aceptadas ocupan lugar: al entrar en ese estado se suman sus
+# personas a cada día de [inicio, fin] en ocupacion_diaria, y al salir se restan
+# (las transiciones de estado están en services/reservas).
+# El control de capacidad es un UPDATE condicional sobre esas filas, así dos
+# aceptaciones simultáneas no pueden sobrevender el mismo día.
+
+ESTADO_QUE_OCUPA = 'Aceptada'
+
+
+class SinCapacidad(Exception):
+    """El servicio no tiene lugar suficiente en alguno de los días pedidos."""
+
+class RangoDemasiadoLargo(Exception):
+    """El rango supera COTIZACION_MAX_DIAS: ocuparlo escribiría una fila por cada día."""
+
+
+def validar_rango_reservable(inicio, fin):
+    """Lanza RangoDemasiadoLargo si [inicio, fin] tiene más días de los que se pueden cotizar."""
+    max_dias = current_app.config.get('COTIZACION_MAX_DIAS', 366)
+    if (fin - inicio).days + 1 > max_dias:
+        raise RangoDemasiadoLargo(f'Las reservas admiten hasta {max_dias} días.')
+
+
+def dias_del_rango(inicio, fin):
+    return [inicio + timedelta(days=i) for i in range((fin - inicio).days + 1)]
+
+def libres_por_dia(capacidad, ocupados, inicio, fin):
+    """
+    [(fecha, lugares libres)] para cada día de [inicio, fin]; 'ocupados' es {fecha: personas}.
+    Con capacidad None (sin límite) los libres son None.
+    """
+    return [
+        (dia, None if capacidad is None else max(capacidad - ocupados.get(dia, 0), 0))
+        for dia in dias_del_rango(inicio, fin)
+    ]
+
+def ocupacion_por_dia(servicio_id, inicio, fin):
+    """{fecha: personas} con los días de [inicio, fin] que tienen ocupación registrada."""
+    return dict(db.session.execute(
+        db.select(OcupacionDiaria.fecha, OcupacionDiaria.personas)
+        .where(OcupacionDiaria.servicio_id == servicio_id,
+               OcupacionDiaria.fecha.between(inicio, fin))
+    ).all())
+
+def calendario(servicio, inicio, fin):
+    return libres_por_dia(servicio.capacidad, ocupacion_por_dia(servicio.servicio_id, inicio, fin), inicio, fin)
+
+def lugar_libre(servicio, inicio, fin):
+    """Lugares libres en el día más ocupado de [inicio, fin]; None si el servicio no tiene límite."""
+    if servicio.capacidad is None:
+        return None
+    pico = db.session.scalar(
+        db.select(func.max(OcupacionDiaria.personas))
+        .where(OcupacionDiaria.servicio_id == servicio.servicio_id,
+               OcupacionDiaria.fecha.between(inicio, fin))
+    )
+    return max(servicio.capacidad - (pico or 0), 0)
+
+def ocupar(servicio_id, inicio, fin, personas):
+    """
+    Suma 'personas' a cada día del rango solo si todos tienen lugar; si alguno no,
+    lanza SinCapacidad (el llamador hace rollback). El commit queda a cargo del llamador.
+    Un rango más largo que COTIZACION_MAX_DIAS lanza RangoDemasiadoLargo sin escribir nada.
+    """
+    validar_rango_reservable(inicio, fin)
+    dias = dias_del_rango(inicio, fin)
+    # Asegura una fila por día para que el UPDATE condicional las cubra a todas
+    db.session.execute(
+        insert_dialecto(OcupacionDiaria).on_conflict_do_nothing(),
+        [{'servicio_id': servicio_id, 'fecha': dia, 'personas': 0} for dia in dias]
+    )
+    # La capacidad se lee en la misma sentencia: NULL es sin límite
+    capacidad = db.select(Servicio.capacidad).where(Servicio.servicio_id == servicio_id).scalar_subquery()
+    actualizadas = db.session.execute(
+        db.update(OcupacionDiaria)
+        .where(OcupacionDiaria.servicio_id == servicio_id,
+               OcupacionDiaria.fecha.between(inicio, fin),
+               or_(capacidad.is_(None), OcupacionDiaria.personas + personas <= capacidad))
+        .values(personas=OcupacionDiaria.personas + personas)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if actualizadas != len(dias):
+        raise SinCapacidad(f'No hay lugar para {personas} personas en todas las fechas pedidas.')
+
+def liberar(servicio_id, inicio, fin, personas):
+    db.session.execute(
+        db.update(OcupacionDiaria)
+        .where(OcupacionDiaria.servicio_id == servicio_id,
+               OcupacionDiaria.fecha.between(inicio, fin))
+        .values(personas=OcupacionDiaria.personas - personas)
+        .execution_options(synchronize_session=False)
+    )
+
+def servicios_disponibles(destino_id, inicio, fin, personas):
+    """
+    Servicios Disponibles del destino con lugar para 'personas' en todos los días
+    de [inicio, fin], en una consulta: [(servicio, lugares libres o None si no tiene límite)].
+    """
+    pico = (
+        db.select(OcupacionDiaria.servicio_id, func.max(OcupacionDiaria.personas).label('personas'))
+        .join(Servicio, Servicio.servicio_id == OcupacionDiaria.servicio_id)
+        .where(Servicio.destino_id == destino_id, OcupacionDiaria.fecha.between(inicio, fin))
+        .group_by(OcupacionDiaria.servicio_id)
+        .subquery()
+    )
+    libres = Servicio.capacidad - func.coalesce(pico.c.personas, 0)
+    filas = db.session.execute(
+        db.select(Servicio, libres)
+        .outerjoin(pico, pico.c.servicio_id == Servicio.servicio_id)
+        .where(Servicio.destino_id == destino_id,
+               Servicio.status == 'Disponible',
+               or_(Servicio.capacidad.is_(None), libres >= personas))
+        .order_by(Servicio.precio_base)
+    ).all()
+    return [(servicio, libres) for servicio, libres in filas]
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app.extensions import db
+from app.models import Cotizacion, CotizacionArchivo, Reserva, ReservaArchivo
+
+# Exportación de reservas y cotizaciones para finanzas, en CSV o NDJSON.
+# Las filas se leen con un cursor del lado del servidor (yield_per, que activa
+# stream_results) de a EXPORTACION_LOTE filas y cada lote se entrega ya convertido
+# a texto: la memoria no depende de cuántas filas se exporten y el primer lote sale
+# apenas la base devuelve las primeras filas. Con historial también se exportan las
+# filas archivadas (primero el archivo, después las vigentes), con la columna 'archivada'.
+
+FORMATOS_EXPORTACION = ('csv', 'ndjson')
+TIPOS_CONTENIDO = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# tabla -> (modelo, modelo de archivo, columna de fecha por la que se filtra)
+TABLAS_EXPORTABLES = {
+    'reservas': (Reserva, ReservaArchivo, 'fecha_reserva'),
+    # fecha_creacion y no fecha_solicitud, que se renueva cada vez que se vuelve a pedir
+    'cotizaciones': (Cotizacion, CotizacionArchivo, 'fecha_creacion'),
+}
+
+def columnas_de(tabla):
+    """Nombres de las columnas exportables de una tabla, en el orden del modelo."""
+    modelo = TABLAS_EXPORTABLES[tabla][0]
+    return [columna.name for columna in modelo.__table__.columns]
+
+def elegir_columnas(tabla, pedidas):
+    """
+    Valida la selección de columnas ('a,b,c' o lista). Sin selección van todas.
+    ValueError si la tabla o alguna columna no existe.
+    """
+    if tabla not in TABLAS_EXPORTABLES:
+        raise ValueError(f'No se puede exportar "{tabla}": usa {" o ".join(TABLAS_EXPORTABLES)}.')
+    disponibles = columnas_de(tabla)
+    if isinstance(pedidas, str):
+        pedidas = pedidas.split(',')
+    pedidas = [nombre.strip() for nombre in pedidas or [] if nombre.strip()]
+    if not pedidas:
+        return disponibles
+    desconocidas = [nombre for nombre in pedidas if nombre not in disponibles]
+    if desconocidas:
+        raise ValueError(f'Columnas desconocidas: {", ".join(desconocidas)}. Disponibles: {", ".join(disponibles)}.')
+    # Sin repetidas, en el orden pedido
+    return list(dict.fromkeys(pedidas))
+
+def _consulta(modelo, columnas, columna_fecha, desde, hasta):
+    tabla = modelo.__table__
+    consulta = db.select(*(tabla.c[nombre] for nombre in columnas))
+    fecha = tabla.c[columna_fecha]
+    if desde:
+        consulta = consulta.where(fecha >= desde)
+    if hasta:
+        # 'hasta' es un día completo: la columna es DateTime
+        consulta = consulta.where(fecha < hasta + timedelta(days=1))
+    # Orden por clave primaria: el índice devuelve las filas sin ordenar todo antes
+    return consulta.order_by(*tabla.primary_key.columns)
+
+def consultas_exportacion(tabla, columnas, desde=None, hasta=None, historial=False):
+    """Lista de (consulta, archivada) a recorrer en orden: el archivo (si se pide) y las vigentes."""
+    modelo, archivo, columna_fecha = TABLAS_EXPORTABLES[tabla]
+    consultas = []
+    if historial:
+        consultas.append((_consulta(archivo, columnas, columna_fecha, desde, hasta), True))
+    consultas.append((_consulta(modelo, columnas, columna_fecha, desde, hasta), False))
+    return consultas
+
+def _valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+def _lineas_csv(encabezado, filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    if encabezado:
+        escritor.writerow(encabezado)
+    escritor.writerows([_valor(v) for v in fila] for fila in filas)
+    return buffer.getvalue()
+
+def _lineas_ndjson(columnas, filas):
+    return ''.join(
+        json.dumps({c: _valor(v) for c, v in zip(columnas, fila)}, ensure_ascii=False) + '\n'
+        for fila in filas
+    )
+
+def exportar(tabla, formato, columnas, desde=None, hasta=None, historial=False, lote=None):
+    """
+    Genera el archivo en trozos de texto, uno por lote de filas. Las columnas ya deben
+    estar validadas (elegir_columnas). Pensado para una respuesta en streaming o un archivo.
+    """
+    lote = lote or current_app.config.get('EXPORTACION_LOTE', 2000)
+    salida = list(columnas) + (['archivada'] if historial else [])
+    if formato == 'csv':
+        # El encabezado sale aunque no haya filas
+        yield _lineas_csv(salida, [])
+    for consulta, archivada in consultas_exportacion(tabla, columnas, desde, hasta, historial):
+        resultado = db.session.execute(consulta, execution_options={'yield_per': lote})
+        for filas in resultado.partitions():
+            if historial:
+                filas = [(*fila, archivada) for fila in filas]
+            if formato == 'csv':
+                yield _lineas_csv(None, filas)
+            else:
+                yield _lineas_ndjson(salida, filas)
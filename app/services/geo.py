@@ -0,0 +1,69 @@
+import math
+
+# Utilidades geográficas sin dependencias externas (no requiere PostGIS).
+
+RADIO_TIERRA_KM = 6371.0088
+# Sobre la misma esfera que haversine_km: si no, la caja queda más chica que el radio
+KM_POR_GRADO_LAT = math.pi * RADIO_TIERRA_KM / 180
+_BASE32_GEOHASH = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def parsear_coordenadas(texto):
+    """
+    Convierte 'lat,lon' en (lat, lon) como floats.
+    Devuelve None si el formato es inválido o los valores están fuera de rango.
+    """
+    if not texto or ',' not in texto:
+        return None
+    try:
+        lat_str, lon_str = texto.split(',', 1)
+        lat, lon = float(lat_str.strip()), float(lon_str.strip())
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia en km sobre la esfera entre dos puntos (grados decimales)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+def codificar_geohash(lat, lon, precision=9):
+    """Geohash estándar (base32). Con precisión 9 cada celda mide unos 5 m."""
+    lat_rango, lon_rango = [-90.0, 90.0], [-180.0, 180.0]
+    resultado = []
+    bits, valor, es_lon = 0, 0, True
+    while len(resultado) < precision:
+        rango, coordenada = (lon_rango, lon) if es_lon else (lat_rango, lat)
+        medio = (rango[0] + rango[1]) / 2
+        valor <<= 1
+        if coordenada >= medio:
+            valor |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        es_lon = not es_lon
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32_GEOHASH[valor])
+            bits, valor = 0, 0
+    return ''.join(resultado)
+
+def caja_envolvente(lat, lon, radio_km):
+    """
+    Rectángulo (lat_min, lat_max, lon_min, lon_max) que contiene el círculo de
+    'radio_km' alrededor del punto. Sirve de prefiltro sobre los índices de lat/lon.
+    """
+    # Apenas más grande que el radio: un punto justo en el borde no se pierde por redondeo
+    radio_km = radio_km * (1 + 1e-9)
+    delta_lat = radio_km / KM_POR_GRADO_LAT
+    lat_min, lat_max = max(lat - delta_lat, -90.0), min(lat + delta_lat, 90.0)
+
+    coseno = math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    if coseno <= 1e-9:
+        return lat_min, lat_max, -180.0, 180.0  # el círculo toca un polo
+    delta_lon = radio_km / (KM_POR_GRADO_LAT * coseno)
+    return lat_min, lat_max, max(lon - delta_lon, -180.0), min(lon + delta_lon, 180.0)
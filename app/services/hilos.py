@@ -0,0 +1,239 @@
+from collections import Counter
+from sqlalchemy import bindparam, case, literal
+from sqlalchemy.orm import aliased, joinedload
+from app.extensions import db
+from app.models import Posteo
+from app.models.posteo import SEPARADOR_RUTA, ANCHO_SEGMENTO, PROFUNDIDAD_MAXIMA
+
+
+class NodoPosteo:
+    """Nodo del árbol de un hilo: el posteo y sus respuestas ya cargadas."""
+    __slots__ = ('posteo', 'respuestas', 'respuestas_pendientes')
+
+    def __init__(self, posteo, respuestas_pendientes=False):
+        self.posteo = posteo
+        self.respuestas = []
+        # True si el posteo tiene respuestas que no se cargaron (límite de profundidad)
+        self.respuestas_pendientes = respuestas_pendientes
+
+    def a_dict(self):
+        """Serialización del subárbol para las respuestas JSON."""
+        p = self.posteo
+        return {
+            'posteo_id': p.posteo_id,
+            'posteo_padre_id': p.posteo_padre_id,
+            'titulo': p.titulo,
+            'contenido': p.contenido,
+            'autor': f'{p.autor.nombre} {p.autor.apellido}',
+            'fecha_creacion': p.fecha_creacion.isoformat(),
+            'respuestas_pendientes': self.respuestas_pendientes,
+            'respuestas': [n.a_dict() for n in self.respuestas]
+        }
+
+
+def construir_arbol(posteos, raiz_ids, pendientes=()):
+    """
+    Arma el bosque padre -> hijos en memoria a partir de una lista plana de posteos.
+    Devuelve los nodos raíz en el mismo orden que 'raiz_ids'.
+    Las respuestas quedan ordenadas por fecha de creación (y luego por ID).
+    'pendientes' son los IDs de posteos cuyas respuestas no vinieron en la carga.
+    """
+    pendientes = set(pendientes)
+    nodos = {p.posteo_id: NodoPosteo(p, p.posteo_id in pendientes) for p in posteos}
+    raices = set(raiz_ids)
+
+    for nodo in sorted(nodos.values(), key=lambda n: (n.posteo.fecha_creacion, n.posteo.posteo_id)):
+        padre = nodos.get(nodo.posteo.posteo_padre_id)
+        if padre is not None and nodo.posteo.posteo_id not in raices:
+            padre.respuestas.append(nodo)
+
+    return [nodos[i] for i in raiz_ids if i in nodos]
+
+
+def cargar_hilos(raiz_ids, profundidad_max=None):
+    """
+    Carga los hilos cuyas raíces son 'raiz_ids' en UNA sola consulta.
+    Usa un CTE recursivo sobre posteo_padre_id y precarga los autores, de modo
+    que la cantidad de consultas no depende de la profundidad ni del ancho de los hilos.
+
+    Con 'profundidad_max' se corta el recorrido en ese nivel (las raíces son el nivel 0);
+    los nodos del último nivel que tienen respuestas quedan marcados con
+    'respuestas_pendientes' para expandirlos después a demanda.
+    """
+    raiz_ids = list(raiz_ids)
+    if not raiz_ids:
+        return []
+
+    arbol = (
+        db.select(Posteo.posteo_id, literal(0).label('nivel'))
+        .where(Posteo.posteo_id.in_(raiz_ids))
+        .cte('arbol', recursive=True)
+    )
+    hijo = aliased(Posteo)
+    recursivo = db.select(hijo.posteo_id, (arbol.c.nivel + 1).label('nivel')).where(
+        hijo.posteo_padre_id == arbol.c.posteo_id
+    )
+    if profundidad_max is not None:
+        recursivo = recursivo.where(arbol.c.nivel < profundidad_max)
+    arbol = arbol.union_all(recursivo)
+
+    columnas = [Posteo]
+    if profundidad_max is not None:
+        # Solo los nodos del último nivel necesitan saber si tienen respuestas sin cargar
+        respuesta = aliased(Posteo)
+        tiene_respuestas = db.exists().where(respuesta.posteo_padre_id == Posteo.posteo_id)
+        columnas.append(case((arbol.c.nivel == profundidad_max, tiene_respuestas), else_=False))
+
+    filas = db.session.execute(
+        db.select(*columnas)
+        .join(arbol, Posteo.posteo_id == arbol.c.posteo_id)
+        .options(joinedload(Posteo.autor))
+    ).all()
+
+    posteos = [fila[0] for fila in filas]
+    pendientes = [fila[0].posteo_id for fila in filas if len(fila) > 1 and fila[1]]
+    return construir_arbol(posteos, raiz_ids, pendientes)
+
+
+# --- Consultas sobre la ruta materializada ---
+# Todo el subárbol de un posteo cumple: ruta <= r < ruta_sin_separador + '0'
+# ('0' es el carácter siguiente a '/'), así que es un único rango sobre el índice.
+
+def rango_subarbol(ruta):
+    return ruta, ruta[:-1] + chr(ord(SEPARADOR_RUTA) + 1)
+
+def filtro_subarbol(posteo, incluir_raiz=True):
+    desde, hasta = rango_subarbol(posteo.ruta)
+    if incluir_raiz:
+        return db.and_(Posteo.ruta >= desde, Posteo.ruta < hasta)
+    return db.and_(Posteo.ruta > desde, Posteo.ruta < hasta)
+
+def cargar_hilo_completo(posteo):
+    """El posteo y todas sus respuestas (a cualquier profundidad) en una consulta por rango."""
+    posteos = (
+        Posteo.query
+        .filter(filtro_subarbol(posteo))
+        .options(joinedload(Posteo.autor))
+        .all()
+    )
+    return construir_arbol(posteos, [posteo.posteo_id])[0]
+
+def contar_descendientes(posteo):
+    return db.session.scalar(
+        db.select(db.func.count()).select_from(Posteo).where(filtro_subarbol(posteo, incluir_raiz=False))
+    )
+
+def ids_subarbol(posteo):
+    """IDs del posteo y de todas sus respuestas."""
+    return db.session.scalars(
+        db.select(Posteo.posteo_id).where(filtro_subarbol(posteo))
+    ).all()
+
+def cargar_ancestros(posteo):
+    """Ancestros para el breadcrumb, de la raíz hacia el padre, en una consulta por PK."""
+    ids = posteo.ids_ancestros
+    if not ids:
+        return []
+    por_id = {p.posteo_id: p for p in Posteo.query.filter(Posteo.posteo_id.in_(ids))}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+def padre_de_respuesta(posteo_padre_id):
+    """
+    Posteo del que se cuelga una respuesta a 'posteo_padre_id': el mismo o, si ya está
+    en PROFUNDIDAD_MAXIMA, su padre (la respuesta queda como hermana). None si no existe.
+    """
+    padre = db.session.get(Posteo, posteo_padre_id)
+    if padre is not None and padre.profundidad >= PROFUNDIDAD_MAXIMA:
+        return padre.posteo_padre
+    return padre
+
+
+def invalidar_hilo(raiz_id):
+    """Incrementa la versión del hilo; su fragmento cacheado deja de usarse."""
+    db.session.execute(
+        db.update(Posteo)
+        .where(Posteo.posteo_id == raiz_id)
+        .values(version=Posteo.version + 1)
+    )
+
+
+# --- Contadores desnormalizados ---
+# Cada alta o baja de una respuesta actualiza a todos sus ancestros en un único
+# UPDATE (tomados de la ruta), dentro de la transacción de la ruta que la origina.
+# También incrementa la versión del hilo para invalidar su fragmento cacheado.
+
+def _actualizar_ancestros(posteo, respuestas, descendientes, actividad):
+    ancestros = posteo.ids_ancestros
+    if not ancestros:
+        return
+    valores = {
+        'cantidad_respuestas': Posteo.cantidad_respuestas + case(
+            (Posteo.posteo_id == posteo.posteo_padre_id, respuestas), else_=0
+        ),
+        'cantidad_descendientes': Posteo.cantidad_descendientes + descendientes,
+        'version': Posteo.version + case((Posteo.posteo_id == ancestros[0], 1), else_=0),
+    }
+    if actividad:
+        valores['ultima_actividad'] = db.func.current_timestamp()
+
+    db.session.execute(
+        db.update(Posteo)
+        .where(Posteo.posteo_id.in_(ancestros))
+        .values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+
+def registrar_respuesta(posteo):
+    """Suma la respuesta nueva en los contadores de sus ancestros (requiere flush previo)."""
+    _actualizar_ancestros(posteo, respuestas=1, descendientes=1, actividad=True)
+
+def registrar_baja(posteo):
+    """Descuenta el posteo y todo su subárbol de los contadores de sus ancestros."""
+    eliminados = posteo.cantidad_descendientes + 1
+    _actualizar_ancestros(posteo, respuestas=-1, descendientes=-eliminados, actividad=False)
+
+def recalcular_contadores(tamano_lote=1000):
+    """
+    Recalcula desde cero los contadores de todos los posteos a partir de la ruta.
+    Devuelve la cantidad de posteos actualizados.
+    """
+    respuestas = Counter()
+    descendientes = Counter()
+    actividad = {}
+
+    filas = db.session.execute(
+        db.select(Posteo.posteo_id, Posteo.posteo_padre_id, Posteo.ruta, Posteo.fecha_creacion)
+        .execution_options(yield_per=tamano_lote)
+    )
+    for posteo_id, padre_id, ruta, fecha in filas:
+        if actividad.get(posteo_id) is None or (fecha and fecha > actividad[posteo_id]):
+            actividad[posteo_id] = fecha
+        if padre_id is not None:
+            respuestas[padre_id] += 1
+        for segmento in (ruta or '').split(SEPARADOR_RUTA)[:-2]:
+            ancestro = int(segmento[:ANCHO_SEGMENTO])
+            descendientes[ancestro] += 1
+            if fecha and (actividad.get(ancestro) is None or fecha > actividad[ancestro]):
+                actividad[ancestro] = fecha
+
+    actualizar = (
+        db.update(Posteo.__table__)
+        .where(Posteo.__table__.c.posteo_id == bindparam('b_id'))
+        .values(cantidad_respuestas=bindparam('b_respuestas'),
+                cantidad_descendientes=bindparam('b_descendientes'),
+                ultima_actividad=bindparam('b_actividad'))
+    )
+    lote = []
+    for posteo_id, fecha in actividad.items():
+        lote.append({'b_id': posteo_id,
+                     'b_respuestas': respuestas[posteo_id],
+                     'b_descendientes': descendientes[posteo_id],
+                     'b_actividad': fecha})
+        if len(lote) >= tamano_lote:
+            db.session.execute(actualizar, lote)
+            lote = []
+    if lote:
+        db.session.execute(actualizar, lote)
+    db.session.commit()
+    return len(actividad)
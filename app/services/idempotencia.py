@@ -0,0 +1,173 @@
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request, session, redirect, jsonify, flash
+from flask_login import current_user
+from app.extensions import db
+from app.models import ClaveIdempotencia
+from app.utils import insert_dialecto
+
+# Claves de idempotencia para POST que crean datos (cotizar, reservar, lotes).
+# El cliente manda una clave única por intento en el encabezado Idempotency-Key
+# o, en formularios, en el campo oculto 'clave_idempotencia'. Un doble clic o el
+# reintento de un proxy con la misma clave no vuelve a ejecutar la vista: recibe
+# la respuesta guardada o, si la primera todavía se está procesando, la espera.
+# Si la primera lleva más de IDEMPOTENCIA_ESPERA_SEGUNDOS en curso se la da por
+# muerta (se cayó el proceso a mitad de camino) y el reintento toma la clave.
+
+ENCABEZADO = 'Idempotency-Key'
+CAMPO_FORMULARIO = 'clave_idempotencia'
+LARGO_MAXIMO = 64
+EN_CURSO = 'en_curso'
+COMPLETA = 'completa'
+
+def nueva_clave_idempotencia():
+    """Clave para el campo oculto de un formulario (global de template)."""
+    return uuid.uuid4().hex
+
+def _vencimiento():
+    return datetime.utcnow() - timedelta(hours=current_app.config.get('IDEMPOTENCIA_TTL_HORAS', 24))
+
+def _toma_vencida():
+    """Una clave tomada antes de este momento que sigue en curso quedó abandonada."""
+    return datetime.utcnow() - timedelta(seconds=current_app.config.get('IDEMPOTENCIA_ESPERA_SEGUNDOS', 10))
+
+def _filtro(usuario_id, clave):
+    return (ClaveIdempotencia.usuario_id == usuario_id, ClaveIdempotencia.clave == clave)
+
+def _tomar(usuario_id, clave):
+    """
+    True si esta petición tomó la clave: es la primera, la anterior había vencido o
+    quedó en curso más de lo que un reintento espera (para la misma ruta).
+    """
+    ahora = datetime.utcnow()
+    db.session.execute(db.delete(ClaveIdempotencia).where(
+        *_filtro(usuario_id, clave), ClaveIdempotencia.fecha_creacion < _vencimiento()
+    ))
+    tomada = db.session.execute(
+        insert_dialecto(ClaveIdempotencia).values(
+            usuario_id=usuario_id, clave=clave, ruta=request.path,
+            estado=EN_CURSO, fecha_creacion=ahora, fecha_toma=ahora
+        ).on_conflict_do_nothing().returning(ClaveIdempotencia.clave)
+    ).first()
+    if tomada is None:
+        # UPDATE condicional: si dos reintentos llegan juntos, solo uno la renueva
+        tomada = db.session.execute(
+            db.update(ClaveIdempotencia)
+            .where(*_filtro(usuario_id, clave),
+                   ClaveIdempotencia.ruta == request.path,
+                   ClaveIdempotencia.estado == EN_CURSO,
+                   ClaveIdempotencia.fecha_toma < _toma_vencida())
+            .values(fecha_toma=ahora)
+            .returning(ClaveIdempotencia.clave)
+        ).first()
+    # Se confirma enseguida para que los reintentos concurrentes la vean
+    db.session.commit()
+    return tomada is not None
+
+def _leer(usuario_id, clave):
+    return db.session.execute(
+        db.select(ClaveIdempotencia.ruta, ClaveIdempotencia.estado, ClaveIdempotencia.codigo,
+                  ClaveIdempotencia.ubicacion, ClaveIdempotencia.cuerpo,
+                  ClaveIdempotencia.tipo_contenido, ClaveIdempotencia.mensajes,
+                  ClaveIdempotencia.fecha_toma)
+        .where(*_filtro(usuario_id, clave))
+    ).first()
+
+def _esperar(usuario_id, clave):
+    """
+    La fila de la clave cuando deja de estar en curso, o en curso si se agotó la espera.
+    None si se liberó o si la toma quedó abandonada: en ambos casos se puede volver a tomar.
+    """
+    limite = time.monotonic() + current_app.config.get('IDEMPOTENCIA_ESPERA_SEGUNDOS', 10)
+    while True:
+        fila = _leer(usuario_id, clave)
+        if fila is not None and fila.estado == EN_CURSO and fila.fecha_toma < _toma_vencida():
+            # Solo si es la misma operación; si no, el llamador responde 422
+            return None if fila.ruta == request.path else fila
+        if fila is None or fila.estado == COMPLETA or time.monotonic() >= limite:
+            return fila
+        # Termina la transacción para ver lo que confirme la otra petición
+        db.session.commit()
+        time.sleep(0.1)
+
+def _liberar(usuario_id, clave):
+    db.session.rollback()
+    db.session.execute(db.delete(ClaveIdempotencia).where(*_filtro(usuario_id, clave)))
+    db.session.commit()
+
+def _guardar(usuario_id, clave, respuesta, mensajes):
+    es_redireccion = 300 <= respuesta.status_code < 400
+    db.session.execute(
+        db.update(ClaveIdempotencia).where(*_filtro(usuario_id, clave)).values(
+            estado=COMPLETA,
+            codigo=respuesta.status_code,
+            ubicacion=respuesta.location if es_redireccion else None,
+            cuerpo=None if es_redireccion else respuesta.get_data(as_text=True),
+            tipo_contenido=respuesta.mimetype,
+            mensajes=json.dumps(mensajes)
+        )
+    )
+    db.session.commit()
+
+def _repetir(fila):
+    for categoria, mensaje in json.loads(fila.mensajes or '[]'):
+        flash(mensaje, categoria)
+    if fila.ubicacion:
+        respuesta = redirect(fila.ubicacion, fila.codigo)
+    else:
+        respuesta = current_app.response_class(fila.cuerpo, status=fila.codigo, mimetype=fila.tipo_contenido)
+    respuesta.headers['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+def idempotente(func):
+    """
+    Decorador para vistas POST (después de login_required). Sin clave la vista
+    se ejecuta como siempre. Las respuestas 5xx y las excepciones liberan la clave
+    para que el reintento vuelva a intentarlo.
+    """
+    @wraps(func)
+    def decorated_view(*args, **kwargs):
+        clave = request.headers.get(ENCABEZADO) or request.form.get(CAMPO_FORMULARIO)
+        if request.method != 'POST' or not clave:
+            return func(*args, **kwargs)
+        if len(clave) > LARGO_MAXIMO:
+            return jsonify({'error': f'La clave de idempotencia admite hasta {LARGO_MAXIMO} caracteres.'}), 400
+
+        usuario_id = current_user.usuario_id
+        while not _tomar(usuario_id, clave):
+            fila = _esperar(usuario_id, clave)
+            if fila is None:
+                continue  # la otra petición falló o quedó abandonada: se reintenta tomarla
+            if fila.ruta != request.path:
+                return jsonify({'error': 'La clave de idempotencia ya se usó en otra operación.'}), 422
+            if fila.estado != COMPLETA:
+                respuesta = jsonify({'error': 'La solicitud con esta clave todavía se está procesando.'})
+                respuesta.headers['Retry-After'] = '1'
+                return respuesta, 409
+            return _repetir(fila)
+
+        previos = len(session.get('_flashes', []))
+        try:
+            respuesta = current_app.make_response(func(*args, **kwargs))
+        except Exception:
+            _liberar(usuario_id, clave)
+            raise
+        if respuesta.status_code >= 500:
+            _liberar(usuario_id, clave)
+            return respuesta
+
+        # Mensajes flash que agregó la vista y todavía no se mostraron (los de una
+        # redirección); si la vista renderizó, ya quedaron dentro del cuerpo
+        mensajes = [list(m) for m in session.get('_flashes', [])[previos:]]
+        _guardar(usuario_id, clave, respuesta, mensajes)
+        return respuesta
+    return decorated_view
+
+def purgar_claves_vencidas():
+    """Borra las claves más viejas que el TTL. Devuelve cuántas."""
+    resultado = db.session.execute(db.delete(ClaveIdempotencia).where(ClaveIdempotencia.fecha_creacion < _vencimiento()))
+    db.session.commit()
+    return resultado.rowcount
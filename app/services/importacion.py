@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+from datetime import datetime
+from flask import current_app, flash, request
+from app.extensions import db, catalogo
+from app.models import Destino, Servicio
+from app.models.servicio import UNIDADES_DISPONIBLES, ESTADOS_SERVICIO
+
+# Importación masiva de servicios desde CSV (con encabezado) o NDJSON (un objeto
+# JSON por línea). El archivo se lee fila por fila y se inserta en lotes de
+# IMPORTACION_LOTE con un INSERT de muchas filas por lote, así la memoria no
+# depende del tamaño del archivo. Las filas inválidas no detienen la importación:
+# se informan con su número de línea.
+
+FORMATOS = ('csv', 'ndjson')
+CAMPOS_OBLIGATORIOS = ('nombre', 'descripcion', 'precio_base', 'unidad', 'destino_id')
+
+def formato_de_archivo(nombre_archivo):
+    """'csv' o 'ndjson' según la extensión; None si no es ninguno de los dos."""
+    extension = nombre_archivo.rsplit('.', 1)[-1].lower() if '.' in nombre_archivo else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return None
+
+def importar_archivo_subido(importar, entidades, hecho):
+    """
+    Importa el archivo del formulario (campo 'archivo', formato elegido o por extensión)
+    con importar(texto, formato), leyéndolo a medida que se importa, sin cargarlo entero.
+    Informa el resultado con flash; devuelve el resumen, o None si no se pudo importar.
+    'entidades' ('servicios', 'usuarios') y 'hecho' ('importados', 'creados') arman los mensajes.
+    """
+    archivo = request.files.get('archivo')
+    formato = request.form.get('formato') or (formato_de_archivo(archivo.filename) if archivo else None)
+    if not archivo or not archivo.filename:
+        flash('Selecciona un archivo para importar.', 'danger')
+        return None
+    if formato not in FORMATOS:
+        flash('Formato no reconocido: usa un archivo .csv o .ndjson (o elige el formato).', 'danger')
+        return None
+    try:
+        texto = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+        resumen = importar(texto, formato)
+    except (UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        flash(f'No se pudo leer el archivo (¿está en UTF-8?): {e}', 'danger')
+        return None
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al importar los {entidades}: {e}', 'danger')
+        print(f"Database Error on {entidades} import: {e}")
+        return None
+    flash(f'{resumen["importados"]} {entidades} {hecho}, {resumen["con_error"]} filas con errores.',
+          'success' if resumen['importados'] else 'warning')
+    return resumen
+
+def leer_filas(texto, formato):
+    """
+    Genera (número de línea, fila) desde un flujo de texto. Una línea NDJSON que no es
+    un objeto JSON se entrega como un str con el error, para informarla y seguir.
+    """
+    if formato == 'csv':
+        lector = csv.DictReader(texto)
+        for fila in lector:
+            yield lector.line_num, fila
+    else:
+        for numero, linea in enumerate(texto, 1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                yield numero, 'La línea no es JSON válido.'
+                continue
+            yield numero, fila if isinstance(fila, dict) else 'La línea debe ser un objeto JSON.'
+
+def texto_de_campo(fila, campo):
+    valor = fila.get(campo)
+    return str(valor).strip() if valor is not None else ''
+
+def validar_fila(fila, destinos_validos):
+    """
+    Convierte una fila leída en los valores de un Servicio. Devuelve (valores, None)
+    o (None, mensaje de error). Las reglas son las del formulario de alta.
+    """
+    if not isinstance(fila, dict):
+        return None, fila
+    faltantes = [campo for campo in CAMPOS_OBLIGATORIOS if not texto_de_campo(fila, campo)]
+    if faltantes:
+        return None, f'Faltan campos obligatorios: {", ".join(faltantes)}.'
+
+    nombre, descripcion = texto_de_campo(fila, 'nombre'), texto_de_campo(fila, 'descripcion')
+    unidad = texto_de_campo(fila, 'unidad')
+    if len(nombre) > 100 or len(descripcion) > 255:
+        return None, 'El nombre admite hasta 100 caracteres y la descripción hasta 255.'
+    if unidad not in UNIDADES_DISPONIBLES:
+        return None, f'Unidad "{unidad}" inválida (opciones: {", ".join(UNIDADES_DISPONIBLES)}).'
+    status = texto_de_campo(fila, 'status') or 'Disponible'
+    if status not in ESTADOS_SERVICIO:
+        return None, f'Status "{status}" inválido (opciones: {", ".join(ESTADOS_SERVICIO)}).'
+
+    try:
+        precio_base = float(texto_de_campo(fila, 'precio_base'))
+        destino_id = int(texto_de_campo(fila, 'destino_id'))
+        capacidad = int(texto_de_campo(fila, 'capacidad')) if texto_de_campo(fila, 'capacidad') else None
+    except ValueError:
+        return None, 'precio_base, destino_id y capacidad deben ser numéricos.'
+    if not precio_base > 0:
+        return None, 'El precio base debe ser mayor a cero.'
+    if capacidad is not None and capacidad < 1:
+        return None, 'La capacidad debe ser un entero mayor a cero (o vacía para sin límite).'
+    if destino_id not in destinos_validos:
+        return None, f'El destino {destino_id} no existe.'
+
+    return {
+        'nombre': nombre,
+        'descripcion': descripcion,
+        'precio_base': precio_base,
+        'unidad': unidad,
+        'status': status,
+        'capacidad': capacidad,
+        'destino_id': destino_id
+    }, None
+
+def _insertar(lote):
+    db.session.execute(db.insert(Servicio), lote)
+    catalogo.invalidar()
+    db.session.commit()
+
+def importar_servicios(texto, formato, proveedor_id, tamano_lote=None, al_avanzar=None):
+    """
+    Importa los servicios del flujo para el proveedor; cada lote es una transacción.
+    'al_avanzar(importados)' se llama después de cada lote. Devuelve
+    {'importados', 'con_error', 'errores': [(línea, mensaje)]}; solo se guardan los
+    primeros IMPORTACION_MAX_ERRORES mensajes, pero se cuentan todos.
+    """
+    tamano_lote = tamano_lote or current_app.config.get('IMPORTACION_LOTE', 1000)
+    max_errores = current_app.config.get('IMPORTACION_MAX_ERRORES', 500)
+    # Solo los ids: alcanza para validar sin cargar los destinos
+    destinos_validos = set(db.session.scalars(db.select(Destino.destino_id)))
+
+    resumen = {'importados': 0, 'con_error': 0, 'errores': []}
+    lote = []
+    for numero, fila in leer_filas(texto, formato):
+        valores, error = validar_fila(fila, destinos_validos)
+        if error:
+            resumen['con_error'] += 1
+            if len(resumen['errores']) < max_errores:
+                resumen['errores'].append((numero, error))
+            continue
+        valores['proveedor_id'] = proveedor_id
+        valores['fecha_creacion'] = datetime.utcnow()
+        lote.append(valores)
+        if len(lote) >= tamano_lote:
+            _insertar(lote)
+            resumen['importados'] += len(lote)
+            lote = []
+            if al_avanzar:
+                al_avanzar(resumen['importados'])
+    if lote:
+        _insertar(lote)
+        resumen['importados'] += len(lote)
+        if al_avanzar:
+            al_avanzar(resumen['importados'])
+    return resumen
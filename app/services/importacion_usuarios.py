@@ -0,0 +1,175 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import bcrypt
+from flask import current_app
+from app.extensions import db
+from app.models import Rol, Usuario
+from app.utils import insert_dialecto
+from .importacion import leer_filas, texto_de_campo
+
+# Alta masiva de usuarios desde CSV o NDJSON (ver services/importacion para el formato).
+# Lo caro es bcrypt (~250 ms por contraseña con el costo por defecto), así que cada lote
+# de IMPORTACION_USUARIOS_LOTE filas se hashea repartido en un ProcessPoolExecutor con
+# un proceso por núcleo, y se inserta con un único INSERT ... ON CONFLICT DO NOTHING.
+# Los procesos se arrancan con 'spawn' y no con fork: la importación también corre
+# dentro de una petición web, y un fork copiaría el worker con sus hilos, conexiones
+# y locks tomados.
+# Antes de hashear se descartan las filas cuyo email o DNI ya existen (en la base o
+# más arriba en el archivo); si otra carga en paralelo gana la carrera, la fila que no
+# vuelve en el RETURNING se informa como duplicada.
+
+CAMPOS_OBLIGATORIOS_USUARIO = ('nombre', 'apellido', 'email', 'contrasena')
+
+def _hashear_lote(contrasenas, rondas, prefijo, largas):
+    """Lo que hace Bcrypt.generate_password_hash, para correr en otro proceso."""
+    hashes = []
+    for contrasena in contrasenas:
+        crudo = contrasena.encode('utf-8')
+        if largas:
+            crudo = hashlib.sha256(crudo).hexdigest().encode('utf-8')
+        hashes.append(bcrypt.hashpw(crudo, bcrypt.gensalt(rounds=rondas, prefix=prefijo)).decode('utf-8'))
+    return hashes
+
+def hashear_contrasenas(contrasenas, pool, procesos):
+    """
+    Hashes bcrypt de las contraseñas, en orden, repartidos en el pool de 'procesos'
+    procesos. Usa la configuración de Flask-Bcrypt (BCRYPT_LOG_ROUNDS, BCRYPT_HASH_PREFIX,
+    BCRYPT_HANDLE_LONG_PASSWORDS), así el login los verifica igual que a los del formulario.
+    """
+    if not contrasenas:
+        return []
+    hashear = partial(
+        _hashear_lote,
+        rondas=current_app.config.get('BCRYPT_LOG_ROUNDS', 12),
+        prefijo=current_app.config.get('BCRYPT_HASH_PREFIX', '2b').encode('utf-8'),
+        largas=current_app.config.get('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+    )
+    # Unos pocos trozos por proceso: se reparte parejo con pocas idas y vueltas entre procesos
+    tamano = -(-len(contrasenas) // (procesos * 4))
+    partes = [contrasenas[i:i + tamano] for i in range(0, len(contrasenas), tamano)]
+    return [h for hashes in pool.map(hashear, partes) for h in hashes]
+
+def validar_usuario(fila, roles_validos, rol_por_defecto, largas=False):
+    """
+    Convierte una fila leída en los valores de un Usuario (con la contraseña aún sin
+    hashear). Devuelve (valores, None) o (None, mensaje de error).
+    """
+    if not isinstance(fila, dict):
+        return None, fila
+    faltantes = [campo for campo in CAMPOS_OBLIGATORIOS_USUARIO if not texto_de_campo(fila, campo)]
+    if faltantes:
+        return None, f'Faltan campos obligatorios: {", ".join(faltantes)}.'
+
+    nombre, apellido = texto_de_campo(fila, 'nombre'), texto_de_campo(fila, 'apellido')
+    email, dni = texto_de_campo(fila, 'email'), texto_de_campo(fila, 'dni') or None
+    if len(nombre) > 100 or len(apellido) > 100 or len(email) > 120 or (dni and len(dni) > 20):
+        return None, 'Nombre y apellido admiten hasta 100 caracteres, el email 120 y el DNI 20.'
+    if '@' not in email:
+        return None, f'El email "{email}" no es válido.'
+    # La contraseña no se recorta: los espacios son parte de ella
+    contrasena = str(fila['contrasena'])
+    if not largas and len(contrasena.encode('utf-8')) > 72:
+        return None, 'La contraseña admite hasta 72 bytes.'
+
+    rol = texto_de_campo(fila, 'rol_id')
+    try:
+        rol_id = int(rol) if rol else rol_por_defecto
+    except ValueError:
+        return None, 'rol_id debe ser numérico.'
+    if rol_id not in roles_validos:
+        return None, f'El rol {rol_id} no existe.'
+
+    return {
+        'nombre': nombre,
+        'apellido': apellido,
+        'email': email,
+        'dni': dni,
+        'contrasena': contrasena,
+        'status': 'Activo',
+        'rol_id': rol_id
+    }, None
+
+def _existentes(columna, valores):
+    valores = [v for v in valores if v]
+    if not valores:
+        return set()
+    return set(db.session.scalars(db.select(columna).where(columna.in_(valores))))
+
+def _guardar_lote(lote, pool, procesos):
+    """Inserta [(línea, valores)] y devuelve [(línea, error)] de las filas que no se guardaron."""
+    errores = []
+    emails = _existentes(Usuario.email, [valores['email'] for _, valores in lote])
+    dnis = _existentes(Usuario.dni, [valores['dni'] for _, valores in lote])
+    nuevos = []
+    for numero, valores in lote:
+        if valores['email'] in emails:
+            errores.append((numero, f'El email {valores["email"]} ya está registrado.'))
+        elif valores['dni'] in dnis:
+            errores.append((numero, f'El DNI {valores["dni"]} ya está registrado.'))
+        else:
+            # Los siguientes del mismo lote con ese email o DNI son duplicados de este
+            emails.add(valores['email'])
+            if valores['dni']:
+                dnis.add(valores['dni'])
+            nuevos.append((numero, valores))
+    if not nuevos:
+        return errores
+
+    hashes = hashear_contrasenas([valores['contrasena'] for _, valores in nuevos], pool, procesos)
+    filas = [dict(valores, contrasena=h) for (_, valores), h in zip(nuevos, hashes)]
+    guardados = set(db.session.scalars(
+        insert_dialecto(Usuario).on_conflict_do_nothing().returning(Usuario.email), filas
+    ))
+    db.session.commit()
+    errores.extend(
+        (numero, f'El email {valores["email"]} o el DNI ya se registraron en otra carga.')
+        for numero, valores in nuevos if valores['email'] not in guardados
+    )
+    return errores
+
+def importar_usuarios(texto, formato, rol_por_defecto, tamano_lote=None, procesos=None, al_avanzar=None):
+    """
+    Importa los usuarios del flujo; cada lote es una transacción. 'al_avanzar(leidas,
+    importados)' se llama después de cada lote. Devuelve {'importados', 'con_error',
+    'errores': [(línea, mensaje)]}, con hasta IMPORTACION_MAX_ERRORES mensajes.
+    """
+    tamano_lote = tamano_lote or current_app.config.get('IMPORTACION_USUARIOS_LOTE', 500)
+    procesos = procesos or current_app.config.get('IMPORTACION_USUARIOS_PROCESOS') or os.cpu_count()
+    max_errores = current_app.config.get('IMPORTACION_MAX_ERRORES', 500)
+    largas = current_app.config.get('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+    roles_validos = set(db.session.scalars(db.select(Rol.rol_id)))
+
+    resumen = {'importados': 0, 'con_error': 0, 'errores': []}
+    leidas = 0
+
+    def anotar(errores):
+        resumen['con_error'] += len(errores)
+        resumen['errores'].extend(errores[:max(max_errores - len(resumen['errores']), 0)])
+
+    def procesar(lote):
+        errores = _guardar_lote(lote, pool, procesos)
+        resumen['importados'] += len(lote) - len(errores)
+        anotar(errores)
+        if al_avanzar:
+            al_avanzar(leidas, resumen['importados'])
+
+    # Un solo pool para toda la importación: arrancar procesos en cada lote cuesta más que hashear
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn')) as pool:
+        lote = []
+        for numero, fila in leer_filas(texto, formato):
+            leidas += 1
+            valores, error = validar_usuario(fila, roles_validos, rol_por_defecto, largas)
+            if error:
+                anotar([(numero, error)])
+                continue
+            lote.append((numero, valores))
+            if len(lote) >= tamano_lote:
+                procesar(lote)
+                lote = []
+        if lote:
+            procesar(lote)
+    resumen['errores'].sort()
+    return resumen
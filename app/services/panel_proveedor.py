@@ -0,0 +1,101 @@
+from datetime import date
+from flask import current_app
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import contains_eager, joinedload
+from app.extensions import db
+from app.models import Destino, Reserva, Servicio
+from .cache import CacheLRU
+from .paginacion import filtro_keyset, paginar_keyset
+
+# Consultas del panel de proveedor. Los servicios y las reservas pendientes se
+# paginan por cursor (keyset), así el costo de cada página depende de su tamaño y
+# no de cuántos servicios tenga el proveedor. Las métricas por servicio (reservas
+# por estado, ingresos, próxima fecha) se agregan en SQL, en una sola consulta
+# agrupada sobre los servicios de la página. Los totales de todo el proveedor recorren
+# todas sus reservas, así que se guardan unos segundos (PANEL_TOTALES_TTL) y se
+# descartan cuando el propio proveedor cambia sus servicios o reservas.
+
+def _contar(estado):
+    return func.count(case((Reserva.estado == estado, 1)))
+
+def resumen_servicios(proveedor_id, cursor, tamano):
+    """
+    Una página de servicios del proveedor (por nombre) con sus métricas.
+    Devuelve (filas, cursor_siguiente).
+    """
+    claves = (Servicio.nombre, Servicio.servicio_id)
+    pagina = db.select(Servicio).where(Servicio.proveedor_id == proveedor_id)
+    if cursor:
+        pagina = pagina.where(filtro_keyset(claves, cursor, descendente=False))
+    pagina = pagina.order_by(*claves).limit(tamano + 1).subquery('pagina')
+
+    hoy = date.today()
+    filas = db.session.execute(
+        db.select(
+            pagina,
+            Destino.nombre.label('destino'),
+            _contar('Pendiente').label('pendientes'),
+            _contar('Aceptada').label('aceptadas'),
+            _contar('Rechazada').label('rechazadas'),
+            func.coalesce(func.sum(case((Reserva.estado == 'Aceptada', Reserva.costo_total))), 0).label('ingresos'),
+            func.min(case((and_(Reserva.estado == 'Aceptada', Reserva.fecha_servicio_inicio >= hoy),
+                           Reserva.fecha_servicio_inicio))).label('proxima_reserva')
+        )
+        .select_from(pagina)
+        .outerjoin(Destino, Destino.destino_id == pagina.c.destino_id)
+        .outerjoin(Reserva, Reserva.servicio_id == pagina.c.servicio_id)
+        .group_by(*pagina.c, Destino.nombre)
+        .order_by(pagina.c.nombre, pagina.c.servicio_id)
+    ).all()
+    return paginar_keyset(filas, tamano, clave=lambda f: (f.nombre, f.servicio_id))
+
+def _cache_totales():
+    cache = current_app.extensions.get('totales_proveedor')
+    if cache is None:
+        cache = CacheLRU(max_entradas=500, ttl=current_app.config.get('PANEL_TOTALES_TTL', 30))
+        current_app.extensions['totales_proveedor'] = cache
+    return cache
+
+def invalidar_totales(proveedor_id):
+    """Descarta los totales cacheados del proveedor (después del commit que los cambia)."""
+    _cache_totales().borrar(proveedor_id)
+
+def totales_proveedor(proveedor_id):
+    """Servicios, reservas pendientes y aceptadas, e ingresos de todo el proveedor (cacheados)."""
+    cache = _cache_totales()
+    totales = cache.obtener(proveedor_id)
+    if totales is None:
+        totales = _calcular_totales(proveedor_id)
+        cache.guardar(proveedor_id, totales)
+    return totales
+
+def _calcular_totales(proveedor_id):
+    return db.session.execute(
+        db.select(
+            func.count(func.distinct(Servicio.servicio_id)).label('servicios'),
+            _contar('Pendiente').label('pendientes'),
+            _contar('Aceptada').label('aceptadas'),
+            func.coalesce(func.sum(case((Reserva.estado == 'Aceptada', Reserva.costo_total))), 0).label('ingresos')
+        )
+        .select_from(Servicio)
+        .outerjoin(Reserva, Reserva.servicio_id == Servicio.servicio_id)
+        .where(Servicio.proveedor_id == proveedor_id)
+    ).one()
+
+def reservas_pendientes(proveedor_id, cursor, tamano):
+    """
+    Página de reservas pendientes de los servicios del proveedor, de la fecha de
+    servicio más cercana a la más lejana. Devuelve (reservas, cursor_siguiente).
+    """
+    claves = (Reserva.fecha_servicio_inicio, Reserva.reserva_id)
+    consulta = (
+        db.select(Reserva)
+        .join(Reserva.servicio_reservado)
+        .where(Servicio.proveedor_id == proveedor_id, Reserva.estado == 'Pendiente')
+        .options(contains_eager(Reserva.servicio_reservado).joinedload(Servicio.destino),
+                 joinedload(Reserva.turista))
+    )
+    if cursor:
+        consulta = consulta.where(filtro_keyset(claves, cursor, descendente=False))
+    reservas = db.session.scalars(consulta.order_by(*claves).limit(tamano + 1)).all()
+    return paginar_keyset(reservas, tamano, clave=lambda r: (r.fecha_servicio_inicio, r.reserva_id))
@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+import numpy as np
+from flask import current_app
+from app.extensions import catalogo
+from app.utils import es_unidad_por_dia, calcular_precio_total
+from .cache import CacheLRU
+
+# Motor de reglas de precio (ver models/regla_precio).
+# Las reglas de cada servicio se compilan en dos tablas:
+#   - un multiplicador por día calendario, desde unos días atrás hasta HORIZONTE_DIAS
+#     adelante, guardado como suma acumulada: el total de un rango de N días es una resta;
+#   - los tramos de grupo (personas mínimas -> multiplicador), resueltos con searchsorted.
+# Sin reglas el resultado es el de calcular_precio_total.
+
+HORIZONTE_DIAS = 2 * 366
+DIAS_HACIA_ATRAS = 31
+
+# Tarifas compiladas por (versión del catálogo, servicio, día de origen): cualquier cambio
+# de reglas sube la versión y la tabla se vuelve a compilar en el próximo uso.
+_tarifas = CacheLRU(max_entradas=2000)
+
+def multiplicadores_diarios(reglas, desde, cantidad):
+    """Multiplicador de cada día en [desde, desde + cantidad) según temporadas y fines de semana."""
+    dias = np.datetime64(desde, 'D') + np.arange(max(cantidad, 0))
+    resultado = np.ones(len(dias))
+    # 1970-01-01 fue jueves: con +3, 0 es lunes y 5-6 son sábado y domingo
+    dia_semana = (dias.astype(np.int64) + 3) % 7
+    for regla in reglas:
+        if regla.tipo == 'fin_de_semana':
+            resultado[dia_semana >= 5] *= regla.multiplicador
+        elif regla.tipo == 'temporada':
+            en_rango = (dias >= np.datetime64(regla.fecha_desde, 'D')) & (dias <= np.datetime64(regla.fecha_hasta, 'D'))
+            resultado[en_rango] *= regla.multiplicador
+    return resultado
+
+
+def _fines_de_semana_antes(dia):
+    """Sábados y domingos anteriores a 'dia' (días desde 1970-01-01), contados desde un lunes fijo."""
+    semana = dia + 3
+    return (semana // 7) * 2 + max(semana % 7 - 5, 0)
+
+def suma_multiplicadores_rango(reglas, inicio, fin):
+    """
+    Suma de multiplicadores_diarios entre inicio y fin (inclusive) sin recorrer los días.
+    Entre dos bordes de temporada el multiplicador solo cambia los fines de semana, así que
+    cada tramo se resuelve contando sus sábados y domingos: el costo depende de las reglas,
+    no del largo del rango.
+    """
+    desde = int(np.datetime64(inicio, 'D').astype(np.int64))
+    hasta = int(np.datetime64(fin, 'D').astype(np.int64)) + 1
+    if hasta <= desde:
+        return 0.0
+    fin_de_semana = 1.0
+    temporadas = []
+    for regla in reglas:
+        if regla.tipo == 'fin_de_semana':
+            fin_de_semana *= regla.multiplicador
+        elif regla.tipo == 'temporada' and regla.fecha_desde and regla.fecha_hasta:
+            temporadas.append((int(np.datetime64(regla.fecha_desde, 'D').astype(np.int64)),
+                               int(np.datetime64(regla.fecha_hasta, 'D').astype(np.int64)) + 1,
+                               regla.multiplicador))
+
+    bordes = {desde, hasta}
+    for t_desde, t_hasta, _ in temporadas:
+        bordes.update(b for b in (t_desde, t_hasta) if desde < b < hasta)
+    bordes = sorted(bordes)
+
+    suma = 0.0
+    for a, b in zip(bordes, bordes[1:]):
+        factor = 1.0
+        for t_desde, t_hasta, multiplicador in temporadas:
+            if t_desde <= a < t_hasta:
+                factor *= multiplicador
+        findes = _fines_de_semana_antes(b) - _fines_de_semana_antes(a)
+        suma += factor * ((b - a) + (fin_de_semana - 1.0) * findes)
+    return suma
+
+
+class TarifaCompilada:
+    """Reglas de un servicio listas para cotizar rangos de fechas sin recorrerlas día por día."""
+    __slots__ = ('precio_base', 'por_dia', 'reglas', 'origen', 'acumulado',
+                 'tramos_personas', 'factores_grupo')
+
+    def __init__(self, precio_base, unidad, reglas, origen, horizonte=HORIZONTE_DIAS):
+        self.precio_base = precio_base
+        self.por_dia = es_unidad_por_dia(unidad)
+        self.reglas = tuple(reglas)
+        self.origen = np.datetime64(origen, 'D')
+        self.acumulado = np.concatenate(([0.0], np.cumsum(multiplicadores_diarios(self.reglas, origen, horizonte))))
+
+        grupos = sorted((r.personas_min, r.multiplicador) for r in self.reglas if r.tipo == 'grupo')
+        self.tramos_personas = np.array([0] + [g[0] for g in grupos], dtype=np.int64)
+        self.factores_grupo = np.array([1.0] + [g[1] for g in grupos])
+
+    def factor_grupo(self, personas):
+        """Multiplicador del tramo de grupo más alto alcanzado (1.0 si ninguno)."""
+        tramo = np.searchsorted(self.tramos_personas, personas, side='right') - 1
+        return self.factores_grupo[tramo]
+
+    def suma_multiplicadores(self, inicios, fines):
+        """Suma de los multiplicadores diarios entre cada inicio y fin (inclusive)."""
+        i = (inicios - self.origen).astype(np.int64)
+        j = (fines - self.origen).astype(np.int64) + 1
+        suma = np.empty(len(i))
+        dentro = (i >= 0) & (j <= len(self.acumulado) - 1)
+        suma[dentro] = self.acumulado[j[dentro]] - self.acumulado[i[dentro]]
+        # Fechas fuera de la tabla compilada: suma cerrada por tramos de temporada
+        for k in np.flatnonzero(~dentro):
+            suma[k] = suma_multiplicadores_rango(self.reglas, inicios[k], fines[k])
+        return suma
+
+    def cotizar(self, fechas_inicio, fechas_fin, personas):
+        """
+        Totales para arrays de (fecha_inicio, fecha_fin, personas). Las unidades por día
+        suman los multiplicadores de cada día; el resto toma el del día de inicio.
+        """
+        inicios = np.asarray(fechas_inicio, dtype='datetime64[D]')
+        fines = np.asarray(fechas_fin, dtype='datetime64[D]') if self.por_dia else inicios
+        personas = np.asarray(personas, dtype=np.int64)
+        return (self.precio_base * personas * self.factor_grupo(personas)
+                * self.suma_multiplicadores(inicios, fines))
+
+
+def tarifa_servicio(servicio_id):
+    """Tarifa compilada del servicio según el catálogo vigente, o None si no está en él."""
+    instantanea = catalogo.actual()
+    servicio = instantanea.servicios_por_id.get(servicio_id)
+    if servicio is None:
+        return None
+    origen = date.today() - timedelta(days=DIAS_HACIA_ATRAS)
+    clave = (instantanea.version, servicio_id, origen)
+    tarifa = _tarifas.obtener(clave)
+    if tarifa is None:
+        tarifa = TarifaCompilada(servicio.precio_base, servicio.unidad, servicio.reglas, origen)
+        _tarifas.guardar(clave, tarifa)
+    return tarifa
+
+def cotizar_servicio(servicio, personas, fecha_inicio, fecha_fin):
+    """
+    Precio total de un servicio aplicando sus reglas; reemplaza a calcular_precio_total en el cotizador.
+    ValueError si el rango supera COTIZACION_MAX_DIAS.
+    """
+    max_dias = current_app.config.get('COTIZACION_MAX_DIAS', 366)
+    if (fecha_fin - fecha_inicio).days + 1 > max_dias:
+        raise ValueError(f'Se puede cotizar hasta {max_dias} días por pedido.')
+    tarifa = tarifa_servicio(servicio.servicio_id)
+    if tarifa is None:
+        # Recién creado en otro worker y todavía fuera de la instantánea: sin reglas
+        return calcular_precio_total(servicio, personas, (fecha_fin - fecha_inicio).days + 1)
+    return float(tarifa.cotizar([fecha_inicio], [fecha_fin], [personas])[0])
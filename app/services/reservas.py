@@ -0,0 +1,94 @@
+from sqlalchemy import tuple_
+from app.extensions import db
+from app.models import Reserva, Servicio
+from .disponibilidad import ESTADO_QUE_OCUPA, RangoDemasiadoLargo, SinCapacidad, ocupar, liberar
+from .resumenes import registrar_transiciones
+
+# Máquina de estados de Reserva. Cada transición es un único UPDATE condicional
+# (estado de origen, versión leída por el cliente y servicio del proveedor) que
+# incrementa 'version' y devuelve las filas cambiadas con RETURNING: si dos pestañas
+# actúan sobre la misma reserva, solo una sentencia encuentra la fila y la otra
+# recibe el motivo. No hay SELECT previo; solo se consulta para explicar un rechazo.
+
+ACCIONES = {
+    'aceptar': ('Pendiente', 'Aceptada'),
+    'rechazar': ('Pendiente', 'Rechazada'),
+}
+
+def _motivos(reserva_ids, proveedor_id, estado_origen):
+    """Por qué no se pudo cambiar cada reserva: {reserva_id: mensaje}."""
+    encontradas = {
+        fila.reserva_id: fila
+        for fila in db.session.execute(
+            db.select(Reserva.reserva_id, Reserva.estado, Servicio.proveedor_id)
+            .join(Servicio, Servicio.servicio_id == Reserva.servicio_id)
+            .where(Reserva.reserva_id.in_(reserva_ids))
+        )
+    }
+    motivos = {}
+    for reserva_id in reserva_ids:
+        fila = encontradas.get(reserva_id)
+        if fila is None:
+            motivos[reserva_id] = 'La reserva no existe.'
+        elif fila.proveedor_id != proveedor_id:
+            motivos[reserva_id] = 'La reserva no corresponde a tus servicios.'
+        elif fila.estado != estado_origen:
+            motivos[reserva_id] = f'La reserva ya tiene el estado "{fila.estado}".'
+        else:
+            motivos[reserva_id] = 'La reserva fue modificada en otra sesión. Recarga el panel e inténtalo de nuevo.'
+    return motivos
+
+def transicionar(accion, reservas, proveedor_id):
+    """
+    Aplica 'aceptar' o 'rechazar' a las reservas [(reserva_id, version)] del proveedor,
+    dentro de la transacción en curso (el commit queda a cargo del llamador). La versión
+    es obligatoria: es la que vio el cliente, así no se cambia una reserva que no mostró.
+    Devuelve (ids cambiados, {reserva_id: motivo} de las que no se pudieron cambiar).
+    """
+    estado_origen, estado_nuevo = ACCIONES[accion]
+    reservas = list(dict(reservas).items())  # un pedido por reserva
+    if not reservas:
+        return [], {}
+
+    cambiadas = db.session.execute(
+        db.update(Reserva)
+        .where(tuple_(Reserva.reserva_id, Reserva.version).in_(reservas),
+               Reserva.estado == estado_origen,
+               Reserva.servicio_id.in_(
+                   db.select(Servicio.servicio_id).where(Servicio.proveedor_id == proveedor_id)
+               ))
+        .values(estado=estado_nuevo, version=Reserva.version + 1)
+        .returning(Reserva.reserva_id, Reserva.servicio_id, Reserva.fecha_servicio_inicio,
+                   Reserva.fecha_servicio_fin, Reserva.cantidad_personas,
+                   Reserva.fecha_reserva, Reserva.costo_total)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    hechas = []
+    fallidas = {}
+    for fila in cambiadas:
+        try:
+            # Un savepoint por reserva: si una no entra, las demás del lote siguen
+            with db.session.begin_nested():
+                if estado_nuevo == ESTADO_QUE_OCUPA:
+                    ocupar(fila.servicio_id, fila.fecha_servicio_inicio, fila.fecha_servicio_fin, fila.cantidad_personas)
+                elif estado_origen == ESTADO_QUE_OCUPA:
+                    liberar(fila.servicio_id, fila.fecha_servicio_inicio, fila.fecha_servicio_fin, fila.cantidad_personas)
+        except (SinCapacidad, RangoDemasiadoLargo) as e:
+            # Vuelve al estado de origen; la versión sigue subiendo para no reutilizar una vieja
+            db.session.execute(
+                db.update(Reserva)
+                .where(Reserva.reserva_id == fila.reserva_id)
+                .values(estado=estado_origen, version=Reserva.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            fallidas[fila.reserva_id] = str(e)
+            continue
+        hechas.append(fila.reserva_id)
+    registrar_transiciones(estado_nuevo, [fila for fila in cambiadas if fila.reserva_id in hechas])
+
+    ids_cambiados = {fila.reserva_id for fila in cambiadas}
+    sin_cambio = [reserva_id for reserva_id, _ in reservas if reserva_id not in ids_cambiados]
+    if sin_cambio:
+        fallidas.update(_motivos(sin_cambio, proveedor_id, estado_origen))
+    return hechas, fallidas
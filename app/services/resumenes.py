@@ -0,0 +1,165 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from sqlalchemy import case, extract, func, text, union_all
+from app.extensions import db
+from app.models import (Cotizacion, CotizacionArchivo, Destino, Reserva, ReservaArchivo,
+                        ResumenMensual, Servicio, Usuario)
+from app.utils import insert_dialecto
+
+# Resúmenes mensuales para los reportes de administración (conversión de cotizaciones
+# en reservas, ingresos por destino y mes, tasa de aceptación por proveedor).
+# En vez de agrupar Cotizacion/Reserva en cada consulta, cada evento suma sus deltas
+# a la fila (destino, proveedor, mes) con un INSERT ... ON CONFLICT DO UPDATE dentro
+# de la misma transacción que lo produce: si el evento se deshace, el resumen también.
+# Las cotizaciones cuentan en el mes de su fecha_creacion (volver a pedirlas renueva
+# fecha_solicitud, no esta); las reservas, su aceptación, rechazo e ingresos, en el mes
+# de su fecha_reserva. Los eventos usan esas mismas columnas, así 'flask recalcular_resumenes',
+# que rearma la tabla desde las tablas vigentes y el archivo, llega a los mismos números.
+
+CONTADORES = ('cotizaciones', 'reservas', 'aceptadas', 'rechazadas', 'ingresos')
+
+def primer_dia_del_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+def _sumar(filas):
+    """filas: {(destino_id, proveedor_id, mes): Counter de contadores}. Upsert que suma los deltas."""
+    if not filas:
+        return
+    insert = insert_dialecto(ResumenMensual)
+    sentencia = insert.on_conflict_do_update(
+        index_elements=['destino_id', 'proveedor_id', 'mes'],
+        set_={c: getattr(ResumenMensual, c) + getattr(insert.excluded, c) for c in CONTADORES}
+    )
+    # Siempre en el mismo orden: dos transacciones que tocan las mismas filas no se bloquean en cruz
+    db.session.execute(sentencia, [
+        {'destino_id': destino_id, 'proveedor_id': proveedor_id, 'mes': mes,
+         **{c: valores.get(c, 0) for c in CONTADORES}}
+        for (destino_id, proveedor_id, mes), valores in sorted(filas.items())
+    ])
+
+def registrar(eventos):
+    """
+    Suma eventos [(servicio_id, fecha, {contador: delta})] a los resúmenes, dentro de
+    la transacción en curso (el commit queda a cargo del llamador).
+    """
+    por_servicio = defaultdict(Counter)
+    for servicio_id, fecha, valores in eventos:
+        por_servicio[(servicio_id, primer_dia_del_mes(fecha))].update(valores)
+    if not por_servicio:
+        return
+    servicios = {
+        fila.servicio_id: fila
+        for fila in db.session.execute(
+            db.select(Servicio.servicio_id, Servicio.destino_id, Servicio.proveedor_id)
+            .where(Servicio.servicio_id.in_({servicio_id for servicio_id, _ in por_servicio}))
+        )
+    }
+    filas = defaultdict(Counter)
+    for (servicio_id, mes), valores in por_servicio.items():
+        servicio = servicios.get(servicio_id)
+        if servicio is not None:
+            filas[(servicio.destino_id, servicio.proveedor_id, mes)].update(valores)
+    _sumar(filas)
+
+def registrar_cotizaciones(cotizaciones):
+    """Una cotización nueva por cada (servicio_id, fecha_creacion) de la lista."""
+    registrar((servicio_id, fecha or datetime.utcnow(), {'cotizaciones': 1}) for servicio_id, fecha in cotizaciones)
+
+def registrar_reserva(servicio_id, fecha_reserva):
+    registrar([(servicio_id, fecha_reserva or datetime.utcnow(), {'reservas': 1})])
+
+def registrar_transiciones(estado_nuevo, reservas):
+    """reservas: filas con servicio_id, fecha_reserva y costo_total que pasaron a estado_nuevo."""
+    if estado_nuevo == 'Aceptada':
+        deltas = lambda r: {'aceptadas': 1, 'ingresos': r.costo_total}
+    elif estado_nuevo == 'Rechazada':
+        deltas = lambda r: {'rechazadas': 1}
+    else:
+        return
+    registrar((r.servicio_id, r.fecha_reserva or datetime.utcnow(), deltas(r)) for r in reservas)
+
+def _agrupado(origen, columna_fecha, valores):
+    """(destino, proveedor, año, mes, *valores) agrupado sobre una subconsulta con servicio_id."""
+    fecha = origen.c[columna_fecha]
+    anio, mes = extract('year', fecha).label('anio'), extract('month', fecha).label('mes')
+    return (
+        db.select(Servicio.destino_id, Servicio.proveedor_id, anio, mes, *valores)
+        .join(Servicio, Servicio.servicio_id == origen.c.servicio_id)
+        .where(fecha.isnot(None))
+        .group_by(Servicio.destino_id, Servicio.proveedor_id, anio, mes)
+    )
+
+def recalcular_resumenes():
+    """Borra y rearma todos los resúmenes agrupando en la base. Devuelve cuántas filas quedaron."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # Espera a las transacciones que ya sumaron deltas y frena las nuevas hasta el commit,
+        # así ningún evento queda contado dos veces ni se pierde
+        db.session.execute(text('LOCK TABLE resumen_mensual IN EXCLUSIVE MODE'))
+    db.session.execute(db.delete(ResumenMensual))
+
+    cotizaciones = union_all(
+        db.select(Cotizacion.servicio_id, Cotizacion.fecha_creacion),
+        db.select(CotizacionArchivo.servicio_id, CotizacionArchivo.fecha_creacion)
+    ).subquery()
+    reservas = union_all(*(
+        db.select(modelo.servicio_id, modelo.fecha_reserva, modelo.estado, modelo.costo_total)
+        for modelo in (Reserva, ReservaArchivo)
+    )).subquery()
+    aceptada = reservas.c.estado == 'Aceptada'
+
+    filas = defaultdict(Counter)
+    consultas = (
+        _agrupado(cotizaciones, 'fecha_creacion', [func.count().label('cotizaciones')]),
+        _agrupado(reservas, 'fecha_reserva', [
+            func.count().label('reservas'),
+            func.sum(case((aceptada, 1), else_=0)).label('aceptadas'),
+            func.sum(case((reservas.c.estado == 'Rechazada', 1), else_=0)).label('rechazadas'),
+            func.sum(case((aceptada, reservas.c.costo_total), else_=0)).label('ingresos'),
+        ]),
+    )
+    for consulta in consultas:
+        for fila in db.session.execute(consulta).mappings():
+            clave = (fila['destino_id'], fila['proveedor_id'], date(int(fila['anio']), int(fila['mes']), 1))
+            filas[clave].update({c: fila[c] or 0 for c in CONTADORES if c in fila})
+    _sumar(filas)
+    db.session.commit()
+    return len(filas)
+
+def _tasa(parte, total):
+    return parte / total if total else None
+
+def _periodo(consulta, desde):
+    return consulta.where(ResumenMensual.mes >= desde) if desde else consulta
+
+def _sumas():
+    return [func.sum(getattr(ResumenMensual, c)).label(c) for c in CONTADORES]
+
+def _con_tasas(fila):
+    datos = dict(fila)
+    datos['conversion'] = _tasa(datos['reservas'], datos['cotizaciones'])
+    datos['aceptacion'] = _tasa(datos['aceptadas'], datos['aceptadas'] + datos['rechazadas'])
+    return datos
+
+def reporte_por_destino(desde=None):
+    """Por destino y mes (el más reciente primero), desde el mes 'desde' si se indica."""
+    consulta = (
+        db.select(ResumenMensual.destino_id, Destino.nombre, ResumenMensual.mes, *_sumas())
+        .join(Destino, Destino.destino_id == ResumenMensual.destino_id)
+        .group_by(ResumenMensual.destino_id, Destino.nombre, ResumenMensual.mes)
+        .order_by(ResumenMensual.mes.desc(), Destino.nombre)
+    )
+    return [_con_tasas(fila) for fila in db.session.execute(_periodo(consulta, desde)).mappings()]
+
+def reporte_por_proveedor(desde=None):
+    """Por proveedor en todo el período, los de más ingresos primero."""
+    consulta = (
+        db.select(ResumenMensual.proveedor_id, Usuario.nombre, Usuario.apellido, *_sumas())
+        .join(Usuario, Usuario.usuario_id == ResumenMensual.proveedor_id)
+        .group_by(ResumenMensual.proveedor_id, Usuario.nombre, Usuario.apellido)
+        .order_by(func.sum(ResumenMensual.ingresos).desc())
+    )
+    return [_con_tasas(fila) for fila in db.session.execute(_periodo(consulta, desde)).mappings()]
+
+def reporte_totales(desde=None):
+    fila = db.session.execute(_periodo(db.select(*_sumas()), desde)).mappings().one()
+    return _con_tasas({c: fila[c] or 0 for c in CONTADORES})
@@ -1,4 +1,5 @@
-from .extensions import db, bcrypt
+from .extensions import db, bcrypt, catalogo
+import click
 from functools import wraps
 from flask import abort, current_app, flash
 from sqlalchemy import text
@@ -77,10 +78,27 @@ def posteo_permisos_required(func):
         return func(*args, **kwargs)
     return decorated_function
 
+def insert_dialecto(tabla):
+    """
+    insert() del motor en uso (PostgreSQL o SQLite): ambos admiten
+    on_conflict_do_update / on_conflict_do_nothing con RETURNING.
+    """
+    motor = db.session.get_bind().dialect.name
+    if motor == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif motor == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f'INSERT ... ON CONFLICT no soportado para el motor {motor}.')
+    return insert(tabla)
+
+def es_unidad_por_dia(unidad: str) -> bool:
+    return (unidad or '').lower() in ['día', 'dias']
+
 def calcular_precio_total(servicio, personas: int, dias: int = 1) -> float:
     total = servicio.precio_base * personas
 
-    if servicio.unidad.lower() in ['día', 'dias']:
+    if es_unidad_por_dia(servicio.unidad):
         total = total * dias
         
     return total
@@ -88,6 +106,7 @@ def calcular_precio_total(servicio, personas: int, dias: int = 1) -> float:
 # comandos CLI para crear y sembrar la base de datos
 def register_cli_commands(app):
     from .models import Rol, Usuario, Destino, Servicio, Cotizacion
+    from .services.hilos import recalcular_contadores
     
     #Crea la base de datos y las tablas
     @app.cli.command("crear_db")
@@ -97,6 +116,137 @@ def register_cli_commands(app):
             db.create_all()
             print("¡Base de datos y tablas creadas!")
 
+    # Recalcula los contadores desnormalizados del foro (respuestas, descendientes, actividad)
+    @app.cli.command("recalcular_contadores_foro")
+    def recalcular_contadores_foro():
+        with app.app_context():
+            try:
+                cantidad = recalcular_contadores()
+                print(f"¡Contadores recalculados para {cantidad} posteos!")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al recalcular los contadores: {e}")
+
+    # Borra las claves de idempotencia vencidas (IDEMPOTENCIA_TTL_HORAS)
+    @app.cli.command("purgar_claves_idempotencia")
+    def purgar_claves_idempotencia():
+        from .services.idempotencia import purgar_claves_vencidas
+        with app.app_context():
+            try:
+                cantidad = purgar_claves_vencidas()
+                print(f"¡{cantidad} claves de idempotencia vencidas eliminadas!")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al purgar las claves de idempotencia: {e}")
+
+    # Mueve cotizaciones vencidas y reservas viejas a las tablas de archivo (para cron)
+    @app.cli.command("archivar_historial")
+    @click.option('--lote', type=int, default=None, help='Filas por transacción (por defecto ARCHIVO_LOTE).')
+    def archivar_historial(lote):
+        from .services.archivo import archivar_historial as archivar
+        with app.app_context():
+            try:
+                totales = archivar(lote, al_avanzar=lambda nombre, total: print(f"  {nombre}: {total} archivadas..."))
+                print(f"¡Archivo completo! Reservas: {totales['reservas']}, cotizaciones: {totales['cotizaciones']}, "
+                      f"días de ocupación borrados: {totales['ocupacion']}.")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al archivar el historial: {e}")
+
+    # Importa servicios de un proveedor desde un archivo CSV o NDJSON grande
+    @app.cli.command("importar_servicios")
+    @click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--proveedor-id', type=int, required=True, help='Usuario proveedor dueño de los servicios.')
+    @click.option('--formato', type=click.Choice(['csv', 'ndjson']), default=None, help='Por defecto, según la extensión.')
+    @click.option('--lote', type=int, default=None, help='Filas por transacción (por defecto IMPORTACION_LOTE).')
+    def importar_servicios(archivo, proveedor_id, formato, lote):
+        from .services.importacion import formato_de_archivo, importar_servicios as importar
+        formato = formato or formato_de_archivo(archivo)
+        if formato is None:
+            print("Formato no reconocido: usa --formato csv o --formato ndjson.")
+            return
+        with app.app_context():
+            proveedor = db.session.get(Usuario, proveedor_id)
+            if proveedor is None or proveedor.rol_id != app.config.get('ROL_PROVEEDOR_ID', 4):
+                print(f"El usuario {proveedor_id} no existe o no es proveedor.")
+                return
+            try:
+                with open(archivo, encoding='utf-8-sig', newline='') as texto:
+                    resumen = importar(texto, formato, proveedor_id, lote,
+                                       al_avanzar=lambda total: print(f"  {total} servicios importados..."))
+                for linea, mensaje in resumen['errores']:
+                    print(f"  Línea {linea}: {mensaje}")
+                print(f"¡Importación terminada! {resumen['importados']} servicios importados, "
+                      f"{resumen['con_error']} filas con errores.")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al importar los servicios: {e}")
+
+    # Da de alta usuarios desde un archivo CSV o NDJSON grande (contraseñas hasheadas en paralelo)
+    @app.cli.command("importar_usuarios")
+    @click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--rol-id', type=int, default=None, help='Rol de las filas sin rol_id (por defecto Turista).')
+    @click.option('--formato', type=click.Choice(['csv', 'ndjson']), default=None, help='Por defecto, según la extensión.')
+    @click.option('--lote', type=int, default=None, help='Filas por transacción (por defecto IMPORTACION_USUARIOS_LOTE).')
+    @click.option('--procesos', type=int, default=None, help='Procesos que hashean (por defecto uno por núcleo).')
+    def importar_usuarios(archivo, rol_id, formato, lote, procesos):
+        from .services.importacion import formato_de_archivo
+        from .services.importacion_usuarios import importar_usuarios as importar
+        formato = formato or formato_de_archivo(archivo)
+        if formato is None:
+            print("Formato no reconocido: usa --formato csv o --formato ndjson.")
+            return
+        with app.app_context():
+            try:
+                with open(archivo, encoding='utf-8-sig', newline='') as texto:
+                    resumen = importar(texto, formato, rol_id or app.config.get('ROL_TURISTA_ID', 5), lote, procesos,
+                                       al_avanzar=lambda leidas, total: print(f"  {leidas} filas leídas, {total} usuarios creados..."))
+                for linea, mensaje in resumen['errores']:
+                    print(f"  Línea {linea}: {mensaje}")
+                print(f"¡Importación terminada! {resumen['importados']} usuarios creados, "
+                      f"{resumen['con_error']} filas con errores.")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al importar los usuarios: {e}")
+
+    # Rearma los resúmenes mensuales de los reportes desde cero (después de migrar o si se desfasan)
+    @app.cli.command("recalcular_resumenes")
+    def recalcular_resumenes():
+        from .services.resumenes import recalcular_resumenes as recalcular
+        with app.app_context():
+            try:
+                cantidad = recalcular()
+                print(f"¡Resúmenes recalculados! {cantidad} filas (destino, proveedor, mes).")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al recalcular los resúmenes: {e}")
+
+    # Exporta reservas o cotizaciones en streaming a un archivo (o a la salida estándar)
+    @app.cli.command("exportar")
+    @click.argument('tabla', type=click.Choice(['reservas', 'cotizaciones']))
+    @click.option('--formato', type=click.Choice(['csv', 'ndjson']), default='csv')
+    @click.option('--columnas', default=None, help='Columnas separadas por coma (por defecto todas).')
+    @click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Fecha inicial (AAAA-MM-DD).')
+    @click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Fecha final, inclusive.')
+    @click.option('--historial', is_flag=True, help='Incluye también las filas archivadas.')
+    @click.option('--salida', type=click.File('w', encoding='utf-8'), default='-', help='Archivo destino (por defecto stdout).')
+    @click.option('--lote', type=int, default=None, help='Filas por lectura (por defecto EXPORTACION_LOTE).')
+    def exportar_datos(tabla, formato, columnas, desde, hasta, historial, salida, lote):
+        from .services.exportacion import elegir_columnas, exportar
+        try:
+            columnas = elegir_columnas(tabla, columnas)
+        except ValueError as e:
+            print(e)
+            return
+        with app.app_context():
+            try:
+                for trozo in exportar(tabla, formato, columnas, desde and desde.date(), hasta and hasta.date(),
+                                      historial, lote):
+                    salida.write(trozo)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al exportar {tabla}: {e}")
+
     # Inserta datos de prueba en la base de datos
     @app.cli.command("sembrar_db")
     def sembrar_db():
@@ -157,6 +307,7 @@ def register_cli_commands(app):
                                     user_turista, 
                                     destino_carbon, 
                                     destino_overlook]) 
+                catalogo.invalidar()
                 db.session.commit()
 
                 # Reseteo de secuencias en la base de datos
@@ -0,0 +1,26 @@
+"""Versión de reserva para bloqueo optimista
+
+Revision ID: 0c1b80f84fdd
+Revises: e5d2a1f9c347
+Create Date: 2026-10-18 19:05:31.240887
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c1b80f84fdd'
+down_revision = 'e5d2a1f9c347'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reserva', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('reserva', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,40 @@
+"""Reglas de precio por servicio
+
+Revision ID: 1050921bd432
+Revises: 4732fd186546
+Create Date: 2026-10-18 15:52:07.418930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1050921bd432'
+down_revision = '4732fd186546'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('regla_precio',
+    sa.Column('regla_id', sa.Integer(), nullable=False),
+    sa.Column('servicio_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('multiplicador', sa.Float(), nullable=False),
+    sa.Column('fecha_desde', sa.Date(), nullable=True),
+    sa.Column('fecha_hasta', sa.Date(), nullable=True),
+    sa.Column('personas_min', sa.Integer(), nullable=True),
+    sa.Column('descripcion', sa.String(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['servicio_id'], ['servicio.servicio_id'], ),
+    sa.PrimaryKeyConstraint('regla_id')
+    )
+    with op.batch_alter_table('regla_precio', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_regla_precio_servicio_id'), ['servicio_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('regla_precio', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_regla_precio_servicio_id'))
+
+    op.drop_table('regla_precio')
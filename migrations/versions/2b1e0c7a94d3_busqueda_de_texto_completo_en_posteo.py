@@ -0,0 +1,52 @@
+"""Búsqueda de texto completo en Posteo
+
+Revision ID: 2b1e0c7a94d3
+Revises: 8d1d08db110e
+Create Date: 2026-10-18 11:48:05.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2b1e0c7a94d3'
+down_revision = '8d1d08db110e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('busqueda', sa.Text().with_variant(postgresql.TSVECTOR(), 'postgresql'), nullable=True))
+
+    if es_postgres:
+        op.execute(
+            "UPDATE posteo SET busqueda = "
+            "setweight(to_tsvector('spanish', coalesce(titulo, '')), 'A') || "
+            "setweight(to_tsvector('spanish', coalesce(contenido, '')), 'B')"
+        )
+        op.create_index('ix_posteo_busqueda', 'posteo', ['busqueda'], unique=False, postgresql_using='gin')
+    else:
+        # Sin tsvector: índice FTS5 en una tabla virtual aparte
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posteo_fts "
+            "USING fts5(titulo, contenido, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO posteo_fts (rowid, titulo, contenido) "
+            "SELECT posteo_id, coalesce(titulo, ''), contenido FROM posteo"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_posteo_busqueda', table_name='posteo', postgresql_using='gin')
+    else:
+        op.execute("DROP TABLE IF EXISTS posteo_fts")
+
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.drop_column('busqueda')
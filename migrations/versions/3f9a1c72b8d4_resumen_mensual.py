@@ -0,0 +1,37 @@
+"""Resúmenes mensuales para reportes
+
+Revision ID: 3f9a1c72b8d4
+Revises: 776de067fe85
+Create Date: 2026-10-18 21:48:10.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c72b8d4'
+down_revision = '776de067fe85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La tabla se llena con 'flask recalcular_resumenes' después de migrar
+    op.create_table('resumen_mensual',
+    sa.Column('destino_id', sa.Integer(), nullable=False),
+    sa.Column('proveedor_id', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('cotizaciones', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('reservas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('aceptadas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rechazadas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('ingresos', sa.Float(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['destino_id'], ['destino.destino_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['proveedor_id'], ['usuario.usuario_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('destino_id', 'proveedor_id', 'mes')
+    )
+
+
+def downgrade():
+    op.drop_table('resumen_mensual')
@@ -0,0 +1,31 @@
+"""Versión global del catálogo
+
+Revision ID: 4732fd186546
+Revises: b518297fffcf
+Create Date: 2026-10-18 15:10:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4732fd186546'
+down_revision = 'b518297fffcf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalogo_version = op.create_table('catalogo_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Fila única que incrementan las escrituras del catálogo
+    op.bulk_insert(catalogo_version, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('catalogo_version')
@@ -0,0 +1,31 @@
+"""Fecha de toma en las claves de idempotencia
+
+Revision ID: 5e7b3c9d1a26
+Revises: 3f9a1c72b8d4
+Create Date: 2026-10-18 23:05:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7b3c9d1a26'
+down_revision = '3f9a1c72b8d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las claves existentes toman su fecha de creación: las que quedaron en curso
+    # ya se pueden volver a tomar
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fecha_toma', sa.DateTime(), nullable=True))
+    op.execute('UPDATE clave_idempotencia SET fecha_toma = fecha_creacion')
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.alter_column('fecha_toma', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.drop_column('fecha_toma')
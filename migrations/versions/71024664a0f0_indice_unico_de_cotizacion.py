@@ -0,0 +1,74 @@
+"""Índice único de cotización y contador de solicitudes
+
+Revision ID: 71024664a0f0
+Revises: 1050921bd432
+Create Date: 2026-10-18 16:31:55.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71024664a0f0'
+down_revision = '1050921bd432'
+branch_labels = None
+depends_on = None
+
+COLUMNAS = ('usuario_id', 'servicio_id', 'fecha_inicio', 'fecha_fin', 'cantidad_personas')
+
+
+def _fusionar_duplicados(conexion):
+    """
+    Deja una sola cotización por combinación de parámetros y la que queda acumula el
+    total de solicitudes. Ninguna reserva se borra: se conserva la cotización que tiene
+    reserva (si ninguna tiene, la más reciente). Si más de una cotización del grupo tiene
+    reserva, la migración se detiene para que se resuelvan a mano antes del índice único.
+    """
+    columnas = ', '.join(COLUMNAS)
+    grupos = conexion.execute(sa.text(
+        f"SELECT {columnas} FROM cotizacion GROUP BY {columnas} HAVING COUNT(*) > 1"
+    )).mappings().all()
+
+    for grupo in grupos:
+        filas = conexion.execute(sa.text(
+            "SELECT c.cotizacion_id, r.reserva_id "
+            "FROM cotizacion c LEFT JOIN reserva r ON r.cotizacion_id = c.cotizacion_id "
+            "WHERE " + ' AND '.join(f"c.{col} = :{col}" for col in COLUMNAS)
+        ), dict(grupo)).all()
+
+        reservadas = [f for f in filas if f.reserva_id is not None]
+        if len(reservadas) > 1:
+            raise RuntimeError(
+                'Cotizaciones duplicadas con más de una reserva: '
+                + ', '.join(f'cotización {f.cotizacion_id} (reserva {f.reserva_id})' for f in reservadas)
+                + '. Cancela o elimina las reservas sobrantes y vuelve a ejecutar la migración.'
+            )
+
+        conservada = max(filas, key=lambda f: (f.reserva_id is not None, f.cotizacion_id))
+        descartadas = [f.cotizacion_id for f in filas if f.cotizacion_id != conservada.cotizacion_id]
+
+        conexion.execute(
+            sa.text("DELETE FROM cotizacion WHERE cotizacion_id IN :ids").bindparams(sa.bindparam('ids', expanding=True)),
+            {'ids': descartadas}
+        )
+        conexion.execute(
+            sa.text("UPDATE cotizacion SET solicitudes = :cantidad WHERE cotizacion_id = :id"),
+            {'cantidad': len(filas), 'id': conservada.cotizacion_id}
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('cotizacion', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('solicitudes', sa.Integer(), server_default='1', nullable=False))
+
+    _fusionar_duplicados(op.get_bind())
+
+    with op.batch_alter_table('cotizacion', schema=None) as batch_op:
+        batch_op.create_index('uq_cotizacion_parametros', list(COLUMNAS), unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('cotizacion', schema=None) as batch_op:
+        batch_op.drop_index('uq_cotizacion_parametros')
+        batch_op.drop_column('solicitudes')
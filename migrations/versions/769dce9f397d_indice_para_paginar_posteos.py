@@ -0,0 +1,26 @@
+"""Índice para paginar posteos raíz y cargar respuestas
+
+Revision ID: 769dce9f397d
+Revises: fe12d1af8225
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '769dce9f397d'
+down_revision = 'fe12d1af8225'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.create_index('ix_posteo_padre_fecha', ['posteo_padre_id', 'fecha_creacion', 'posteo_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.drop_index('ix_posteo_padre_fecha')
@@ -0,0 +1,32 @@
+"""Índices del panel de proveedor
+
+Revision ID: 776de067fe85
+Revises: 8b6c65760b4d
+Create Date: 2026-10-18 20:26:57.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '776de067fe85'
+down_revision = '8b6c65760b4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reserva', schema=None) as batch_op:
+        batch_op.create_index('ix_reserva_servicio_estado', ['servicio_id', 'estado'], unique=False)
+
+    with op.batch_alter_table('servicio', schema=None) as batch_op:
+        batch_op.create_index('ix_servicio_proveedor_nombre', ['proveedor_id', 'nombre'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('servicio', schema=None) as batch_op:
+        batch_op.drop_index('ix_servicio_proveedor_nombre')
+
+    with op.batch_alter_table('reserva', schema=None) as batch_op:
+        batch_op.drop_index('ix_reserva_servicio_estado')
@@ -0,0 +1,63 @@
+"""Tablas de archivo de cotización y reserva
+
+Revision ID: 8b6c65760b4d
+Revises: 0c1b80f84fdd
+Create Date: 2026-10-18 19:48:12.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b6c65760b4d'
+down_revision = '0c1b80f84fdd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cotizacion_archivo',
+    sa.Column('cotizacion_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('fecha_solicitud', sa.DateTime(), nullable=True),
+    sa.Column('fecha_inicio', sa.Date(), nullable=False),
+    sa.Column('fecha_fin', sa.Date(), nullable=False),
+    sa.Column('cantidad_personas', sa.Integer(), nullable=False),
+    sa.Column('precio_total', sa.Float(), nullable=False),
+    sa.Column('solicitudes', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('servicio_id', sa.Integer(), nullable=False),
+    sa.Column('fecha_archivado', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('cotizacion_id')
+    )
+    with op.batch_alter_table('cotizacion_archivo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cotizacion_archivo_usuario_id'), ['usuario_id'], unique=False)
+
+    op.create_table('reserva_archivo',
+    sa.Column('reserva_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('servicio_id', sa.Integer(), nullable=False),
+    sa.Column('cotizacion_id', sa.Integer(), nullable=False),
+    sa.Column('fecha_reserva', sa.DateTime(), nullable=True),
+    sa.Column('fecha_servicio_inicio', sa.Date(), nullable=False),
+    sa.Column('fecha_servicio_fin', sa.Date(), nullable=False),
+    sa.Column('cantidad_personas', sa.Integer(), nullable=False),
+    sa.Column('costo_total', sa.Float(), nullable=False),
+    sa.Column('estado', sa.String(length=50), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('fecha_archivado', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('reserva_id')
+    )
+    with op.batch_alter_table('reserva_archivo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reserva_archivo_usuario_id'), ['usuario_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reserva_archivo', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reserva_archivo_usuario_id'))
+
+    op.drop_table('reserva_archivo')
+    with op.batch_alter_table('cotizacion_archivo', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cotizacion_archivo_usuario_id'))
+
+    op.drop_table('cotizacion_archivo')
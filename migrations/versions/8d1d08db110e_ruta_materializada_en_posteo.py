@@ -0,0 +1,89 @@
+"""Ruta materializada y profundidad en Posteo
+
+Revision ID: 8d1d08db110e
+Revises: 769dce9f397d
+Create Date: 2026-10-18 11:02:17.550931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1d08db110e'
+down_revision = '769dce9f397d'
+branch_labels = None
+depends_on = None
+
+ANCHO_SEGMENTO = 10
+LARGO_RUTA = 255
+# Mismo límite que app.models.posteo: nivel más profundo cuya ruta entra en la columna
+PROFUNDIDAD_MAXIMA = LARGO_RUTA // (ANCHO_SEGMENTO + 1) - 1
+TAMANO_LOTE = 1000
+
+
+def _calcular_rutas(padres):
+    """
+    (ruta, profundidad, padre) de cada posteo a partir del mapa hijo -> padre.
+    Como en services/hilos.padre_de_respuesta, una respuesta a un posteo que ya está
+    en PROFUNDIDAD_MAXIMA se cuelga del padre de ese posteo (queda como hermana),
+    así ninguna ruta excede la columna.
+    """
+    rutas = {}
+    for posteo_id in padres:
+        # Sube hasta el primer ancestro con ruta ya calculada (o hasta la raíz)
+        cadena = []
+        actual = posteo_id
+        while actual is not None and actual not in rutas and actual in padres:
+            cadena.append(actual)
+            actual = padres[actual]
+        for pid in reversed(cadena):
+            padre = padres[pid]
+            if padre in rutas:
+                prefijo, profundidad, abuelo = rutas[padre]
+                if profundidad >= PROFUNDIDAD_MAXIMA:
+                    padre = abuelo
+                    prefijo, profundidad, _ = rutas[abuelo]
+            else:
+                # Raíz (o padre que ya no existe)
+                prefijo, profundidad = '', -1
+            rutas[pid] = (f'{prefijo}{pid:0{ANCHO_SEGMENTO}d}/', profundidad + 1, padre)
+    return rutas
+
+
+def upgrade():
+    tipo_ruta = sa.String(length=255).with_variant(sa.String(length=255, collation='C'), 'postgresql')
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ruta', tipo_ruta, nullable=True))
+        batch_op.add_column(sa.Column('profundidad', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill de los posteos existentes
+    posteo = sa.table('posteo',
+                      sa.column('posteo_id', sa.Integer),
+                      sa.column('posteo_padre_id', sa.Integer),
+                      sa.column('ruta', sa.String),
+                      sa.column('profundidad', sa.Integer))
+    conn = op.get_bind()
+    padres = dict(conn.execute(sa.select(posteo.c.posteo_id, posteo.c.posteo_padre_id)).all())
+    filas = [
+        {'b_id': pid, 'b_ruta': ruta, 'b_profundidad': profundidad, 'b_padre': padre}
+        for pid, (ruta, profundidad, padre) in _calcular_rutas(padres).items()
+    ]
+    actualizar = (
+        posteo.update()
+        .where(posteo.c.posteo_id == sa.bindparam('b_id'))
+        .values(ruta=sa.bindparam('b_ruta'), profundidad=sa.bindparam('b_profundidad'),
+                posteo_padre_id=sa.bindparam('b_padre'))
+    )
+    for i in range(0, len(filas), TAMANO_LOTE):
+        conn.execute(actualizar, filas[i:i + TAMANO_LOTE])
+
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_posteo_ruta'), ['ruta'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_posteo_ruta'))
+        batch_op.drop_column('profundidad')
+        batch_op.drop_column('ruta')
@@ -0,0 +1,37 @@
+"""Índices del reporte de reservas del panel de administración
+
+Revision ID: 9c4d2e8f6b13
+Revises: 5e7b3c9d1a26
+Create Date: 2026-10-18 23:31:12.640915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4d2e8f6b13'
+down_revision = '5e7b3c9d1a26'
+branch_labels = None
+depends_on = None
+
+# (sufijo, columnas): uno por cada orden de ORDENES_RESERVAS, con reserva_id de desempate
+INDICES = (
+    ('fecha_reserva', ['fecha_reserva', 'reserva_id']),
+    ('fecha_servicio', ['fecha_servicio_inicio', 'reserva_id']),
+    ('costo', ['costo_total', 'reserva_id']),
+)
+
+
+def upgrade():
+    for tabla in ('reserva', 'reserva_archivo'):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            for sufijo, columnas in INDICES:
+                batch_op.create_index(f'ix_{tabla}_{sufijo}', columnas, unique=False)
+
+
+def downgrade():
+    for tabla in ('reserva_archivo', 'reserva'):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            for sufijo, _ in INDICES:
+                batch_op.drop_index(f'ix_{tabla}_{sufijo}')
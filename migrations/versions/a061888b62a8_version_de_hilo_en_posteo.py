@@ -0,0 +1,26 @@
+"""Versión de hilo en Posteo para la caché de fragmentos
+
+Revision ID: a061888b62a8
+Revises: 2b1e0c7a94d3
+Create Date: 2026-10-18 12:31:49.771043
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a061888b62a8'
+down_revision = '2b1e0c7a94d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.drop_column('version')
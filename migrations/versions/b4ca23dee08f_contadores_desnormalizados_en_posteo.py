@@ -0,0 +1,75 @@
+"""Contadores de respuestas y última actividad en Posteo
+
+Revision ID: b4ca23dee08f
+Revises: a061888b62a8
+Create Date: 2026-10-18 13:20:36.918402
+
+"""
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4ca23dee08f'
+down_revision = 'a061888b62a8'
+branch_labels = None
+depends_on = None
+
+TAMANO_LOTE = 1000
+
+
+def upgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cantidad_respuestas', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('cantidad_descendientes', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('ultima_actividad', sa.DateTime(), nullable=True))
+
+    # Backfill a partir de la ruta materializada
+    posteo = sa.table('posteo',
+                      sa.column('posteo_id', sa.Integer),
+                      sa.column('posteo_padre_id', sa.Integer),
+                      sa.column('ruta', sa.String),
+                      sa.column('fecha_creacion', sa.DateTime),
+                      sa.column('cantidad_respuestas', sa.Integer),
+                      sa.column('cantidad_descendientes', sa.Integer),
+                      sa.column('ultima_actividad', sa.DateTime))
+    conn = op.get_bind()
+    respuestas, descendientes, actividad = Counter(), Counter(), {}
+    filas = conn.execute(sa.select(posteo.c.posteo_id, posteo.c.posteo_padre_id,
+                                   posteo.c.ruta, posteo.c.fecha_creacion)).all()
+    for posteo_id, padre_id, ruta, fecha in filas:
+        actividad[posteo_id] = max(filter(None, [actividad.get(posteo_id), fecha]), default=None)
+        if padre_id is not None:
+            respuestas[padre_id] += 1
+        for segmento in (ruta or '').split('/')[:-2]:
+            ancestro = int(segmento)
+            descendientes[ancestro] += 1
+            actividad[ancestro] = max(filter(None, [actividad.get(ancestro), fecha]), default=None)
+
+    actualizar = (
+        posteo.update()
+        .where(posteo.c.posteo_id == sa.bindparam('b_id'))
+        .values(cantidad_respuestas=sa.bindparam('b_respuestas'),
+                cantidad_descendientes=sa.bindparam('b_descendientes'),
+                ultima_actividad=sa.bindparam('b_actividad'))
+    )
+    lote = [{'b_id': pid, 'b_respuestas': respuestas[pid],
+             'b_descendientes': descendientes[pid], 'b_actividad': fecha}
+            for pid, fecha in actividad.items()]
+    for i in range(0, len(lote), TAMANO_LOTE):
+        conn.execute(actualizar, lote[i:i + TAMANO_LOTE])
+
+    op.execute("UPDATE posteo SET ultima_actividad = CURRENT_TIMESTAMP WHERE ultima_actividad IS NULL")
+
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.alter_column('ultima_actividad', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index('ix_posteo_padre_actividad', ['posteo_padre_id', 'ultima_actividad', 'posteo_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posteo', schema=None) as batch_op:
+        batch_op.drop_index('ix_posteo_padre_actividad')
+        batch_op.drop_column('ultima_actividad')
+        batch_op.drop_column('cantidad_descendientes')
+        batch_op.drop_column('cantidad_respuestas')
@@ -0,0 +1,90 @@
+"""Coordenadas numéricas y geohash en Destino
+
+Revision ID: b518297fffcf
+Revises: b4ca23dee08f
+Create Date: 2026-10-18 14:05:12.663870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b518297fffcf'
+down_revision = 'b4ca23dee08f'
+branch_labels = None
+depends_on = None
+
+_BASE32_GEOHASH = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _parsear(texto):
+    try:
+        lat_str, lon_str = texto.split(',', 1)
+        lat, lon = float(lat_str.strip()), float(lon_str.strip())
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def _geohash(lat, lon, precision=9):
+    lat_rango, lon_rango = [-90.0, 90.0], [-180.0, 180.0]
+    resultado, bits, valor, es_lon = [], 0, 0, True
+    while len(resultado) < precision:
+        rango, coordenada = (lon_rango, lon) if es_lon else (lat_rango, lat)
+        medio = (rango[0] + rango[1]) / 2
+        valor <<= 1
+        if coordenada >= medio:
+            valor |= 1
+            rango[0] = medio
+        else:
+            rango[1] = medio
+        es_lon = not es_lon
+        bits += 1
+        if bits == 5:
+            resultado.append(_BASE32_GEOHASH[valor])
+            bits, valor = 0, 0
+    return ''.join(resultado)
+
+
+def upgrade():
+    with op.batch_alter_table('destino', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitud', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitud', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    # Backfill desde el texto 'lat,lon'
+    destino = sa.table('destino',
+                       sa.column('destino_id', sa.Integer),
+                       sa.column('coordenadas', sa.String),
+                       sa.column('latitud', sa.Float),
+                       sa.column('longitud', sa.Float),
+                       sa.column('geohash', sa.String))
+    conn = op.get_bind()
+    filas = []
+    for destino_id, coordenadas in conn.execute(sa.select(destino.c.destino_id, destino.c.coordenadas)):
+        punto = _parsear(coordenadas)
+        if punto:
+            filas.append({'b_id': destino_id, 'b_lat': punto[0], 'b_lon': punto[1], 'b_geohash': _geohash(*punto)})
+    if filas:
+        conn.execute(
+            destino.update()
+            .where(destino.c.destino_id == sa.bindparam('b_id'))
+            .values(latitud=sa.bindparam('b_lat'), longitud=sa.bindparam('b_lon'), geohash=sa.bindparam('b_geohash')),
+            filas
+        )
+
+    with op.batch_alter_table('destino', schema=None) as batch_op:
+        batch_op.create_index('ix_destino_lat_lon', ['latitud', 'longitud'], unique=False)
+        batch_op.create_index(batch_op.f('ix_destino_geohash'), ['geohash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('destino', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_destino_geohash'))
+        batch_op.drop_index('ix_destino_lat_lon')
+        batch_op.drop_column('geohash')
+        batch_op.drop_column('longitud')
+        batch_op.drop_column('latitud')
@@ -0,0 +1,31 @@
+"""Fecha de creación de cotización (la de solicitud se renueva al volver a pedirla)
+
+Revision ID: b7e1f4a03c58
+Revises: 9c4d2e8f6b13
+Create Date: 2026-10-18 23:52:40.271583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1f4a03c58'
+down_revision = '9c4d2e8f6b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Para las existentes la mejor aproximación es la última solicitud; después
+    # conviene correr 'flask recalcular_resumenes' para que los resúmenes usen esta columna
+    for tabla in ('cotizacion', 'cotizacion_archivo'):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('fecha_creacion', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {tabla} SET fecha_creacion = fecha_solicitud')
+
+
+def downgrade():
+    for tabla in ('cotizacion_archivo', 'cotizacion'):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.drop_column('fecha_creacion')
@@ -0,0 +1,63 @@
+"""Capacidad de servicio y ocupación diaria
+
+Revision ID: c0868953d760
+Revises: 71024664a0f0
+Create Date: 2026-10-18 17:42:08.316540
+
+"""
+from collections import Counter
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0868953d760'
+down_revision = '71024664a0f0'
+branch_labels = None
+depends_on = None
+
+
+def _cargar_ocupacion(conexion):
+    """Arma la ocupación diaria a partir de las reservas Aceptadas existentes."""
+    ocupacion = Counter()
+    # Columnas tipadas para recibir fechas también en SQLite, que las guarda como texto
+    reservas = conexion.execute(sa.text(
+        "SELECT servicio_id, fecha_servicio_inicio, fecha_servicio_fin, cantidad_personas "
+        "FROM reserva WHERE estado = 'Aceptada'"
+    ).columns(sa.column('servicio_id', sa.Integer), sa.column('fecha_servicio_inicio', sa.Date),
+              sa.column('fecha_servicio_fin', sa.Date), sa.column('cantidad_personas', sa.Integer)))
+    for servicio_id, inicio, fin, personas in reservas:
+        for i in range((fin - inicio).days + 1):
+            ocupacion[(servicio_id, inicio + timedelta(days=i))] += personas
+
+    if ocupacion:
+        tabla = sa.table('ocupacion_diaria',
+                         sa.column('servicio_id', sa.Integer),
+                         sa.column('fecha', sa.Date),
+                         sa.column('personas', sa.Integer))
+        conexion.execute(tabla.insert(), [
+            {'servicio_id': servicio_id, 'fecha': fecha, 'personas': personas}
+            for (servicio_id, fecha), personas in ocupacion.items()
+        ])
+
+
+def upgrade():
+    with op.batch_alter_table('servicio', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('capacidad', sa.Integer(), nullable=True))
+
+    op.create_table('ocupacion_diaria',
+    sa.Column('servicio_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('personas', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['servicio_id'], ['servicio.servicio_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('servicio_id', 'fecha')
+    )
+
+    _cargar_ocupacion(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('ocupacion_diaria')
+    with op.batch_alter_table('servicio', schema=None) as batch_op:
+        batch_op.drop_column('capacidad')
@@ -0,0 +1,42 @@
+"""Claves de idempotencia
+
+Revision ID: e5d2a1f9c347
+Revises: c0868953d760
+Create Date: 2026-10-18 18:20:44.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d2a1f9c347'
+down_revision = 'c0868953d760'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('clave_idempotencia',
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('clave', sa.String(length=64), nullable=False),
+    sa.Column('ruta', sa.String(length=200), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('codigo', sa.Integer(), nullable=True),
+    sa.Column('ubicacion', sa.String(length=500), nullable=True),
+    sa.Column('cuerpo', sa.Text(), nullable=True),
+    sa.Column('tipo_contenido', sa.String(length=100), nullable=True),
+    sa.Column('mensajes', sa.Text(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuario.usuario_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('usuario_id', 'clave')
+    )
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_clave_idempotencia_fecha_creacion'), ['fecha_creacion'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('clave_idempotencia', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clave_idempotencia_fecha_creacion'))
+
+    op.drop_table('clave_idempotencia')
@@ -1,6 +1,6 @@
 import pytest
 from app import create_app
-from app.extensions import db
+from app.extensions import db, bcrypt
 from app.models import Usuario, Destino, Servicio
 from datetime import datetime
 from flask_login import FlaskLoginClient
@@ -126,3 +126,56 @@ def login_user(client):
         return client.login(user=user_object)
     
     return _login
+
+
+# ----------------------------------------------
+# Base nueva por test (servicios que hacen commit)
+# ----------------------------------------------
+
+@pytest.fixture(scope='function')
+def app_bd():
+    """
+    Aplicación con una base SQLite en memoria propia del test, con roles, un admin (1),
+    un proveedor (4), un turista (5), dos destinos y dos servicios del proveedor:
+    1 (Hotel, $100 por Día, destino 1) y 2 (Tour, $50 por Persona, destino 2).
+    """
+    from app.models import Rol
+    app = create_app('testing')
+    app.test_client_class = FlaskLoginClient
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Rol(rol_id=i, nombre=nombre) for i, nombre in
+                            [(1, 'Administrador'), (2, 'Moderador'), (3, 'Mesa de Ayuda'),
+                             (4, 'Proveedor'), (5, 'Turista')]])
+        for usuario_id, nombre in [(1, 'Admin'), (4, 'Proveedor'), (5, 'Turista')]:
+            db.session.add(Usuario(usuario_id=usuario_id, nombre=nombre, apellido='Test',
+                                   email=f'{nombre.lower()}@test.com', dni=str(usuario_id),
+                                   contrasena=bcrypt.generate_password_hash('clave').decode('utf-8'),
+                                   rol_id=usuario_id))
+        db.session.add_all([
+            Destino(destino_id=1, nombre='Ciudad de Córdoba', descripcion='Capital', categoria='Ciudad',
+                    coordenadas='-31.4167,-64.1833'),
+            Destino(destino_id=2, nombre='Villa Carlos Paz', descripcion='Lago', categoria='Sierras',
+                    coordenadas='-31.4241,-64.4978'),
+        ])
+        db.session.flush()
+        db.session.add_all([
+            Servicio(servicio_id=1, nombre='Hotel Centro', descripcion='Alojamiento', precio_base=100,
+                     unidad='Día', destino_id=1, proveedor_id=4),
+            Servicio(servicio_id=2, nombre='Walking Tour', descripcion='Recorrido', precio_base=50,
+                     unidad='Persona', destino_id=2, proveedor_id=4),
+        ])
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture(scope='function')
+def cliente_de(app_bd):
+    """Devuelve una función que crea un cliente con la sesión iniciada por el usuario indicado."""
+    def _cliente(usuario_id):
+        return app_bd.test_client(user=db.session.get(Usuario, usuario_id))
+    return _cliente
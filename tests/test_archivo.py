@@ -0,0 +1,22 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask
+from app.services.archivo import esta_vencida
+
+
+def _cotizacion(dias_desde_solicitud, dias_hasta_inicio):
+    return SimpleNamespace(
+        fecha_solicitud=datetime.utcnow() - timedelta(days=dias_desde_solicitud),
+        fecha_inicio=date.today() + timedelta(days=dias_hasta_inicio)
+    )
+
+
+def test_cotizacion_vence_por_antiguedad_o_por_fecha_de_inicio():
+    app = Flask(__name__)
+    app.config['COTIZACION_VIGENCIA_DIAS'] = 30
+    with app.app_context():
+        assert not esta_vencida(_cotizacion(1, 10))
+        assert esta_vencida(_cotizacion(31, 10))
+        # El servicio ya empezó: no se puede reservar aunque la cotización sea reciente
+        assert esta_vencida(_cotizacion(0, -1))
+        assert not esta_vencida(_cotizacion(0, 0))
@@ -0,0 +1,31 @@
+from app.extensions import db
+from app.models import Posteo
+from app.services.busqueda import consulta_fts5, resaltar, buscar_posteos, MARCA_INICIO, MARCA_FIN
+
+
+def test_consulta_fts5_escapa_operadores():
+    """Los operadores de FTS5 del usuario se descartan y cada palabra va entre comillas."""
+    assert consulta_fts5('sierras "OR" córdoba*') == '"sierras" "OR" "córdoba"'
+    assert consulta_fts5('  ()* ') == ''
+
+
+def test_resaltar_escapa_html_del_usuario():
+    """Solo las marcas de coincidencia se convierten en HTML; el resto se escapa."""
+    texto = f'<script>x</script> {MARCA_INICIO}sierras{MARCA_FIN}'
+
+    resultado = resaltar(texto)
+
+    assert '<script>' not in resultado
+    assert '<mark>sierras</mark>' in resultado
+
+
+def test_la_tabla_fts_se_llena_con_los_posteos_existentes(app_bd):
+    """Los posteos guardados antes de crear la tabla FTS5 también aparecen en la búsqueda."""
+    with app_bd.app_context():
+        db.session.add(Posteo(titulo='Sierras', contenido='Caminata por las sierras chicas', usuario_id=5))
+        db.session.commit()
+
+        resultados, total = buscar_posteos('sierras')
+
+        assert total == 1
+        assert resultados[0]['posteo'].titulo == 'Sierras'
@@ -0,0 +1,23 @@
+import time
+from app.services.cache import CacheLRU
+
+
+def test_cache_lru_descarta_la_entrada_menos_usada():
+    """Al superar el máximo se descarta la entrada usada hace más tiempo."""
+    cache = CacheLRU(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    cache.obtener('a')  # 'a' pasa a ser la más reciente
+    cache.guardar('c', 3)
+
+    assert cache.obtener('b') is None
+    assert cache.obtener_varios(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+
+def test_cache_lru_vence_por_ttl():
+    """Las entradas vencidas no se devuelven."""
+    cache = CacheLRU(max_entradas=10, ttl=0.01)
+    cache.guardar('hilo:1:v1', '<div></div>')
+    time.sleep(0.02)
+
+    assert cache.obtener('hilo:1:v1') is None
@@ -0,0 +1,28 @@
+import pytest
+from app.services.catalogo import DestinoCatalogo, ServicioCatalogo, Instantanea
+
+
+def _instantanea():
+    hotel = ServicioCatalogo(10, 'Hotel', 'h', 100.0, 'Día', 'Disponible', 2, 4)
+    return Instantanea(7, [
+        DestinoCatalogo(2, 'Villa General Belgrano', '', 'Pueblo', '-31.97,-64.56', -31.97, -64.56, (hotel,)),
+        DestinoCatalogo(1, 'Alta Gracia', '', 'Histórico', '-31.65,-64.43', -31.65, -64.43, ()),
+    ])
+
+
+def test_instantanea_ordena_e_indexa():
+    instantanea = _instantanea()
+
+    assert [d.nombre for d in instantanea.destinos] == ['Alta Gracia', 'Villa General Belgrano']
+    assert instantanea.destinos_por_id[2].servicios[0].nombre == 'Hotel'
+    assert instantanea.servicios_por_id[10].destino_id == 2
+
+
+def test_instantanea_es_inmutable():
+    """Los workers comparten la instantánea entre hilos: no debe poder modificarse."""
+    instantanea = _instantanea()
+
+    with pytest.raises(TypeError):
+        instantanea.destinos_por_id[3] = None
+    with pytest.raises(AttributeError):
+        instantanea.destinos[0].nombre = 'Otro'
@@ -0,0 +1,78 @@
+import threading
+from app.services.clusters import (IndiceClusters, _lock_indice, desproyectar, indice_destinos, proyectar,
+                                   quitar_destino_de_clusters)
+
+BBOX_CORDOBA = (-66.0, -35.0, -62.0, -29.0)
+
+
+def _indice():
+    indice = IndiceClusters(zoom_max=16, radio_px=60)
+    indice.agregar(1, -31.32, -64.55, {'nombre': 'Carbon'})
+    indice.agregar(2, -31.33, -64.56, {'nombre': 'Vecino'})
+    indice.agregar(3, -31.4167, -64.1833, {'nombre': 'Overlook'})
+    return indice
+
+
+def test_proyeccion_ida_y_vuelta():
+    lat, lon = desproyectar(*proyectar(-31.4167, -64.1833))
+    assert abs(lat + 31.4167) < 1e-9 and abs(lon + 64.1833) < 1e-9
+
+
+def test_zoom_bajo_agrupa_y_zoom_alto_separa():
+    """Lejos todos caen en un cluster; cerca cada destino es un punto."""
+    indice = _indice()
+
+    lejos, = indice.consultar(*BBOX_CORDOBA, zoom=4)
+    assert lejos['properties']['cluster'] and lejos['properties']['cantidad'] == 3
+
+    cerca = indice.consultar(*BBOX_CORDOBA, zoom=16)
+    assert sorted(f['id'] for f in cerca) == [1, 2, 3]
+
+
+def test_actualizacion_incremental():
+    """Mover o quitar un destino se refleja sin reconstruir el índice."""
+    indice = _indice()
+    indice.agregar(2, -20.0, -64.56, {'nombre': 'Vecino'})  # sale del viewport
+    indice.quitar(3)
+
+    features = indice.consultar(*BBOX_CORDOBA, zoom=4)
+
+    assert [f['id'] for f in features] == [1]
+    assert len(indice) == 2
+
+
+# --- Índice de la aplicación ---
+
+def test_escritura_propia_se_aplica_solo_sobre_la_version_anterior(app_bd):
+    with app_bd.app_context():
+        indice = indice_destinos()
+        version = indice.version
+        assert sorted(f['id'] for f in indice.consultar(*BBOX_CORDOBA, zoom=16)) == [1, 2]
+
+        quitar_destino_de_clusters(2, version + 1)
+        assert indice.version == version + 1 and len(indice) == 1
+
+        # Una versión que no es la siguiente no toca el índice: se reconstruye al leerlo
+        quitar_destino_de_clusters(1, version + 5)
+        assert indice.version == version + 1 and len(indice) == 1
+
+
+def test_escritura_espera_a_la_lectura_que_tiene_el_lock(app_bd):
+    """Versión y cambio se aplican juntos, nunca en medio de una reconstrucción."""
+    with app_bd.app_context():
+        indice = indice_destinos()
+        version = indice.version
+
+        def escribir():
+            with app_bd.app_context():
+                quitar_destino_de_clusters(2, version + 1)
+
+        with _lock_indice():
+            hilo = threading.Thread(target=escribir)
+            hilo.start()
+            hilo.join(timeout=0.2)
+            assert hilo.is_alive()
+            assert indice.version == version and len(indice) == 2
+        hilo.join()
+
+        assert indice.version == version + 1 and len(indice) == 1
@@ -0,0 +1,147 @@
+import importlib.util
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+import sqlalchemy as sa
+from app.extensions import db
+from app.models import Cotizacion
+from app.services.cotizaciones import calcular_precios, cotizar_lote, guardar_cotizacion, upsert_cotizaciones
+from app.utils import calcular_precio_total, es_unidad_por_dia
+
+
+def test_calcular_precios_coincide_con_calcular_precio_total():
+    """El cálculo vectorial da lo mismo que el de a un servicio por vez."""
+    casos = [
+        (100.0, 'Día', 2, 3),
+        (50.0, 'Persona', 3, 3),
+        (80.0, 'Unidad', 1, 5),
+        (120.0, 'dias', 4, 1),
+    ]
+
+    totales = calcular_precios(
+        [c[0] for c in casos],
+        [es_unidad_por_dia(c[1]) for c in casos],
+        [c[2] for c in casos],
+        [c[3] for c in casos]
+    )
+
+    esperados = [
+        calcular_precio_total(SimpleNamespace(precio_base=precio, unidad=unidad), personas, dias)
+        for precio, unidad, personas, dias in casos
+    ]
+    assert totales.tolist() == esperados
+
+
+def test_cotizar_lote_informa_valores_enormes_por_fila(app_bd):
+    """Un número fuera de rango es un error de su pedido, no de todo el lote."""
+    pedidos = [
+        {'servicio_id': 1, 'fecha_inicio': '2030-01-10', 'fecha_fin': '2030-01-11', 'personas': 2},
+        {'servicio_id': 1, 'fecha_inicio': '2030-01-10', 'personas': 10**30},
+        {'servicio_id': 10**30, 'fecha_inicio': '2030-01-10', 'personas': 1},
+    ]
+
+    with app_bd.test_request_context():
+        cotizaciones, errores = cotizar_lote(5, pedidos)
+
+    assert [(c['indice'], c['precio_total']) for c in cotizaciones] == [(0, 400.0)]
+    assert [e['indice'] for e in errores] == [1, 2]
+    assert 'hasta 100 personas' in errores[0]['error']
+
+
+def test_cotizar_lote_rechaza_rangos_mayores_al_maximo(app_bd):
+    pedidos = [
+        {'servicio_id': 1, 'fecha_inicio': '2030-01-01', 'fecha_fin': '2030-12-31', 'personas': 1},
+        {'servicio_id': 1, 'fecha_inicio': '2030-01-01', 'fecha_fin': '9999-12-31', 'personas': 1},
+    ]
+
+    with app_bd.test_request_context():
+        app_bd.config['COTIZACION_MAX_DIAS'] = 365
+        cotizaciones, errores = cotizar_lote(5, pedidos)
+
+    assert [c['indice'] for c in cotizaciones] == [0]
+    assert errores == [{'indice': 1, 'error': 'Se puede cotizar hasta 365 días por pedido.'}]
+
+
+def test_cotizador_rechaza_rangos_mayores_al_maximo(app_bd, cliente_de):
+    app_bd.config['COTIZACION_MAX_DIAS'] = 30
+    respuesta = cliente_de(5).post('/cotizador', data={'servicio': '1', 'fecha_inicio': '2030-01-01',
+                                                        'fecha_fin': '2030-03-01', 'personas': '2'})
+
+    assert 'hasta 30 días por pedido' in respuesta.get_data(as_text=True)
+    with app_bd.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(Cotizacion)) == 0
+
+
+def test_guardar_cotizacion_repetida_actualiza_la_misma_fila(app_bd):
+    with app_bd.app_context():
+        primera = guardar_cotizacion(5, 1, date(2030, 1, 10), date(2030, 1, 11), 2, 400.0)
+        repetida = guardar_cotizacion(5, 1, date(2030, 1, 10), date(2030, 1, 11), 2, 450.0)
+        otra = guardar_cotizacion(5, 1, date(2030, 1, 10), date(2030, 1, 11), 3, 600.0)
+        db.session.commit()
+
+        assert primera[1] and not repetida[1] and otra[1]
+        assert repetida[0] == primera[0] != otra[0]
+        cotizacion = db.session.get(Cotizacion, primera[0])
+        assert (cotizacion.solicitudes, cotizacion.precio_total) == (2, 450.0)
+
+
+def test_upsert_cotizaciones_devuelve_cada_fila_por_sus_parametros(app_bd):
+    filas = [
+        {'usuario_id': 5, 'servicio_id': servicio_id, 'fecha_inicio': date(2030, 2, 1),
+         'fecha_fin': date(2030, 2, 2), 'cantidad_personas': 1, 'precio_total': 100.0}
+        for servicio_id in (1, 2)
+    ]
+    with app_bd.app_context():
+        guardar_cotizacion(5, 2, date(2030, 2, 1), date(2030, 2, 2), 1, 50.0)
+
+        guardadas = upsert_cotizaciones(filas)
+
+        assert sorted(solicitudes for _, solicitudes in guardadas.values()) == [1, 2]
+        for clave, (cotizacion_id, _) in guardadas.items():
+            assert db.session.get(Cotizacion, cotizacion_id).servicio_id == clave[1]
+
+
+def _migracion_indice_unico():
+    ruta = Path(__file__).parents[1] / 'migrations' / 'versions' / '71024664a0f0_indice_unico_de_cotizacion.py'
+    especificacion = importlib.util.spec_from_file_location('migracion_71024664a0f0', ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+def _base_con_duplicados(reservadas):
+    """Tres cotizaciones iguales (1, 2, 3); 'reservadas' son las que tienen reserva."""
+    motor = sa.create_engine('sqlite://')
+    with motor.begin() as conexion:
+        conexion.execute(sa.text(
+            "CREATE TABLE cotizacion (cotizacion_id INTEGER PRIMARY KEY, usuario_id INT, servicio_id INT, "
+            "fecha_inicio DATE, fecha_fin DATE, cantidad_personas INT, solicitudes INT DEFAULT 1)"
+        ))
+        conexion.execute(sa.text("CREATE TABLE reserva (reserva_id INTEGER PRIMARY KEY, cotizacion_id INT)"))
+        for cotizacion_id in (1, 2, 3):
+            conexion.execute(sa.text(
+                "INSERT INTO cotizacion (cotizacion_id, usuario_id, servicio_id, fecha_inicio, fecha_fin, "
+                "cantidad_personas) VALUES (:id, 5, 1, '2030-01-10', '2030-01-10', 2)"
+            ), {'id': cotizacion_id})
+        for cotizacion_id in reservadas:
+            conexion.execute(sa.text("INSERT INTO reserva (cotizacion_id) VALUES (:id)"), {'id': cotizacion_id})
+    return motor
+
+
+def test_fusionar_duplicados_conserva_la_reserva():
+    motor = _base_con_duplicados(reservadas=[1])
+
+    with motor.begin() as conexion:
+        _migracion_indice_unico()._fusionar_duplicados(conexion)
+
+        assert conexion.execute(sa.text("SELECT cotizacion_id, solicitudes FROM cotizacion")).all() == [(1, 3)]
+        assert conexion.execute(sa.text("SELECT cotizacion_id FROM reserva")).scalars().all() == [1]
+
+
+def test_fusionar_duplicados_se_detiene_con_varias_reservas():
+    motor = _base_con_duplicados(reservadas=[1, 3])
+
+    with motor.begin() as conexion:
+        with pytest.raises(RuntimeError, match='más de una reserva'):
+            _migracion_indice_unico()._fusionar_duplicados(conexion)
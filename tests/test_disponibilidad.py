@@ -0,0 +1,116 @@
+from datetime import date
+import pytest
+from app.extensions import db
+from app.models import Servicio
+from app.services.disponibilidad import (RangoDemasiadoLargo, SinCapacidad, dias_del_rango, libres_por_dia, lugar_libre,
+                                         ocupacion_por_dia, ocupar, servicios_disponibles)
+
+
+def test_dias_del_rango_incluye_ambos_extremos():
+    assert dias_del_rango(date(2026, 2, 27), date(2026, 3, 1)) == [
+        date(2026, 2, 27), date(2026, 2, 28), date(2026, 3, 1)
+    ]
+    assert dias_del_rango(date(2026, 5, 1), date(2026, 5, 1)) == [date(2026, 5, 1)]
+
+
+def test_libres_por_dia_descuenta_la_ocupacion():
+    ocupados = {date(2026, 11, 2): 2, date(2026, 11, 3): 5}
+    assert libres_por_dia(4, ocupados, date(2026, 11, 1), date(2026, 11, 3)) == [
+        (date(2026, 11, 1), 4),
+        (date(2026, 11, 2), 2),
+        # Sobreocupado (capacidad reducida después de aceptar): nunca negativo
+        (date(2026, 11, 3), 0),
+    ]
+
+
+def test_libres_por_dia_sin_limite():
+    assert libres_por_dia(None, {date(2026, 11, 1): 9}, date(2026, 11, 1), date(2026, 11, 1)) == [
+        (date(2026, 11, 1), None)
+    ]
+
+
+# --- Con base de datos (servicio 1: destino 1, $100; se le pone capacidad 4) ---
+
+ENERO = (date(2030, 1, 10), date(2030, 1, 12))
+
+
+def _con_capacidad(capacidad, servicio_id=1):
+    db.session.get(Servicio, servicio_id).capacidad = capacidad
+    db.session.commit()
+
+
+def test_ocupar_suma_en_cada_dia_del_rango(app_bd):
+    with app_bd.app_context():
+        _con_capacidad(4)
+
+        ocupar(1, *ENERO, 3)
+        db.session.commit()
+
+        assert ocupacion_por_dia(1, *ENERO) == {date(2030, 1, d): 3 for d in (10, 11, 12)}
+        assert lugar_libre(db.session.get(Servicio, 1), *ENERO) == 1
+
+
+def test_ocupar_llena_hasta_la_capacidad_exacta(app_bd):
+    with app_bd.app_context():
+        _con_capacidad(4)
+        ocupar(1, *ENERO, 3)
+        ocupar(1, *ENERO, 1)
+        db.session.commit()
+
+        with pytest.raises(SinCapacidad):
+            ocupar(1, *ENERO, 1)
+        db.session.rollback()
+
+        assert set(ocupacion_por_dia(1, *ENERO).values()) == {4}
+
+
+def test_ocupar_rechaza_si_un_solo_dia_esta_lleno(app_bd):
+    """El UPDATE condicional actualiza los otros días, pero el rowcount no alcanza."""
+    with app_bd.app_context():
+        _con_capacidad(4)
+        ocupar(1, date(2030, 1, 11), date(2030, 1, 11), 4)
+        db.session.commit()
+
+        with pytest.raises(SinCapacidad):
+            ocupar(1, *ENERO, 1)
+        db.session.rollback()
+
+        assert ocupacion_por_dia(1, *ENERO) == {date(2030, 1, 11): 4}
+
+
+def test_ocupar_sin_limite_no_falla(app_bd):
+    with app_bd.app_context():
+        ocupar(1, *ENERO, 500)
+        db.session.commit()
+
+        assert lugar_libre(db.session.get(Servicio, 1), *ENERO) is None
+
+
+def test_ocupar_rechaza_rangos_mas_largos_que_el_maximo(app_bd):
+    with app_bd.app_context():
+        app_bd.config['COTIZACION_MAX_DIAS'] = 3
+        ocupar(1, *ENERO, 1)
+
+        with pytest.raises(RangoDemasiadoLargo):
+            ocupar(1, date(2030, 1, 10), date(9999, 12, 31), 1)
+        db.session.commit()
+
+        assert len(ocupacion_por_dia(1, date(2030, 1, 1), date(9999, 12, 31))) == 3
+
+
+def test_servicios_disponibles_filtra_por_el_dia_mas_ocupado(app_bd):
+    with app_bd.app_context():
+        _con_capacidad(4)
+        db.session.add(Servicio(servicio_id=3, nombre='Cabañas', descripcion='Sin límite', precio_base=200,
+                                unidad='Día', destino_id=1, proveedor_id=4))
+        db.session.add(Servicio(servicio_id=4, nombre='Hostel', descripcion='Pausado', precio_base=20,
+                                unidad='Día', destino_id=1, proveedor_id=4, status='Pausado'))
+        db.session.commit()
+        ocupar(1, date(2030, 1, 12), date(2030, 1, 12), 3)
+        db.session.commit()
+
+        disponibles = [(s.servicio_id, libres) for s, libres in servicios_disponibles(1, *ENERO, 1)]
+        para_dos = [s.servicio_id for s, _ in servicios_disponibles(1, *ENERO, 2)]
+
+        assert disponibles == [(1, 1), (3, None)]
+        assert para_dos == [3]
@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+import pytest
+from app.extensions import db
+from app.models import Cotizacion, CotizacionArchivo, Reserva, ReservaArchivo
+from app.services.exportacion import columnas_de, elegir_columnas, exportar
+
+
+def test_sin_seleccion_se_exportan_todas_las_columnas():
+    assert elegir_columnas('reservas', None) == columnas_de('reservas')
+    assert elegir_columnas('cotizaciones', '') == columnas_de('cotizaciones')
+
+
+def test_seleccion_respeta_el_orden_pedido_sin_repetidas():
+    assert elegir_columnas('reservas', 'costo_total, reserva_id,costo_total') == ['costo_total', 'reserva_id']
+    assert elegir_columnas('cotizaciones', ['precio_total']) == ['precio_total']
+
+
+def test_tabla_o_columna_desconocida():
+    with pytest.raises(ValueError):
+        elegir_columnas('usuarios', None)
+    with pytest.raises(ValueError, match='contrasena'):
+        elegir_columnas('reservas', 'reserva_id,contrasena')
+
+
+# --- Con base de datos ---
+
+def _con_datos(app):
+    """Dos cotizaciones vigentes (la 1 creada en enero y vuelta a pedir en marzo), una archivada y sus reservas."""
+    with app.app_context():
+        db.session.add_all([
+            Cotizacion(cotizacion_id=1, usuario_id=5, servicio_id=1, fecha_inicio=date(2030, 4, 1),
+                       fecha_fin=date(2030, 4, 2), cantidad_personas=2, precio_total=400.0,
+                       fecha_creacion=datetime(2030, 1, 5, 10), fecha_solicitud=datetime(2030, 3, 1, 10)),
+            Cotizacion(cotizacion_id=2, usuario_id=5, servicio_id=2, fecha_inicio=date(2030, 4, 1),
+                       fecha_fin=date(2030, 4, 1), cantidad_personas=1, precio_total=50.0,
+                       fecha_creacion=datetime(2030, 2, 28, 23, 59), fecha_solicitud=datetime(2030, 2, 28, 23, 59)),
+            CotizacionArchivo(cotizacion_id=9, usuario_id=5, servicio_id=1, fecha_inicio=date(2029, 1, 1),
+                              fecha_fin=date(2029, 1, 1), cantidad_personas=1, precio_total=100.0, solicitudes=1,
+                              fecha_creacion=datetime(2029, 1, 1), fecha_solicitud=datetime(2029, 1, 1)),
+        ])
+        db.session.flush()
+        db.session.add_all([
+            Reserva(reserva_id=1, usuario_id=5, servicio_id=1, cotizacion_id=1, fecha_reserva=datetime(2030, 3, 2),
+                    fecha_servicio_inicio=date(2030, 4, 1), fecha_servicio_fin=date(2030, 4, 2),
+                    cantidad_personas=2, costo_total=400.0, estado='Pendiente'),
+            ReservaArchivo(reserva_id=7, usuario_id=5, servicio_id=1, cotizacion_id=9, fecha_reserva=datetime(2029, 1, 2),
+                           fecha_servicio_inicio=date(2029, 1, 1), fecha_servicio_fin=date(2029, 1, 1),
+                           cantidad_personas=1, costo_total=100.0, estado='Aceptada', version=1),
+        ])
+        db.session.commit()
+
+
+def _texto(app, *args, **kwargs):
+    with app.test_request_context():
+        return ''.join(exportar(*args, **kwargs))
+
+
+def test_exportar_csv_con_encabezado_y_filas_en_lotes(app_bd):
+    _con_datos(app_bd)
+
+    texto = _texto(app_bd, 'cotizaciones', 'csv', ['cotizacion_id', 'precio_total'], lote=1)
+
+    assert list(csv.reader(io.StringIO(texto))) == [['cotizacion_id', 'precio_total'], ['1', '400.0'], ['2', '50.0']]
+
+
+def test_exportar_csv_sin_filas_deja_el_encabezado(app_bd):
+    texto = _texto(app_bd, 'reservas', 'csv', ['reserva_id', 'estado'])
+
+    assert texto.splitlines() == ['reserva_id,estado']
+
+
+def test_exportar_ndjson_con_historial_agrega_las_archivadas_primero(app_bd):
+    _con_datos(app_bd)
+
+    texto = _texto(app_bd, 'reservas', 'ndjson', ['reserva_id', 'fecha_reserva', 'estado'], historial=True)
+
+    assert [json.loads(linea) for linea in texto.splitlines()] == [
+        {'reserva_id': 7, 'fecha_reserva': '2029-01-02T00:00:00', 'estado': 'Aceptada', 'archivada': True},
+        {'reserva_id': 1, 'fecha_reserva': '2030-03-02T00:00:00', 'estado': 'Pendiente', 'archivada': False},
+    ]
+
+
+def test_cotizaciones_se_filtran_por_fecha_de_creacion(app_bd):
+    """Volver a pedir la cotización 1 en marzo no la mueve fuera de enero."""
+    _con_datos(app_bd)
+
+    def ids(desde, hasta, historial=False):
+        texto = _texto(app_bd, 'cotizaciones', 'ndjson', ['cotizacion_id'], desde, hasta, historial)
+        return [json.loads(linea)['cotizacion_id'] for linea in texto.splitlines()]
+
+    assert ids(date(2030, 1, 1), date(2030, 1, 31)) == [1]
+    assert ids(date(2030, 3, 1), date(2030, 3, 31)) == []
+    # 'hasta' incluye el día completo
+    assert ids(date(2030, 2, 1), date(2030, 2, 28)) == [2]
+    assert ids(None, date(2029, 12, 31), historial=True) == [9]
+    assert ids(date(2029, 1, 1), None, historial=True) == [9, 1, 2]
+
+
+def test_ruta_exportar_datos(app_bd, cliente_de):
+    _con_datos(app_bd)
+    cliente = cliente_de(1)
+
+    respuesta = cliente.get('/admin/exportar?tabla=cotizaciones&formato=ndjson&columnas=cotizacion_id'
+                            '&columnas=solicitudes&desde=2030-01-01&hasta=2030-01-31')
+
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'application/x-ndjson'
+    assert 'cotizaciones_2030-01-01_2030-01-31.ndjson' in respuesta.headers['Content-Disposition']
+    assert [json.loads(linea) for linea in respuesta.get_data(as_text=True).splitlines()] == [
+        {'cotizacion_id': 1, 'solicitudes': 1}
+    ]
+
+
+def test_ruta_exportar_datos_rechaza_parametros_invalidos(app_bd, cliente_de):
+    cliente = cliente_de(1)
+
+    for consulta in ('formato=xlsx', 'columnas=contrasena', 'desde=ayer'):
+        respuesta = cliente.get(f'/admin/exportar?tabla=reservas&{consulta}')
+        assert respuesta.status_code == 302
@@ -1,6 +1,10 @@
+import re
 import pytest
+from datetime import datetime
+from html import unescape
 from flask import url_for, get_flashed_messages
 from flask_login import current_user
+from app.extensions import db
 from app.models import Usuario, Posteo
 class TestForoRoutes:
     
@@ -90,4 +94,114 @@ class TestForoRoutes:
             post = Posteo.query.filter_by(titulo=data['titulo']).first()
             assert post is not None, "El posteo no se encontró en la base de datos."
             
-            assert post.usuario_id == turista_user.usuario_id, "El autor del posteo no es el turista correcto."
\ No newline at end of file
+            assert post.usuario_id == turista_user.usuario_id, "El autor del posteo no es el turista correcto."
+
+# --- Con la base de app_bd ---
+
+def test_ultima_actividad_se_publica_en_utc(app_bd, cliente_de):
+    """El navegador interpreta el atributo datetime: sin zona lo tomaría como hora local."""
+    with app_bd.app_context():
+        db.session.add(Posteo(posteo_id=1, titulo='Hola', contenido='Primer posteo', usuario_id=5,
+                              fecha_creacion=datetime(2030, 1, 1, 12), ultima_actividad=datetime(2030, 1, 1, 12)))
+        db.session.commit()
+
+    html = cliente_de(5).get('/foro').get_data(as_text=True)
+
+    assert 'datetime="2030-01-01T12:00:00Z"' in html
+
+
+def _hilos_de_prueba(app):
+    """
+    Raíces 1-5 ('Posteo N'); 2, 3 y 4 empatan en fecha_creacion. La 1 es la más vieja
+    pero la de actividad más reciente: tiene la cadena de respuestas 6 -> 7 -> 8 -> 9.
+    """
+    with app.app_context():
+        creadas = {1: datetime(2030, 1, 1), 2: datetime(2030, 1, 2), 3: datetime(2030, 1, 2),
+                   4: datetime(2030, 1, 2), 5: datetime(2030, 1, 3)}
+        for posteo_id, fecha in creadas.items():
+            actividad = datetime(2030, 1, 10) if posteo_id == 1 else fecha
+            db.session.add(Posteo(posteo_id=posteo_id, titulo=f'Hilo {posteo_id}', contenido=f'Posteo {posteo_id}',
+                                  usuario_id=5, fecha_creacion=fecha, ultima_actividad=actividad))
+        padre = 1
+        for posteo_id in (6, 7, 8, 9):
+            db.session.add(Posteo(posteo_id=posteo_id, contenido=f'Respuesta {posteo_id}', usuario_id=5,
+                                  posteo_padre_id=padre, fecha_creacion=datetime(2030, 1, posteo_id)))
+            db.session.flush()
+            padre = posteo_id
+        db.session.commit()
+
+
+def _raices_en(html):
+    return [int(n) for n in re.findall(r'<p class="card-text">Posteo (\d+)</p>', html)]
+
+
+def _enlace(html, texto):
+    """href del enlace de paginación con ese texto, o None."""
+    encontrado = re.search(r'<a href="([^"]*)"[^>]*>' + re.escape(texto), html)
+    return unescape(encontrado.group(1)) if encontrado else None
+
+
+def _recorrer_foro(cliente, url):
+    paginas = []
+    while url:
+        html = cliente.get(url).get_data(as_text=True)
+        paginas.append(_raices_en(html))
+        url = _enlace(html, 'Comentarios anteriores')
+    return paginas
+
+
+@pytest.mark.parametrize('orden, esperado', [
+    ('recientes', [[5, 4], [3, 2], [1]]),
+    ('actividad', [[1, 5], [4, 3], [2]]),
+])
+def test_foro_pagina_por_cursor_en_cada_orden(app_bd, cliente_de, orden, esperado):
+    """Los empates de fecha se desempatan por ID: ninguna raíz se repite ni se pierde entre páginas."""
+    _hilos_de_prueba(app_bd)
+    app_bd.config['FORO_POSTEOS_POR_PAGINA'] = 2
+    cliente = cliente_de(5)
+
+    assert _recorrer_foro(cliente, f'/foro?orden={orden}') == esperado
+
+
+def test_foro_enlace_mas_recientes_solo_fuera_de_la_primera_pagina(app_bd, cliente_de):
+    _hilos_de_prueba(app_bd)
+    app_bd.config['FORO_POSTEOS_POR_PAGINA'] = 2
+    cliente = cliente_de(5)
+
+    primera = cliente.get('/foro?orden=actividad').get_data(as_text=True)
+    segunda = cliente.get(_enlace(primera, 'Comentarios anteriores')).get_data(as_text=True)
+
+    assert _enlace(primera, '← Más recientes') is None
+    assert _enlace(segunda, '← Más recientes') == '/foro?orden=actividad'
+
+
+def test_foro_cursor_invalido_vuelve_a_la_primera_pagina(app_bd, cliente_de):
+    _hilos_de_prueba(app_bd)
+    app_bd.config['FORO_POSTEOS_POR_PAGINA'] = 2
+    cliente = cliente_de(5)
+
+    for cursor in ('no-es-un-cursor', 'W10', 'WzEsMiwzXQ'):
+        html = cliente.get(f'/foro?cursor={cursor}&orden=desconocido').get_data(as_text=True)
+        assert _raices_en(html) == [5, 4]
+
+
+def test_respuestas_posteo_corta_en_la_profundidad_inicial(app_bd, cliente_de):
+    _hilos_de_prueba(app_bd)
+    app_bd.config['FORO_PROFUNDIDAD_INICIAL'] = 3
+
+    datos = cliente_de(5).get('/foro/posteo/1/respuestas').get_json()
+
+    cadena, nodo = [], {'respuestas': datos['respuestas']}
+    while nodo['respuestas']:
+        nodo = nodo['respuestas'][0]
+        cadena.append((nodo['posteo_id'], nodo['respuestas_pendientes']))
+    assert datos['posteo_id'] == 1
+    assert cadena == [(6, False), (7, False), (8, True)]
+    assert 'Respuesta 8' in datos['html'] and 'Respuesta 9' not in datos['html']
+
+
+def test_respuestas_posteo_inexistente(app_bd, cliente_de):
+    respuesta = cliente_de(5).get('/foro/posteo/999/respuestas')
+
+    assert respuesta.status_code == 404
+    assert respuesta.get_json() == {'error': 'Posteo no encontrado.'}
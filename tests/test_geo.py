@@ -0,0 +1,67 @@
+import math
+from app.services.geo import parsear_coordenadas, haversine_km, codificar_geohash, caja_envolvente
+
+
+def test_parsear_coordenadas():
+    """Acepta 'lat,lon' con espacios y rechaza formatos o rangos inválidos."""
+    assert parsear_coordenadas('-31.4167, -64.1833') == (-31.4167, -64.1833)
+    assert parsear_coordenadas('-31.4167') is None
+    assert parsear_coordenadas('abc,def') is None
+    assert parsear_coordenadas('95,10') is None
+
+
+def test_haversine_km_cordoba_carlos_paz():
+    """Córdoba capital - Villa Carlos Paz: unos 30 km en línea recta."""
+    distancia = haversine_km(-31.4167, -64.1833, -31.4241, -64.4978)
+    assert 29 < distancia < 31
+
+
+def test_codificar_geohash_valor_de_referencia():
+    """Valor de referencia del algoritmo geohash."""
+    assert codificar_geohash(57.64911, 10.40744, precision=11) == 'u4pruydqqvj'
+
+
+def test_caja_envolvente_contiene_el_radio():
+    """Los bordes de la caja quedan a (al menos) el radio pedido del centro."""
+    lat_min, lat_max, lon_min, lon_max = caja_envolvente(-31.4, -64.2, 10)
+
+    assert haversine_km(-31.4, -64.2, lat_max, -64.2) >= 10
+    assert haversine_km(-31.4, -64.2, lat_min, -64.2) >= 10
+    assert haversine_km(-31.4, -64.2, -31.4, lon_max) >= 10
+    assert haversine_km(-31.4, -64.2, -31.4, lon_min) >= 10
+    assert lat_min < -31.4 < lat_max and lon_min < -64.2 < lon_max
+
+
+def _destino(lat, lon, distancia_km, rumbo):
+    """Punto a 'distancia_km' del centro en la dirección 'rumbo' (grados desde el norte)."""
+    d = distancia_km / 6371.0088
+    phi, lam, theta = math.radians(lat), math.radians(lon), math.radians(rumbo)
+    phi2 = math.asin(math.sin(phi) * math.cos(d) + math.cos(phi) * math.sin(d) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(d) * math.cos(phi),
+                            math.cos(d) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), math.degrees(lam2)
+
+
+def test_caja_envolvente_contiene_los_puntos_del_borde_del_circulo():
+    for lat in (-70.0, -31.4, 0.0, 45.0):
+        lat_min, lat_max, lon_min, lon_max = caja_envolvente(lat, 10.0, 10)
+        for rumbo in range(0, 360, 15):
+            punto_lat, punto_lon = _destino(lat, 10.0, 9.999, rumbo)
+            assert lat_min <= punto_lat <= lat_max
+            assert lon_min <= punto_lon <= lon_max
+
+
+def test_destinos_cercanos_incluye_el_borde_norte_del_radio(app_bd):
+    from app.extensions import db
+    from app.models import Destino
+    from app.services.destinos import destinos_cercanos
+
+    lat, lon = _destino(-31.4167, -64.1833, 9.994, 0)
+    with app_bd.app_context():
+        db.session.add(Destino(destino_id=3, nombre='Norte', descripcion='Borde', categoria='Sierras',
+                               coordenadas=f'{lat},{lon}'))
+        db.session.commit()
+
+        cercanos = destinos_cercanos(-31.4167, -64.1833, 10)
+
+    assert [d['id'] for d in cercanos] == [1, 3]
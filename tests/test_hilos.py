@@ -0,0 +1,191 @@
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from app.services.hilos import construir_arbol
+
+
+def _posteo(posteo_id, padre=None, minutos=0):
+    return SimpleNamespace(
+        posteo_id=posteo_id,
+        posteo_padre_id=padre,
+        fecha_creacion=datetime(2025, 1, 1) + timedelta(minutes=minutos)
+    )
+
+
+def test_construir_arbol_respeta_orden_de_raices():
+    """Las raíces se devuelven en el orden pedido, no en el de la consulta."""
+    posteos = [_posteo(1, minutos=0), _posteo(2, minutos=5)]
+
+    arbol = construir_arbol(posteos, [2, 1])
+
+    assert [n.posteo.posteo_id for n in arbol] == [2, 1]
+
+
+def test_construir_arbol_anida_respuestas_por_fecha():
+    """Las respuestas cuelgan de su padre y quedan ordenadas cronológicamente."""
+    posteos = [
+        _posteo(1),
+        _posteo(4, padre=1, minutos=10),
+        _posteo(3, padre=1, minutos=5),
+        _posteo(5, padre=3, minutos=20),
+    ]
+
+    raiz, = construir_arbol(posteos, [1])
+
+    assert [n.posteo.posteo_id for n in raiz.respuestas] == [3, 4]
+    assert [n.posteo.posteo_id for n in raiz.respuestas[0].respuestas] == [5]
+    assert raiz.respuestas[1].respuestas == []
+
+
+# --- Con base de datos ---
+
+from app.extensions import db
+from app.models import Posteo
+from app.models.posteo import LARGO_RUTA, PROFUNDIDAD_MAXIMA
+from app.services.hilos import padre_de_respuesta, registrar_respuesta, registrar_baja, recalcular_contadores
+
+
+def _cadena(niveles):
+    """Un hilo lineal: raíz y 'niveles' respuestas, cada una a la anterior. Devuelve sus IDs."""
+    ids, padre_id = [], None
+    for _ in range(niveles + 1):
+        posteo = Posteo(contenido='Comentario de prueba', usuario_id=5, posteo_padre_id=padre_id)
+        db.session.add(posteo)
+        db.session.flush()
+        ids.append(posteo.posteo_id)
+        padre_id = posteo.posteo_id
+    db.session.commit()
+    return ids
+
+
+def test_la_ruta_del_nivel_maximo_entra_en_la_columna(app_bd):
+    with app_bd.app_context():
+        ids = _cadena(PROFUNDIDAD_MAXIMA)
+        ultimo = db.session.get(Posteo, ids[-1])
+
+        assert ultimo.profundidad == PROFUNDIDAD_MAXIMA
+        assert len(ultimo.ruta) <= LARGO_RUTA
+
+
+def test_respuesta_al_nivel_maximo_queda_como_hermana(app_bd, cliente_de):
+    with app_bd.app_context():
+        ids = _cadena(PROFUNDIDAD_MAXIMA)
+        assert padre_de_respuesta(ids[-1]).posteo_id == ids[-2]
+        assert padre_de_respuesta(ids[-2]).posteo_id == ids[-2]
+
+    respuesta = cliente_de(5).post('/foro', data={'contenido': 'Respuesta profunda', 'parent_id': ids[-1]})
+
+    assert respuesta.status_code == 302
+    with app_bd.app_context():
+        nuevo = db.session.scalars(db.select(Posteo).order_by(Posteo.posteo_id.desc())).first()
+        assert nuevo.posteo_padre_id == ids[-2]
+        assert nuevo.profundidad == PROFUNDIDAD_MAXIMA
+
+
+def test_respuesta_a_un_posteo_inexistente_no_se_guarda(app_bd, cliente_de):
+    respuesta = cliente_de(5).post('/foro', data={'contenido': 'Respuesta perdida', 'parent_id': '999'})
+
+    assert respuesta.status_code == 200
+    assert 'ya no existe' in respuesta.get_data(as_text=True)
+    with app_bd.app_context():
+        assert db.session.scalar(db.select(db.func.count()).select_from(Posteo)) == 0
+
+
+def _contadores(posteo_id):
+    posteo = db.session.get(Posteo, posteo_id)
+    db.session.refresh(posteo)
+    return posteo.cantidad_respuestas, posteo.cantidad_descendientes, posteo.version
+
+
+def _responder(padre_id):
+    posteo = Posteo(contenido='Respuesta de prueba', usuario_id=5, posteo_padre_id=padre_id)
+    db.session.add(posteo)
+    db.session.flush()
+    registrar_respuesta(posteo)
+    db.session.commit()
+    return posteo.posteo_id
+
+
+def test_registrar_respuesta_suma_en_todos_los_ancestros(app_bd):
+    with app_bd.app_context():
+        raiz, = _cadena(0)
+        hijo = _responder(raiz)
+        _responder(hijo)
+
+        # La raíz: 1 respuesta directa, 2 en total y una versión nueva por respuesta
+        assert _contadores(raiz) == (1, 2, 3)
+        assert _contadores(hijo)[:2] == (1, 1)
+
+
+def test_registrar_baja_descuenta_el_subarbol(app_bd):
+    with app_bd.app_context():
+        raiz, = _cadena(0)
+        hijo = _responder(raiz)
+        nieto = _responder(hijo)
+        _responder(nieto)
+        otro = _responder(raiz)
+
+        posteo = db.session.get(Posteo, hijo)
+        db.session.refresh(posteo)
+        registrar_baja(posteo)
+        db.session.delete(posteo)
+        db.session.commit()
+
+        assert _contadores(raiz)[:2] == (1, 1)
+        assert db.session.get(Posteo, otro) is not None
+
+
+def test_recalcular_contadores_repara_los_desvios(app_bd):
+    with app_bd.app_context():
+        raiz, hijo, nieto = _cadena(2)
+        db.session.execute(db.update(Posteo).values(cantidad_respuestas=7, cantidad_descendientes=7))
+        db.session.commit()
+
+        assert recalcular_contadores(tamano_lote=2) == 3
+        assert _contadores(raiz)[:2] == (1, 2)
+        assert _contadores(hijo)[:2] == (1, 1)
+        assert _contadores(nieto)[:2] == (0, 0)
+
+
+def test_el_fragmento_cacheado_trae_la_fecha_absoluta(app_bd, cliente_de):
+    """El "hace ..." no queda congelado en la caché: se calcula en el navegador."""
+    with app_bd.app_context():
+        _cadena(0)
+
+    html = cliente_de(5).get('/foro').get_data(as_text=True)
+
+    assert 'class="tiempo-relativo" datetime="' in html
+    assert 'hace instantes' not in html.split('<script>')[0]
+
+
+# --- Backfill de la migración de la ruta ---
+
+def _migracion_ruta():
+    ruta = Path(__file__).parents[1] / 'migrations' / 'versions' / '8d1d08db110e_ruta_materializada_en_posteo.py'
+    especificacion = importlib.util.spec_from_file_location('migracion_8d1d08db110e', ruta)
+    modulo = importlib.util.module_from_spec(especificacion)
+    especificacion.loader.exec_module(modulo)
+    return modulo
+
+
+def test_backfill_usa_el_mismo_limite_que_el_modelo():
+    assert _migracion_ruta().PROFUNDIDAD_MAXIMA == PROFUNDIDAD_MAXIMA
+
+
+def test_backfill_cuelga_los_niveles_de_mas_como_hermanos():
+    """Igual que padre_de_respuesta: lo que pasa del nivel máximo queda bajo el del nivel anterior."""
+    migracion = _migracion_ruta()
+    # Cadena 1 -> 2 -> ... -> 30, más el 40 colgado del 30 y el 50 con un padre que no existe
+    padres = {1: None, **{i: i - 1 for i in range(2, 31)}, 40: 30, 50: 999}
+
+    rutas = migracion._calcular_rutas(padres)
+
+    penultimo = PROFUNDIDAD_MAXIMA  # el ID i está en el nivel i - 1
+    for pid in range(1, penultimo + 2):
+        assert rutas[pid][1:] == (pid - 1, padres[pid])
+    for pid in list(range(penultimo + 2, 31)) + [40]:
+        assert rutas[pid][1:] == (PROFUNDIDAD_MAXIMA, penultimo)
+        assert rutas[pid][0] == rutas[penultimo][0] + f'{pid:010d}/'
+    assert rutas[50] == ('0000000050/', 0, 999)
+    assert max(len(ruta) for ruta, _, _ in rutas.values()) <= LARGO_RUTA
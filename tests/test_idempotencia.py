@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import pytest
+from flask import flash, jsonify, redirect
+from flask_login import login_required
+from app.extensions import db
+from app.models import ClaveIdempotencia
+from app.services.idempotencia import COMPLETA, EN_CURSO, ENCABEZADO, idempotente
+
+
+@pytest.fixture
+def llamadas(app_bd):
+    """Registra vistas de prueba con @idempotente; devuelve la lista de vistas ejecutadas."""
+    ejecutadas = []
+
+    def vista(nombre, respuesta):
+        @login_required
+        @idempotente
+        def _vista():
+            ejecutadas.append(nombre)
+            return respuesta()
+        app_bd.add_url_rule(f'/prueba/{nombre}', nombre, _vista, methods=['POST'])
+
+    def crear():
+        flash('Reserva creada', 'success')
+        return redirect('/mis_reservas')
+
+    def fallar():
+        if ejecutadas.count('falla') == 1:
+            return 'Error', 500
+        return jsonify({'ok': True}), 201
+
+    def explotar():
+        if ejecutadas.count('excepcion') == 1:
+            raise RuntimeError('caída')
+        return jsonify({'ok': True}), 201
+
+    vista('crear', crear)
+    vista('json', lambda: (jsonify({'llamada': len(ejecutadas)}), 201))
+    vista('falla', fallar)
+    vista('excepcion', explotar)
+    return ejecutadas
+
+
+def _clave(estado, fecha_toma, ruta='/prueba/json'):
+    db.session.add(ClaveIdempotencia(usuario_id=5, clave='abc', ruta=ruta, estado=estado, fecha_toma=fecha_toma))
+    db.session.commit()
+
+
+def test_reintento_devuelve_la_respuesta_guardada(app_bd, cliente_de, llamadas):
+    cliente = cliente_de(5)
+
+    primera = cliente.post('/prueba/json', headers={ENCABEZADO: 'abc'})
+    segunda = cliente.post('/prueba/json', headers={ENCABEZADO: 'abc'})
+
+    assert llamadas == ['json']
+    assert (segunda.status_code, segunda.get_json()) == (201, primera.get_json())
+    assert segunda.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_reintento_repite_redireccion_y_mensajes(app_bd, cliente_de, llamadas):
+    cliente = cliente_de(5)
+    cliente.post('/prueba/crear', data={'clave_idempotencia': 'abc'})
+    with cliente.session_transaction() as sesion:
+        sesion.pop('_flashes', None)
+
+    respuesta = cliente.post('/prueba/crear', data={'clave_idempotencia': 'abc'})
+
+    assert llamadas == ['crear']
+    assert respuesta.status_code == 302 and respuesta.location.endswith('/mis_reservas')
+    with cliente.session_transaction() as sesion:
+        assert sesion['_flashes'] == [('success', 'Reserva creada')]
+
+
+def test_error_5xx_libera_la_clave(app_bd, cliente_de, llamadas):
+    cliente = cliente_de(5)
+
+    assert cliente.post('/prueba/falla', headers={ENCABEZADO: 'abc'}).status_code == 500
+    assert cliente.post('/prueba/falla', headers={ENCABEZADO: 'abc'}).status_code == 201
+    assert llamadas == ['falla', 'falla']
+
+
+def test_excepcion_libera_la_clave(app_bd, cliente_de, llamadas):
+    cliente = cliente_de(5)
+
+    with pytest.raises(RuntimeError):
+        cliente.post('/prueba/excepcion', headers={ENCABEZADO: 'abc'})
+    with app_bd.app_context():
+        assert db.session.get(ClaveIdempotencia, (5, 'abc')) is None
+
+    assert cliente.post('/prueba/excepcion', headers={ENCABEZADO: 'abc'}).status_code == 201
+
+
+def test_clave_usada_en_otra_ruta_da_422(app_bd, cliente_de, llamadas):
+    cliente = cliente_de(5)
+    cliente.post('/prueba/json', headers={ENCABEZADO: 'abc'})
+
+    respuesta = cliente.post('/prueba/crear', headers={ENCABEZADO: 'abc'})
+
+    assert respuesta.status_code == 422
+    assert llamadas == ['json']
+
+
+def test_clave_en_curso_da_409(app_bd, cliente_de, llamadas):
+    app_bd.config['IDEMPOTENCIA_ESPERA_SEGUNDOS'] = 0.2
+    with app_bd.app_context():
+        # Tomada por una petición que sigue viva
+        _clave(EN_CURSO, datetime.utcnow() + timedelta(minutes=5))
+
+    respuesta = cliente_de(5).post('/prueba/json', headers={ENCABEZADO: 'abc'})
+
+    assert respuesta.status_code == 409
+    assert respuesta.headers['Retry-After'] == '1'
+    assert llamadas == []
+
+
+def test_clave_abandonada_en_curso_se_vuelve_a_tomar(app_bd, cliente_de, llamadas):
+    with app_bd.app_context():
+        # El proceso que la tomó murió hace una hora sin liberarla
+        _clave(EN_CURSO, datetime.utcnow() - timedelta(hours=1))
+
+    respuesta = cliente_de(5).post('/prueba/json', headers={ENCABEZADO: 'abc'})
+
+    assert respuesta.status_code == 201
+    assert llamadas == ['json']
+    with app_bd.app_context():
+        assert db.session.get(ClaveIdempotencia, (5, 'abc')).estado == COMPLETA
+
+
+def test_clave_abandonada_de_otra_ruta_no_se_toma(app_bd, cliente_de, llamadas):
+    with app_bd.app_context():
+        _clave(EN_CURSO, datetime.utcnow() - timedelta(hours=1), ruta='/prueba/crear')
+
+    respuesta = cliente_de(5).post('/prueba/json', headers={ENCABEZADO: 'abc'})
+
+    assert respuesta.status_code == 422
+    assert llamadas == []
@@ -0,0 +1,78 @@
+import io
+from app.services.importacion import formato_de_archivo, leer_filas, validar_fila
+
+DESTINOS = {1, 2}
+
+
+def _fila(**campos):
+    fila = {'nombre': 'Cabalgata', 'descripcion': 'Paseo', 'precio_base': '1500',
+            'unidad': 'Persona', 'destino_id': '1'}
+    fila.update(campos)
+    return fila
+
+
+def test_formato_de_archivo():
+    assert formato_de_archivo('servicios.CSV') == 'csv'
+    assert formato_de_archivo('servicios.jsonl') == 'ndjson'
+    assert formato_de_archivo('servicios.xlsx') is None
+    assert formato_de_archivo('servicios') is None
+
+
+def test_leer_filas_csv_informa_la_linea_del_archivo():
+    texto = io.StringIO('nombre,precio_base\nA,1\nB,2\n')
+    assert [(n, f['nombre']) for n, f in leer_filas(texto, 'csv')] == [(2, 'A'), (3, 'B')]
+
+
+def test_leer_filas_ndjson_entrega_errores_sin_cortar():
+    texto = io.StringIO('{"nombre": "A"}\nno es json\n\n[1, 2]\n{"nombre": "B"}\n')
+    filas = list(leer_filas(texto, 'ndjson'))
+    assert filas[0] == (1, {'nombre': 'A'})
+    assert filas[1] == (2, 'La línea no es JSON válido.')
+    assert filas[2] == (4, 'La línea debe ser un objeto JSON.')
+    assert filas[3] == (5, {'nombre': 'B'})
+
+
+def test_validar_fila_valida():
+    valores, error = validar_fila(_fila(capacidad='', precio_base=1500), DESTINOS)
+    assert error is None
+    assert valores == {'nombre': 'Cabalgata', 'descripcion': 'Paseo', 'precio_base': 1500.0,
+                       'unidad': 'Persona', 'status': 'Disponible', 'capacidad': None, 'destino_id': 1}
+
+
+def test_validar_fila_rechaza_datos_invalidos():
+    casos = [
+        (_fila(nombre=' '), 'Faltan campos obligatorios: nombre.'),
+        (_fila(unidad='Mes'), 'Unidad "Mes" inválida'),
+        (_fila(status='Borrado'), 'Status "Borrado" inválido'),
+        (_fila(precio_base='abc'), 'deben ser numéricos'),
+        (_fila(precio_base='0'), 'mayor a cero'),
+        (_fila(capacidad='0'), 'La capacidad'),
+        (_fila(destino_id='9'), 'El destino 9 no existe.'),
+        ('La línea no es JSON válido.', 'La línea no es JSON válido.'),
+    ]
+    for fila, mensaje in casos:
+        valores, error = validar_fila(fila, DESTINOS)
+        assert valores is None
+        assert mensaje in error
+
+
+def test_subir_servicios_importa_y_actualiza_los_totales(app_bd, cliente_de):
+    from app.services.panel_proveedor import totales_proveedor
+    cliente = cliente_de(4)
+    cliente.get('/proveedor')
+
+    archivo = io.BytesIO('nombre,descripcion,precio_base,unidad,destino_id\nKayak,Lago,30,Persona,2\n'.encode())
+    respuesta = cliente.post('/proveedor/importar_servicios', data={'archivo': (archivo, 'servicios.csv')},
+                             content_type='multipart/form-data')
+
+    assert '1 servicios importados' in respuesta.get_data(as_text=True)
+    with app_bd.app_context():
+        assert totales_proveedor(4).servicios == 3
+
+
+def test_subir_archivo_sin_formato_reconocido(app_bd, cliente_de):
+    cliente = cliente_de(1)
+    respuesta = cliente.post('/admin/importar_usuarios', data={'archivo': (io.BytesIO(b'x'), 'usuarios.xlsx')},
+                             content_type='multipart/form-data')
+
+    assert 'Formato no reconocido' in respuesta.get_data(as_text=True)
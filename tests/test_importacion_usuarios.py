@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask
+from flask_bcrypt import Bcrypt
+from app.services.importacion_usuarios import hashear_contrasenas, validar_usuario
+
+ROLES = {1, 4, 5}
+
+
+def _fila(**campos):
+    fila = {'nombre': 'Ana', 'apellido': 'Gómez', 'email': 'ana@agencia.com', 'contrasena': ' clave '}
+    fila.update(campos)
+    return fila
+
+
+def test_fila_valida_usa_el_rol_por_defecto():
+    valores, error = validar_usuario(_fila(dni=''), ROLES, 5)
+    assert error is None
+    assert valores['rol_id'] == 5 and valores['dni'] is None
+    # La contraseña se guarda tal cual, con sus espacios
+    assert valores['contrasena'] == ' clave '
+
+
+def test_fila_invalida_informa_el_motivo():
+    assert 'email' in validar_usuario(_fila(email=''), ROLES, 5)[1]
+    assert 'no es válido' in validar_usuario(_fila(email='ana'), ROLES, 5)[1]
+    assert 'no existe' in validar_usuario(_fila(rol_id='9'), ROLES, 5)[1]
+    assert '72 bytes' in validar_usuario(_fila(contrasena='x' * 73), ROLES, 5)[1]
+    assert validar_usuario(_fila(contrasena='x' * 73), ROLES, 5, largas=True)[1] is None
+
+
+def test_hashes_en_paralelo_se_verifican_con_flask_bcrypt():
+    app = Flask(__name__)
+    app.config['BCRYPT_LOG_ROUNDS'] = 4
+    bcrypt = Bcrypt(app)
+    contrasenas = [f'clave{i}' for i in range(7)]
+    with app.app_context(), ProcessPoolExecutor(max_workers=2) as pool:
+        hashes = hashear_contrasenas(contrasenas, pool, 2)
+    assert len(hashes) == len(contrasenas)
+    assert all(bcrypt.check_password_hash(h, c) for h, c in zip(hashes, contrasenas))
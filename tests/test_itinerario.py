@@ -0,0 +1,38 @@
+import itertools
+import random
+from app.services.geo import haversine_km
+from app.services.itinerario import matriz_distancias, ordenar_paradas
+
+
+def _paradas(cantidad, semilla=7):
+    azar = random.Random(semilla)
+    return [(i, azar.uniform(-35, -29), azar.uniform(-66, -62)) for i in range(cantidad)]
+
+
+def test_matriz_distancias_coincide_con_haversine():
+    matriz = matriz_distancias([-31.4167, -31.4241], [-64.1833, -64.4978])
+
+    assert abs(matriz[0, 1] - haversine_km(-31.4167, -64.1833, -31.4241, -64.4978)) < 1e-9
+    assert matriz[1, 0] == matriz[0, 1] and matriz[0, 0] == 0
+
+
+def test_ordenar_paradas_cerca_del_optimo():
+    """Con pocas paradas se compara contra la fuerza bruta (2-opt es heurístico)."""
+    paradas = _paradas(7)
+    matriz = matriz_distancias([p[1] for p in paradas], [p[2] for p in paradas])
+    optimo = min(
+        sum(matriz[a, b] for a, b in zip(orden, orden[1:]))
+        for orden in itertools.permutations(range(len(paradas)))
+    )
+
+    orden, total = ordenar_paradas(paradas)
+
+    assert sorted(orden) == list(range(7))
+    assert total <= optimo * 1.1
+
+
+def test_ordenar_paradas_respeta_el_inicio():
+    orden, _ = ordenar_paradas(_paradas(200), inicio_id=42)
+
+    assert orden[0] == 42
+    assert len(set(orden)) == 200
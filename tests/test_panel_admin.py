@@ -0,0 +1,142 @@
+import time
+from datetime import date, datetime
+from werkzeug.datastructures import MultiDict
+from app.extensions import db
+from app.models import Cotizacion, Reserva, ReservaArchivo
+from app.services import cache as modulo_cache
+from app.services.panel_admin import ORDENES_RESERVAS, contar_reservas, leer_filtros, pagina_reservas
+
+
+def test_filtros_validos_se_leen_de_la_query_string():
+    filtros = leer_filtros(MultiDict({
+        'estado': 'Aceptada', 'desde': '2026-03-01', 'hasta': '2026-03-31',
+        'destino_id': '7', 'historial': '1', 'orden': 'monto'
+    }))
+    assert filtros == {
+        'estado': 'Aceptada', 'desde': date(2026, 3, 1), 'hasta': date(2026, 3, 31),
+        'destino_id': 7, 'historial': True, 'orden': 'monto'
+    }
+
+
+def test_filtros_invalidos_se_ignoran():
+    filtros = leer_filtros(MultiDict({
+        'estado': 'Borrada', 'desde': 'ayer', 'destino_id': 'x', 'historial': 'si', 'orden': 'azar'
+    }))
+    assert filtros == {
+        'estado': None, 'desde': None, 'hasta': None,
+        'destino_id': None, 'historial': False, 'orden': 'recientes'
+    }
+
+
+# --- Con base de datos ---
+# Reservas vigentes 1-6 (servicio 1 en destino 1, servicio 2 en destino 2) con empates de
+# fecha_reserva y de monto, y la 7 archivada, cuyo usuario y servicio ya no existen.
+
+RESERVAS = [
+    # reserva_id, servicio_id, fecha_reserva, inicio, fin, costo_total, estado
+    (1, 1, datetime(2030, 1, 1), date(2030, 3, 1), date(2030, 3, 3), 300.0, 'Aceptada'),
+    (2, 2, datetime(2030, 1, 1), date(2030, 3, 5), date(2030, 3, 5), 50.0, 'Pendiente'),
+    (3, 1, datetime(2030, 1, 2), date(2030, 2, 1), date(2030, 2, 1), 300.0, 'Pendiente'),
+    (4, 2, datetime(2030, 1, 2), date(2030, 4, 1), date(2030, 4, 2), 100.0, 'Rechazada'),
+    (5, 1, datetime(2030, 1, 2), date(2030, 3, 1), date(2030, 3, 1), 100.0, 'Aceptada'),
+    (6, 2, datetime(2030, 1, 3), date(2030, 3, 10), date(2030, 3, 11), 50.0, 'Pendiente'),
+]
+
+
+def _con_reservas(app):
+    with app.app_context():
+        for reserva_id, servicio_id, fecha, inicio, fin, costo, estado in RESERVAS:
+            db.session.add(Cotizacion(cotizacion_id=reserva_id, usuario_id=5, servicio_id=servicio_id,
+                                      fecha_inicio=inicio, fecha_fin=fin, cantidad_personas=reserva_id,
+                                      precio_total=costo))
+            db.session.add(Reserva(reserva_id=reserva_id, usuario_id=5, servicio_id=servicio_id,
+                                   cotizacion_id=reserva_id, fecha_reserva=fecha, fecha_servicio_inicio=inicio,
+                                   fecha_servicio_fin=fin, cantidad_personas=reserva_id, costo_total=costo,
+                                   estado=estado))
+        db.session.add(ReservaArchivo(reserva_id=7, usuario_id=99, servicio_id=99, cotizacion_id=99,
+                                      fecha_reserva=datetime(2029, 6, 1), fecha_servicio_inicio=date(2029, 7, 1),
+                                      fecha_servicio_fin=date(2029, 7, 1), cantidad_personas=1,
+                                      costo_total=500.0, estado='Aceptada', version=1))
+        db.session.commit()
+
+
+def _filtros(**campos):
+    filtros = leer_filtros(MultiDict())
+    filtros.update(campos)
+    return filtros
+
+
+def _recorrer(filtros, tamano=2):
+    """IDs de todas las páginas siguiendo el cursor."""
+    ids, cursor = [], None
+    while True:
+        filas, cursor = pagina_reservas(filtros, cursor, tamano)
+        ids.extend(f.reserva_id for f in filas)
+        if cursor is None:
+            return ids
+
+
+def test_cada_orden_recorre_todas_las_reservas_sin_repetir(app_bd):
+    _con_reservas(app_bd)
+    esperado = {
+        'recientes': [6, 5, 4, 3, 2, 1, 7],
+        'antiguas': [7, 1, 2, 3, 4, 5, 6],
+        'fecha_servicio': [7, 3, 1, 5, 2, 6, 4],
+        'monto': [7, 3, 1, 5, 4, 6, 2],
+    }
+    assert set(esperado) == set(ORDENES_RESERVAS)
+    with app_bd.test_request_context():
+        for orden, ids in esperado.items():
+            for tamano in (1, 2, 3, 10):
+                assert _recorrer(_filtros(orden=orden, historial=True), tamano) == ids, (orden, tamano)
+
+
+def test_filtros_del_reporte(app_bd):
+    _con_reservas(app_bd)
+    with app_bd.test_request_context():
+        assert _recorrer(_filtros()) == [6, 5, 4, 3, 2, 1]
+        assert _recorrer(_filtros(estado='Aceptada', historial=True)) == [5, 1, 7]
+        assert _recorrer(_filtros(destino_id=2, historial=True)) == [6, 4, 2]
+        # Se solapan con [3/3, 5/3]
+        assert _recorrer(_filtros(desde=date(2030, 3, 3), hasta=date(2030, 3, 5))) == [2, 1]
+
+
+def test_reserva_archivada_sin_usuario_ni_servicio_se_muestra(app_bd):
+    _con_reservas(app_bd)
+    with app_bd.test_request_context():
+        filas, _ = pagina_reservas(_filtros(orden='antiguas', historial=True), None, 1)
+
+    assert [(f.reserva_id, f.archivada, f.nombre, f.servicio, f.destino) for f in filas] == [
+        (7, True, None, None, None)
+    ]
+
+
+def test_contar_reservas_se_guarda_hasta_el_ttl(app_bd, monkeypatch):
+    _con_reservas(app_bd)
+    ahora = [time.monotonic()]
+    monkeypatch.setattr(modulo_cache.time, 'monotonic', lambda: ahora[0])
+    with app_bd.test_request_context():
+        assert contar_reservas(_filtros()) == 6
+        assert contar_reservas(_filtros(historial=True)) == 7
+        # El orden no cambia el total: usa la misma entrada
+        db.session.delete(db.session.get(Reserva, 6))
+        db.session.commit()
+        assert contar_reservas(_filtros(orden='monto')) == 6
+
+        ahora[0] += app_bd.config['ADMIN_CONTEO_TTL'] + 1
+        assert contar_reservas(_filtros()) == 5
+
+
+def test_admin_panel_muestra_la_pagina_y_el_enlace_siguiente(app_bd, cliente_de):
+    _con_reservas(app_bd)
+    app_bd.config['ADMIN_RESERVAS_POR_PAGINA'] = 4
+    cliente = cliente_de(1)
+
+    primera = cliente.get('/admin?orden=antiguas&historial=1').get_data(as_text=True)
+    assert 'Reporte de Reservas (7)' in primera
+    assert 'Servicio eliminado' in primera
+    assert 'Siguiente página' in primera and 'Primera página' not in primera
+
+    cursor = primera.split('cursor=')[1].split('&')[0].split('"')[0]
+    segunda = cliente.get(f'/admin?orden=antiguas&historial=1&cursor={cursor}').get_data(as_text=True)
+    assert 'Primera página' in segunda and 'Siguiente página' not in segunda
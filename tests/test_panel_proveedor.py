@@ -0,0 +1,27 @@
+from app.extensions import db
+from app.models import Servicio
+from app.services.panel_proveedor import invalidar_totales, totales_proveedor
+
+
+def test_totales_proveedor_se_cachean_hasta_invalidarlos(app_bd):
+    with app_bd.app_context():
+        assert totales_proveedor(4).servicios == 2
+
+        db.session.add(Servicio(nombre='Kayak', descripcion='Lago', precio_base=30, unidad='Persona',
+                                destino_id=2, proveedor_id=4))
+        db.session.commit()
+        assert totales_proveedor(4).servicios == 2
+
+        invalidar_totales(4)
+        assert totales_proveedor(4).servicios == 3
+
+
+def test_crear_servicio_desde_el_panel_actualiza_los_totales(app_bd, cliente_de):
+    cliente = cliente_de(4)
+    cliente.get('/proveedor')
+
+    cliente.post('/proveedor/crear_servicio', data={'nombre': 'Kayak', 'descripcion': 'Lago', 'precio_base': '30',
+                                                    'unidad': 'Persona', 'destino_id': '2'})
+
+    with app_bd.app_context():
+        assert totales_proveedor(4).servicios == 3
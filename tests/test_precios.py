@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+import pytest
+from app.services.precios import (TarifaCompilada, cotizar_servicio, multiplicadores_diarios,
+                                  suma_multiplicadores_rango)
+
+ORIGEN = date(2026, 10, 1)
+
+
+def _regla(tipo, multiplicador, **campos):
+    datos = dict(fecha_desde=None, fecha_hasta=None, personas_min=None)
+    datos.update(campos)
+    return SimpleNamespace(tipo=tipo, multiplicador=multiplicador, **datos)
+
+
+REGLAS = [
+    _regla('fin_de_semana', 1.5),
+    _regla('temporada', 2.0, fecha_desde=date(2026, 11, 2), fecha_hasta=date(2026, 11, 2)),
+    _regla('grupo', 0.9, personas_min=4),
+    _regla('grupo', 0.8, personas_min=10),
+]
+
+
+def test_sin_reglas_equivale_al_precio_base():
+    tarifa = TarifaCompilada(100.0, 'Día', [], ORIGEN)
+
+    totales = tarifa.cotizar([date(2026, 11, 1)], [date(2026, 11, 3)], [2])
+
+    assert totales.tolist() == [600.0]
+
+
+def test_rango_suma_multiplicadores_y_aplica_tramo_de_grupo():
+    """Sáb 31/10 y dom 1/11 x1.5, lun 2/11 x2 (temporada), mar 3/11 x1: 6 días ponderados."""
+    tarifa = TarifaCompilada(100.0, 'Día', REGLAS, ORIGEN)
+    inicio, fin = date(2026, 10, 31), date(2026, 11, 3)
+
+    totales = tarifa.cotizar([inicio] * 3, [fin] * 3, [2, 4, 12])
+
+    assert totales.tolist() == [1200.0, 2160.0, 100.0 * 12 * 0.8 * 6]
+
+
+def test_unidad_por_persona_toma_el_dia_de_inicio():
+    tarifa = TarifaCompilada(50.0, 'Persona', REGLAS, ORIGEN)
+
+    totales = tarifa.cotizar([date(2026, 10, 31)], [date(2026, 11, 3)], [1])
+
+    assert totales.tolist() == [75.0]
+
+
+def test_fechas_fuera_de_la_tabla_compilada():
+    """Fuera del horizonte se evalúa el rango puntual con las mismas reglas."""
+    tarifa = TarifaCompilada(100.0, 'Día', REGLAS, ORIGEN, horizonte=30)
+    inicio, fin = date(2030, 11, 2), date(2030, 11, 4)  # sábado a lunes
+
+    esperado = multiplicadores_diarios(REGLAS, inicio, 3).sum() * 100.0
+
+    assert tarifa.cotizar([inicio], [fin], [1]).tolist() == [esperado] == [400.0]
+
+
+def test_suma_por_tramos_coincide_con_la_suma_dia_por_dia():
+    reglas = REGLAS + [
+        _regla('temporada', 1.25, fecha_desde=date(2027, 1, 5), fecha_hasta=date(2027, 2, 20)),
+        _regla('temporada', 0.5, fecha_desde=date(2027, 2, 1), fecha_hasta=date(2027, 3, 3)),
+        _regla('temporada', 3.0, fecha_desde=date(2027, 5, 1), fecha_hasta=date(2027, 4, 1)),
+    ]
+    for inicio in (date(2026, 10, 30), date(2027, 1, 1), date(2027, 2, 14)):
+        for dias in (1, 2, 6, 7, 8, 40, 200):
+            fin = inicio + timedelta(days=dias - 1)
+            esperado = multiplicadores_diarios(reglas, inicio, dias).sum()
+            assert suma_multiplicadores_rango(reglas, inicio, fin) == pytest.approx(esperado)
+
+
+def test_rango_enorme_fuera_de_la_tabla_no_recorre_los_dias():
+    tarifa = TarifaCompilada(1.0, 'Día', [_regla('fin_de_semana', 2.0)], ORIGEN, horizonte=30)
+    inicio, fin = date(2030, 1, 1), date(9999, 12, 31)
+    dias = (fin - inicio).days + 1
+    findes = multiplicadores_diarios([_regla('fin_de_semana', 2.0)], inicio, dias).sum() - dias
+
+    assert tarifa.cotizar([inicio] * 100, [fin] * 100, [1] * 100).tolist() == [dias + findes] * 100
+
+
+def test_cotizar_servicio_rechaza_rangos_mayores_al_maximo(app_bd):
+    servicio = SimpleNamespace(servicio_id=1, precio_base=100.0, unidad='Día')
+    inicio = date(2027, 1, 1)
+    with app_bd.app_context():
+        app_bd.config['COTIZACION_MAX_DIAS'] = 10
+        assert cotizar_servicio(servicio, 1, inicio, inicio + timedelta(days=9)) == 1000.0
+        with pytest.raises(ValueError):
+            cotizar_servicio(servicio, 1, inicio, inicio + timedelta(days=10))
@@ -0,0 +1,138 @@
+from datetime import date
+from app.extensions import db
+from app.models import Cotizacion, Reserva, Servicio, Usuario
+from app.services.disponibilidad import ocupacion_por_dia
+from app.services.reservas import transicionar
+
+INICIO, FIN = date(2030, 3, 1), date(2030, 3, 2)
+
+
+def _reserva(personas=2, usuario_id=5, fin=FIN):
+    cotizacion = Cotizacion(usuario_id=usuario_id, servicio_id=1, fecha_inicio=INICIO, fecha_fin=fin,
+                            cantidad_personas=personas, precio_total=100.0 * personas)
+    db.session.add(cotizacion)
+    db.session.flush()
+    reserva = Reserva(usuario_id=usuario_id, servicio_id=1, cotizacion_id=cotizacion.cotizacion_id,
+                      fecha_servicio_inicio=INICIO, fecha_servicio_fin=fin,
+                      cantidad_personas=personas, costo_total=cotizacion.precio_total)
+    db.session.add(reserva)
+    db.session.commit()
+    return reserva.reserva_id
+
+
+def _estado(reserva_id):
+    reserva = db.session.get(Reserva, reserva_id)
+    db.session.refresh(reserva)
+    return reserva.estado, reserva.version
+
+
+def test_aceptar_incrementa_la_version_y_ocupa(app_bd):
+    with app_bd.app_context():
+        reserva_id = _reserva()
+
+        hechas, fallidas = transicionar('aceptar', [(reserva_id, 0)], 4)
+        db.session.commit()
+
+        assert (hechas, fallidas) == ([reserva_id], {})
+        assert _estado(reserva_id) == ('Aceptada', 1)
+        assert set(ocupacion_por_dia(1, INICIO, FIN).values()) == {2}
+
+
+def test_version_vieja_no_cambia_la_reserva(app_bd):
+    with app_bd.app_context():
+        reserva_id = _reserva()
+        transicionar('rechazar', [(reserva_id, 0)], 4)
+        db.session.commit()
+
+        hechas, fallidas = transicionar('aceptar', [(reserva_id, 0)], 4)
+
+        assert hechas == []
+        assert 'ya tiene el estado "Rechazada"' in fallidas[reserva_id]
+        assert _estado(reserva_id) == ('Rechazada', 1)
+
+
+def test_version_vieja_en_el_mismo_estado(app_bd):
+    """Otra pestaña cambió la reserva y la devolvió a Pendiente: la versión ya no coincide."""
+    with app_bd.app_context():
+        reserva_id = _reserva()
+        db.session.get(Reserva, reserva_id).version = 3
+        db.session.commit()
+
+        hechas, fallidas = transicionar('aceptar', [(reserva_id, 2)], 4)
+
+        assert hechas == []
+        assert 'modificada en otra sesión' in fallidas[reserva_id]
+
+
+def test_reserva_de_otro_proveedor(app_bd):
+    with app_bd.app_context():
+        db.session.add(Usuario(usuario_id=6, nombre='Otro', apellido='Proveedor', email='otro@test.com',
+                               dni='6', contrasena='x', rol_id=4))
+        db.session.commit()
+        reserva_id = _reserva()
+
+        hechas, fallidas = transicionar('aceptar', [(reserva_id, 0)], 6)
+
+        assert hechas == []
+        assert fallidas[reserva_id] == 'La reserva no corresponde a tus servicios.'
+        assert _estado(reserva_id) == ('Pendiente', 0)
+
+
+def test_sin_capacidad_vuelve_a_pendiente_dentro_del_lote(app_bd):
+    """La que no entra vuelve a Pendiente con otra versión; las demás del lote se aceptan."""
+    with app_bd.app_context():
+        db.session.get(Servicio, 1).capacidad = 3
+        db.session.commit()
+        primera, segunda = _reserva(usuario_id=5), _reserva(usuario_id=1)
+
+        hechas, fallidas = transicionar('aceptar', [(primera, 0), (segunda, 0)], 4)
+        db.session.commit()
+
+        assert hechas == [primera]
+        assert 'No hay lugar' in fallidas[segunda]
+        assert _estado(primera) == ('Aceptada', 1)
+        assert _estado(segunda) == ('Pendiente', 2)
+        assert set(ocupacion_por_dia(1, INICIO, FIN).values()) == {2}
+
+
+def test_rango_demasiado_largo_no_se_acepta(app_bd):
+    """Una reserva anterior al límite de días vuelve a Pendiente sin escribir su ocupación."""
+    with app_bd.app_context():
+        reserva_id = _reserva(fin=date(2130, 3, 1))
+
+        hechas, fallidas = transicionar('aceptar', [(reserva_id, 0)], 4)
+        db.session.commit()
+
+        assert hechas == []
+        assert 'hasta 366 días' in fallidas[reserva_id]
+        assert _estado(reserva_id) == ('Pendiente', 2)
+        assert ocupacion_por_dia(1, INICIO, date(2130, 3, 1)) == {}
+
+
+def test_reservar_cotizacion_rechaza_rangos_demasiado_largos(app_bd, cliente_de):
+    with app_bd.app_context():
+        cotizacion = Cotizacion(usuario_id=5, servicio_id=1, fecha_inicio=INICIO, fecha_fin=date(2031, 3, 2),
+                                cantidad_personas=1, precio_total=100.0)
+        db.session.add(cotizacion)
+        db.session.commit()
+        cotizacion_id = cotizacion.cotizacion_id
+
+    respuesta = cliente_de(5).post(f'/reservar_cotizacion/{cotizacion_id}', follow_redirects=True)
+
+    assert 'Las reservas admiten hasta 366 días.' in respuesta.get_data(as_text=True)
+    with app_bd.app_context():
+        assert Reserva.query.filter_by(cotizacion_id=cotizacion_id).count() == 0
+
+
+def test_cambiar_reserva_sin_version_da_400(app_bd, cliente_de):
+    with app_bd.app_context():
+        reserva_id = _reserva()
+    cliente = cliente_de(4)
+
+    assert cliente.post(f'/proveedor/aceptar_reserva/{reserva_id}').status_code == 400
+    respuesta = cliente.post('/proveedor/reservas/lote', json={'accion': 'aceptar', 'reservas': [{'id': reserva_id}]})
+    assert respuesta.status_code == 400
+    formulario = cliente.post('/proveedor/reservas/lote', data={'accion': 'aceptar', 'reservas': [str(reserva_id)]})
+    assert formulario.status_code == 400
+    with app_bd.app_context():
+        assert _estado(reserva_id) == ('Pendiente', 0)
@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from app.extensions import db
+from app.models import Cotizacion, CotizacionArchivo, Reserva, ReservaArchivo, ResumenMensual
+from app.services.archivo import archivar_historial
+from app.services.cotizaciones import guardar_cotizacion
+from app.services.reservas import transicionar
+from app.services.resumenes import CONTADORES, recalcular_resumenes, registrar_reserva
+
+
+def _resumenes():
+    return {
+        (r.destino_id, r.proveedor_id, r.mes): tuple(getattr(r, c) for c in CONTADORES)
+        for r in db.session.scalars(db.select(ResumenMensual))
+    }
+
+
+def _reservar(cotizacion_id):
+    """Lo mismo que reservar_cotizacion: la reserva y su evento en la misma transacción."""
+    cotizacion = db.session.get(Cotizacion, cotizacion_id)
+    reserva = Reserva(usuario_id=cotizacion.usuario_id, servicio_id=cotizacion.servicio_id,
+                      cotizacion_id=cotizacion_id, fecha_servicio_inicio=cotizacion.fecha_inicio,
+                      fecha_servicio_fin=cotizacion.fecha_fin, cantidad_personas=cotizacion.cantidad_personas,
+                      costo_total=cotizacion.precio_total, estado='Pendiente', fecha_reserva=datetime.utcnow())
+    db.session.add(reserva)
+    db.session.flush()
+    registrar_reserva(reserva.servicio_id, reserva.fecha_reserva)
+    db.session.commit()
+    return reserva.reserva_id
+
+
+def _igual_al_recalculo():
+    incremental = _resumenes()
+    recalcular_resumenes()
+    assert _resumenes() == incremental
+    return incremental
+
+
+def test_incremental_coincide_con_el_recalculo_en_todo_el_ciclo(app_bd):
+    """Crear, repetir, reservar, aceptar, rechazar y archivar: cada paso deja lo mismo que rearmar."""
+    pasado = date(2020, 5, 1)
+    with app_bd.app_context():
+        aceptada, _ = guardar_cotizacion(5, 1, pasado, pasado, 2, 200.0)
+        rechazada, _ = guardar_cotizacion(5, 2, pasado, pasado, 1, 50.0)
+        guardar_cotizacion(1, 1, pasado, pasado, 3, 300.0)
+        # Repetida: renueva fecha_solicitud pero no es otra cotización
+        guardar_cotizacion(5, 1, pasado, pasado, 2, 200.0)
+        db.session.commit()
+        _igual_al_recalculo()
+
+        reserva_aceptada, reserva_rechazada = _reservar(aceptada), _reservar(rechazada)
+        _igual_al_recalculo()
+
+        transicionar('aceptar', [(reserva_aceptada, 0)], 4)
+        transicionar('rechazar', [(reserva_rechazada, 0)], 4)
+        db.session.commit()
+        totales = _igual_al_recalculo()
+
+        movidas = archivar_historial()
+        assert (movidas['reservas'], movidas['cotizaciones']) == (2, 3)
+        assert db.session.scalar(db.select(db.func.count()).select_from(CotizacionArchivo)) == 3
+        assert db.session.scalar(db.select(db.func.count()).select_from(ReservaArchivo)) == 2
+        assert _igual_al_recalculo() == totales
+
+        mes = date.today().replace(day=1)
+        assert totales[(1, 4, mes)] == (2, 1, 1, 0, 200.0)
+        assert totales[(2, 4, mes)] == (1, 1, 0, 1, 0.0)
+
+
+def test_renovar_la_solicitud_no_mueve_la_cotizacion_de_mes(app_bd):
+    with app_bd.app_context():
+        cotizacion_id, _ = guardar_cotizacion(5, 1, date(2030, 1, 10), date(2030, 1, 10), 2, 200.0)
+        db.session.commit()
+        antes = _resumenes()
+
+        # Se volvió a pedir meses después: solo cambia fecha_solicitud
+        db.session.get(Cotizacion, cotizacion_id).fecha_solicitud = datetime(2031, 6, 15)
+        db.session.commit()
+
+        assert _igual_al_recalculo() == antes